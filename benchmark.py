@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+"""
+Mesures de performance de MineSpyder
+Données synthétiques réalistes, sans réseau extérieur (scan: faux serveurs sur 127.0.0.1):
+python benchmark.py [json] [lazy] [scan] [motd] [memory] [table] [store] [--servers N] [--ports N] [--records N]
+"""
+
+import gc
+import io
+import re
+import sys
+import time
+import random
+import tracemalloc
+import base64
+import os
+import tempfile
+import argparse
+import asyncio
+import contextlib
+import multiprocessing
+
+from src import jsoncodec
+from src.scanner import MinecraftScanner, MinecraftServer, LazyMinecraftServer
+from src.geoip import GeoLocator
+from src.favicons import favicon_store
+from src.chat import parse_motd
+from src import columns
+from src.store import ResultStore
+from src.protocol import pack_varint
+
+
+def timed(function, repeat: int = 1) -> float:
+    """Meilleur temps (secondes) sur repeat exécutions"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def make_status(rng: random.Random) -> dict:
+    """Réponse status typique: MOTD à composants, échantillon de joueurs, favicon 64x64"""
+    return {
+        "version": {"name": rng.choice(["1.20.4", "Paper 1.20.1", "1.8.8", "BungeeCord 1.8.x-1.20.x"]),
+                    "protocol": rng.choice([765, 763, 47])},
+        "players": {"max": rng.choice([20, 100, 1000]), "online": rng.randint(0, 500),
+                    "sample": [{"name": f"Joueur{rng.randint(0, 99999)}", "id": f"{rng.getrandbits(128):032x}"}
+                               for _ in range(rng.randint(0, 12))]},
+        "description": {"text": "", "extra": [
+            {"text": "Serveur ", "color": "gold", "bold": True},
+            {"text": rng.choice(["Survie", "Créatif", "Skyblock", "Factions"]), "color": "green"},
+            {"text": f" §7- §e{rng.randint(1, 40)} mini-jeux\n", "italic": False},
+            {"translate": "multiplayer.status.ping", "with": [{"text": "§cNouveau!"}]}
+        ]},
+        "favicon": "data:image/png;base64," + base64.b64encode(rng.randbytes(6000)).decode('ascii'),
+        "enforcesSecureChat": True
+    }
+
+
+def make_modded_status(rng: random.Random, mods: int = 200) -> dict:
+    """Réponse status d'un serveur Forge: make_status plus la liste des mods (forgeData)"""
+    status = make_status(rng)
+    status["forgeData"] = {"channels": [], "fmlNetworkVersion": 3, "truncated": False,
+                           "mods": [{"modId": f"mod{rng.randint(0, 9999)}", "modmarker": f"1.{rng.randint(0, 20)}.0"}
+                                    for _ in range(mods)]}
+    return status
+
+
+def make_scanner() -> MinecraftScanner:
+    """Scanner sans géolocalisation (aucun accès réseau ni base GeoIP)"""
+    return MinecraftScanner(geolocator=GeoLocator(providers=[]))
+
+
+def make_servers(count: int, rng: random.Random):
+    """count serveurs construits comme par un scan (quelques dizaines de favicons distincts)"""
+    scanner = make_scanner()
+    favicons = [make_status(rng)["favicon"] for _ in range(50)]
+    servers = []
+    for i in range(count):
+        status = make_status(rng)
+        status["favicon"] = rng.choice(favicons)
+        server = scanner._build_server(f"{10 + i // 65536}.{i // 256 % 256}.{i % 256}.1", 25565, status,
+                                       rng.randint(5, 300))
+        server.location = {"country": rng.choice(["France", "Germany", "United States"]),
+                           "city": "Paris", "lat": 48.85, "lon": 2.35}
+        servers.append(server)
+    return servers
+
+
+def bench_json(args):
+    """Décodage des réponses status, encodage et décodage d'un fichier de résultats"""
+    rng = random.Random(42)
+    payloads = [jsoncodec.dumps(make_status(rng)) for _ in range(2000)]
+    servers = make_servers(args.servers, rng)
+    document = {"servers": [server.to_dict() for server in servers],
+                "favicons": favicon_store.export(server.favicon_hash for server in servers)}
+    backends = ["json"] + (["orjson"] if jsoncodec.orjson is not None else [])
+    if len(backends) == 1:
+        print("⚠️  orjson n'est pas installé (pip install orjson): seule la bibliothèque standard est mesurée")
+
+    print(f"🧪 JSON: {len(payloads)} réponses status, fichier de {len(servers)} serveurs")
+    results = {}
+    initial = jsoncodec.backend()
+    try:
+        for name in backends:
+            jsoncodec.set_backend(name)
+            encoded = jsoncodec.dumps_bytes(document, indent=True)
+            parse = timed(lambda: [jsoncodec.loads(payload) for payload in payloads], repeat=5)
+            save = timed(lambda: jsoncodec.dumps_bytes(document, indent=True), repeat=3)
+            load = timed(lambda: jsoncodec.load(io.BytesIO(encoded)), repeat=3)
+            results[name] = (parse, save, load)
+    finally:
+        jsoncodec.set_backend(initial)
+
+    print(f"\n{'':10} {'status (µs/réponse)':>20} {'encodage (s)':>14} {'décodage (s)':>14}")
+    for name, (parse, save, load) in results.items():
+        print(f"{name:10} {parse / len(payloads) * 1e6:>20.1f} {save:>14.3f} {load:>14.3f}")
+    if "orjson" in results:
+        base, fast = results["json"], results["orjson"]
+        print(f"🚀 orjson: status x{base[0] / fast[0]:.1f}, encodage x{base[1] / fast[1]:.1f}, "
+              f"décodage x{base[2] / fast[2]:.1f}")
+    print(f"📦 Fichier de résultats: {len(encoded) / 1e6:.1f} Mo")
+
+
+def bench_lazy(args):
+    """Construction des serveurs depuis les réponses status brutes: décodage complet ou paresseux"""
+    rng = random.Random(42)
+    payloads = [jsoncodec.dumps_bytes(make_status(rng)) for _ in range(1000)]
+    payloads += [jsoncodec.dumps_bytes(make_modded_status(rng)) for _ in range(1000)]
+    eager = make_scanner()
+    lazy = make_scanner()
+    lazy.lazy_status = True
+
+    def build(scanner, touch):
+        servers = [scanner._server_from_payload("10.0.0.1", 25565, payload, 20) for payload in payloads]
+        if touch:
+            for server in servers:
+                server.name
+        return servers
+
+    print(f"🧪 Statut paresseux: {len(payloads)} réponses status (moitié avec 200 mods Forge), "
+          f"{sum(map(len, payloads)) / len(payloads) / 1024:.1f} Ko en moyenne")
+    results = [
+        ("complet", timed(lambda: build(eager, False), repeat=5)),
+        ("paresseux, écarté", timed(lambda: build(lazy, False), repeat=5)),
+        ("paresseux, affiché", timed(lambda: build(lazy, True), repeat=5)),
+    ]
+    print(f"\n{'':22} {'µs/réponse':>12}")
+    for name, duration in results:
+        print(f"{name:22} {duration / len(payloads) * 1e6:>12.1f}")
+    print(f"🚀 Serveur écarté avant tout accès (whitelist, filtre): x{results[0][1] / results[1][1]:.1f}")
+    assert all(isinstance(server, LazyMinecraftServer) for server in build(lazy, False))
+
+
+def serve_status(port_count: int, ports):
+    """Processus serveur: port_count faux serveurs status sur 127.0.0.1 (ports renvoyés par ports)"""
+    rng = random.Random(7)
+    responses = []
+    for i in range(50):
+        payload = jsoncodec.dumps_bytes(make_modded_status(rng) if i % 2 else make_status(rng))
+        body = b'\x00' + pack_varint(len(payload)) + payload
+        responses.append(pack_varint(len(body)) + body)
+
+    async def handle(reader, writer):
+        # Handshake et status request arrivent ensemble: répondre dès la première lecture
+        if await reader.read(1024):
+            writer.write(rng.choice(responses))
+            await writer.drain()
+        writer.close()
+
+    async def main():
+        servers = [await asyncio.start_server(handle, '127.0.0.1', 0, backlog=1024) for _ in range(port_count)]
+        ports.send([server.sockets[0].getsockname()[1] for server in servers])
+        await asyncio.Event().wait()
+
+    asyncio.run(main())
+
+
+def bench_scan(args):
+    """Scan complet (scan_multiple_ranges, moteur threads) de faux serveurs locaux: statut complet ou paresseux"""
+    context = multiprocessing.get_context('spawn')
+    receiver, sender = context.Pipe(duplex=False)
+    server = context.Process(target=serve_status, args=(args.ports, sender), daemon=True)
+    server.start()
+    ports = receiver.recv()
+    print(f"🧪 Scan local: {len(ports)} faux serveurs status (moitié avec 200 mods Forge)")
+    try:
+        results = []
+        for name, lazy_status in (("complet", False), ("paresseux", True)):
+            scanner = make_scanner()
+            scanner.lazy_status = lazy_status
+            best_wall = best_cpu = float('inf')
+            for _ in range(3):
+                scanner.clear_servers()
+                wall, cpu = time.perf_counter(), time.process_time()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    scanner.scan_multiple_ranges(["127.0.0.1/32"], ports, max_threads=50, timeout=3,
+                                                 randomize=False)
+                best_wall = min(best_wall, time.perf_counter() - wall)
+                best_cpu = min(best_cpu, time.process_time() - cpu)
+            assert len(scanner.servers) == len(ports)
+            results.append((name, best_wall, best_cpu))
+    finally:
+        server.terminate()
+
+    print(f"\n{'':12} {'durée (s)':>10} {'CPU µs/serveur':>16}")
+    for name, wall, cpu in results:
+        print(f"{name:12} {wall:>10.2f} {cpu / len(ports) * 1e6:>16.1f}")
+    print(f"🚀 Serveurs publiés sans être affichés: CPU x{results[0][2] / results[1][2]:.1f}")
+
+
+def legacy_parse_motd(motd_text: str) -> str:
+    """Ancien utils.parse_minecraft_motd (huit re.sub non compilés), pour comparaison"""
+    clean_text = re.sub(r'§.', '', motd_text)
+    clean_text = re.sub(r'"color":\s*"[^"]*"', '', clean_text)
+    clean_text = re.sub(r'"bold":\s*(?:true|false)', '', clean_text)
+    clean_text = re.sub(r'"italic":\s*(?:true|false)', '', clean_text)
+    clean_text = re.sub(r'"underlined":\s*(?:true|false)', '', clean_text)
+    clean_text = re.sub(r'"strikethrough":\s*(?:true|false)', '', clean_text)
+    clean_text = re.sub(r'"obfuscated":\s*(?:true|false)', '', clean_text)
+    clean_text = re.sub(r'\s+', ' ', clean_text)
+    return clean_text.strip()
+
+
+def bench_motd(args):
+    """Nettoyage des MOTD: anciens re.sub sur le JSON texte contre le parcours unique des composants"""
+    rng = random.Random(42)
+    descriptions = [make_status(rng)["description"] for _ in range(20000)]
+    texts = [jsoncodec.dumps(description) for description in descriptions]
+    searches = ["survie", "mini", "skyblock", "factions", "nouveau"]
+
+    def search_legacy():
+        # Nettoyage refait à chaque recherche
+        for term in searches:
+            [text for text in texts if term in legacy_parse_motd(text).lower()]
+
+    def search_ingested():
+        # Nettoyage fait une fois à l'ingestion, recherches sur le texte brut
+        motds = [parse_motd(description)[0].lower() for description in descriptions]
+        for term in searches:
+            [motd for motd in motds if term in motd]
+
+    print(f"🧪 MOTD: {len(descriptions)} descriptions à composants (extra, translate, codes §)")
+    legacy = timed(lambda: [legacy_parse_motd(text) for text in texts], repeat=5)
+    flat = timed(lambda: [parse_motd(description) for description in descriptions], repeat=5)
+    legacy_search = timed(search_legacy, repeat=3)
+    ingested_search = timed(search_ingested, repeat=3)
+    rows = [
+        ("re.sub (texte brut seul)", legacy),
+        ("parcours (brut + codes §)", flat),
+        (f"re.sub à chaque recherche (x{len(searches)})", legacy_search),
+        (f"parcours à l'ingestion + {len(searches)} recherches", ingested_search),
+    ]
+    print(f"\n{'':40} {'µs/MOTD':>10}")
+    for name, duration in rows:
+        print(f"{name:40} {duration / len(texts) * 1e6:>10.2f}")
+    print(f"🚀 Un nettoyage: x{legacy / flat:.1f}, ingestion puis {len(searches)} recherches: "
+          f"x{legacy_search / ingested_search:.1f}")
+    print(f"   re.sub     : {legacy_parse_motd(texts[0])[:70]}")
+    print(f"   parcours   : {parse_motd(descriptions[0])[0][:70]!r}")
+
+
+class LegacyServer:
+    """Ancienne représentation de MinecraftServer (__dict__, IP texte, localisation en dictionnaire)"""
+
+    def __init__(self, ip: str, port: int = 25565):
+        self.ip = ip
+        self.port = port
+        self.name = ""
+        self.description = ""
+        self.motd = ""
+        self.version = ""
+        self.protocol = 0
+        self.players_online = 0
+        self.players_max = 0
+        self.players_list = []
+        self.plugins = []
+        self.map = ""
+        self.mods = []
+        self.ping = 0
+        self.favicon_hash = None
+        self.whitelist = False
+        self.location = {"country": "Unknown", "city": "Unknown", "lat": 0, "lon": 0}
+        self.last_seen = time.time()
+        self.online = True
+        self.edition = "java"
+        self.hostnames = []
+
+
+def fresh(text: str) -> str:
+    """Copie distincte d'une chaîne, comme celles que crée le décodage JSON de chaque réponse"""
+    return (text + " ")[:-1]
+
+
+def fill_records(cls, count: int) -> list:
+    """count serveurs remplis comme après scan et géolocalisation (chaînes décodées une à une)"""
+    rng = random.Random(42)
+    versions = ["1.20.4", "Paper 1.20.1", "1.8.8", "BungeeCord 1.8.x-1.20.x", "Velocity 3.3.0"]
+    places = [("France", "Paris"), ("Germany", "Falkenstein"), ("United States", "Ashburn"),
+              ("Canada", "Montreal"), ("Finland", "Helsinki")]
+    records = []
+    for i in range(count):
+        server = cls(f"{10 + i // 65536}.{i // 256 % 256}.{i % 256}.1", 25565)
+        server.name = server.description = server.motd = fresh("A Minecraft Server")
+        server.version = fresh(rng.choice(versions))
+        server.protocol = 765
+        server.players_online = rng.randint(0, 500)
+        server.players_max = 1000
+        server.ping = rng.randint(5, 300)
+        country, city = rng.choice(places)
+        server.location = {"country": fresh(country), "city": fresh(city),
+                           "lat": rng.uniform(-90, 90), "lon": rng.uniform(-180, 180)}
+        records.append(server)
+    return records
+
+
+def bench_memory(args):
+    """Mémoire de --records serveurs: ancienne représentation contre __slots__ compacte"""
+    print(f"🧪 Mémoire: {args.records} serveurs (sans favicon ni liste de joueurs)")
+    results = []
+    for name, cls in (("__dict__ (ancien)", LegacyServer), ("__slots__", MinecraftServer)):
+        gc.disable()  # Aucune collecte pendant la construction: seule la mémoire retenue est mesurée
+        tracemalloc.start()
+        try:
+            records = fill_records(cls, args.records)
+            results.append((name, tracemalloc.get_traced_memory()[0]))
+        finally:
+            tracemalloc.stop()
+            gc.enable()
+        del records
+
+    print(f"\n{'':20} {'Mo':>10} {'octets/serveur':>16}")
+    for name, size in results:
+        print(f"{name:20} {size / 1e6:>10.1f} {size / args.records:>16.0f}")
+    print(f"📉 Mémoire divisée par {results[0][1] / results[1][1]:.1f}")
+
+
+def bench_table(args):
+    """Statistiques, top-K et filtres: boucles Python sur les objets contre la table en colonnes"""
+    if not columns.available():
+        print("⚠️  NumPy n'est pas installé (pip install numpy): mesure de la table ignorée")
+        return
+    records = fill_records(MinecraftServer, args.records)
+    print(f"🧪 Table en colonnes: {len(records)} serveurs")
+    table = columns.ServerTable()
+    build = timed(lambda: table.rebuild(records))
+
+    def stats_loop():
+        countries, versions, players = {}, {}, 0
+        for server in records:
+            country = server.location.get('country', 'Inconnu')
+            countries[country] = countries.get(country, 0) + 1
+            versions[server.version] = versions.get(server.version, 0) + 1
+            players += server.players_online
+        return (players, sorted(countries.items(), key=lambda x: x[1], reverse=True)[:5],
+                sorted(versions.items(), key=lambda x: x[1], reverse=True)[:5])
+
+    def filter_loop():
+        return [server for server in records
+                if server.players_online >= 100 and server.ping <= 50 and server.country == "France"]
+
+    rows = [
+        ("statistiques", timed(stats_loop, repeat=3), timed(lambda: table.stats(top=5), repeat=5)),
+        ("top 10 joueurs", timed(lambda: sorted(records, key=lambda server: server.players_online,
+                                                reverse=True)[:10], repeat=3),
+         timed(lambda: table.top('players_online', 10), repeat=5)),
+        ("filtre joueurs/ping/pays", timed(filter_loop, repeat=3),
+         timed(lambda: table.where(players_online=(100, None), ping=(None, 50), country="France"), repeat=5)),
+    ]
+    loop_stats, table_stats = stats_loop(), table.stats(top=5)
+    assert loop_stats[0] == table_stats['players_online'] and loop_stats[1] == table_stats['countries']
+    assert len(filter_loop()) == len(table.where(players_online=(100, None), ping=(None, 50), country="France"))
+
+    print(f"\n{'':26} {'boucle (ms)':>12} {'colonnes (ms)':>14} {'gain':>8}")
+    for name, loop, vectorized in rows:
+        print(f"{name:26} {loop * 1e3:>12.1f} {vectorized * 1e3:>14.1f} {loop / vectorized:>7.0f}x")
+    print(f"📥 Remplissage de la table: {build:.2f} s ({build / len(records) * 1e6:.1f} µs/serveur)")
+
+
+def bench_store(args):
+    """Base SQLite: débit des écritures groupées et temps d'une page, d'un comptage et des statistiques"""
+    servers = make_servers(args.servers, random.Random(6))
+    print(f"🧪 Base SQLite: {len(servers)} serveurs")
+    with tempfile.TemporaryDirectory() as directory:
+        store = ResultStore(os.path.join(directory, "results.db"))
+
+        def write():
+            for server in servers:
+                store.add(server)
+            store.flush()
+
+        insert = timed(write)
+        update = timed(write)  # Mêmes serveurs: mises à jour (ON CONFLICT) et historique
+        last = (len(servers) // 100 - 1) * 100
+        rows = [
+            ("première page (100)", timed(lambda: store.page(0, 100), repeat=5)),
+            ("dernière page (100)", timed(lambda: store.page(last, 100), repeat=5)),
+            ("page filtrée par pays", timed(lambda: store.page(0, 100, country="France"), repeat=5)),
+            ("comptage par pays", timed(lambda: store.count(country="France"), repeat=5)),
+            ("statistiques", timed(lambda: store.stats(top=5), repeat=5)),
+            ("parcours complet", timed(lambda: sum(1 for _ in store.iter_servers()))),
+        ]
+        assert store.count() == len(servers) and len(store.page(last, 100)) == 100
+        store.close()
+
+    print(f"📥 Insertion: {insert:.2f} s ({len(servers) / insert:,.0f} serveurs/s)")
+    print(f"🔁 Mise à jour: {update:.2f} s ({len(servers) / update:,.0f} serveurs/s)")
+    for name, seconds in rows:
+        print(f"   {name:26} {seconds * 1e3:>9.1f} ms")
+
+
+BENCHMARKS = {
+    'json': bench_json,
+    'lazy': bench_lazy,
+    'scan': bench_scan,
+    'motd': bench_motd,
+    'memory': bench_memory,
+    'table': bench_table,
+    'store': bench_store,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="🕷️ MineSpyder - mesures de performance")
+    parser.add_argument('benchmarks', nargs='*', metavar='MESURE',
+                        help=f"Mesures à lancer parmi {', '.join(BENCHMARKS)} (toutes par défaut)")
+    parser.add_argument('--servers', type=int, default=50000, help="Nombre de serveurs synthétiques")
+    parser.add_argument('--ports', type=int, default=2000, help="Nombre de faux serveurs locaux de la mesure scan")
+    parser.add_argument('--records', type=int, default=1000000, help="Nombre de serveurs des mesures mémoire et table")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.benchmarks if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"mesure inconnue: {', '.join(unknown)}")
+
+    for name in args.benchmarks or BENCHMARKS:
+        BENCHMARKS[name](args)
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Interface en ligne de commande de MineSpyder
+Scan sans interface graphique, sur un ou plusieurs processus
+"""
+
+import os
+import sys
+import time
+import argparse
+from src.scanner import MinecraftScanner, MinecraftServer
+from src.config import Config
+from src.monitor import ServerMonitor
+from src.bedrock import DEFAULT_BEDROCK_PORT
+from src.resolver import load_host_file
+from src.exclusions import ExclusionList
+from src.distributed import ScanCoordinator, run_local_workers, DEFAULT_CHUNK_SIZE, DEFAULT_LEASE_TIMEOUT
+from src.store import ResultStore, ORDER_COLUMNS
+
+
+def build_parser(config: Config) -> argparse.ArgumentParser:
+    """Crée le parseur d'arguments (valeurs par défaut lues dans la configuration)"""
+    parser = argparse.ArgumentParser(description="🕷️ MineSpyder - scanner de serveurs Minecraft")
+    parser.add_argument('ranges', nargs='*',
+                        help="Plages CIDR à scanner (défaut: scan_settings.scan_ranges)")
+    parser.add_argument('-p', '--ports', type=int, nargs='+', default=None,
+                        help="Ports à scanner (défaut: scan_settings.ports, 19132 pour bedrock)")
+    parser.add_argument('-w', '--workers', type=int, default=config.get_workers(),
+                        help="Nombre de processus de scan")
+    parser.add_argument('-e', '--engine', choices=['threads', 'asyncio', 'pipeline', 'bedrock'],
+                        default=config.get_scan_engine(), help="Moteur de scan")
+    parser.add_argument('-t', '--threads', type=int, default=config.get_max_threads(),
+                        help="Threads par processus (moteurs threads et pipeline)")
+    parser.add_argument('-c', '--concurrency', type=int, default=config.get_concurrency(),
+                        help="Connexions simultanées par processus (moteurs asyncio et pipeline)")
+    parser.add_argument('--timeout', type=float, default=config.get_scan_timeout(),
+                        help="Timeout de connexion en secondes")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="Graine du parcours pseudo-aléatoire")
+    parser.add_argument('-o', '--output', default=None,
+                        help="Fichier JSON où sauvegarder les serveurs trouvés")
+    parser.add_argument('--checkpoint', metavar='FICHIER', default=None,
+                        help="Sauvegarde périodiquement l'avancement dans ce fichier")
+    parser.add_argument('--checkpoint-interval', type=float, default=30,
+                        help="Secondes entre deux sauvegardes de l'avancement")
+    parser.add_argument('--resume', metavar='FICHIER', default=None,
+                        help="Reprend le scan enregistré dans ce point de reprise")
+    parser.add_argument('--hosts', metavar='FICHIER', default=None,
+                        help="Scanne les noms d'hôte de ce fichier (un par ligne, hôte ou hôte:port) au lieu de plages")
+    parser.add_argument('--query', action='store_true',
+                        help="Complète les serveurs trouvés par Query UDP (joueurs, plugins, carte) même si query.enabled est faux")
+    parser.add_argument('--monitor', metavar='FICHIER', default=None,
+                        help="Surveille les serveurs de ce fichier (re-ping continu) jusqu'à Ctrl+C")
+    parser.add_argument('--job', metavar='DB', default=None,
+                        help="Scan distribué: crée le job dans ce fichier SQLite partagé et lance --workers workers locaux")
+    parser.add_argument('--join', metavar='DB', default=None,
+                        help="Scan distribué: rejoint les jobs de ce fichier SQLite avec --workers workers")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="Cibles par morceau loué aux workers (scan distribué)")
+    parser.add_argument('--lease-timeout', type=float, default=DEFAULT_LEASE_TIMEOUT,
+                        help="Secondes sans battement de cœur avant qu'un morceau soit repris (scan distribué)")
+    parser.add_argument('--db', metavar='FICHIER', default=config.get('storage.database'),
+                        help="Base SQLite où enregistrer les serveurs au fil du scan (défaut: storage.database)")
+    parser.add_argument('--list', action='store_true',
+                        help="Affiche une page des serveurs de la base --db au lieu de scanner")
+    parser.add_argument('--page', type=int, default=1, help="Numéro de la page affichée par --list")
+    parser.add_argument('--page-size', type=int, default=50, help="Serveurs par page (--list)")
+    parser.add_argument('--sort', choices=ORDER_COLUMNS, default='last_seen', help="Tri des pages (--list)")
+    parser.add_argument('--country', default=None, help="Filtre --list sur un pays")
+    parser.add_argument('--game-version', default=None, help="Filtre --list sur une version")
+    parser.add_argument('--search', default=None, help="Filtre --list sur un texte (IP, nom, MOTD...)")
+    return parser
+
+
+def enable_query(scanner: MinecraftScanner, config: Config):
+    """Active Query avec les réglages de la section query (option --query)"""
+    if scanner.query_enricher is None:
+        scanner.enable_query(timeout=config.get('query.timeout', 2), retries=config.get('query.retries', 1),
+                             concurrency=config.get('query.concurrency', 1000), port=config.get('query.port'))
+
+
+def run_distributed(args, ranges, config: Config) -> int:
+    """Crée le job (--job) puis fait tourner des workers locaux jusqu'à la fin des morceaux"""
+    db_path = args.job or args.join
+    coordinator = ScanCoordinator(db_path, args.lease_timeout)
+    if args.job:
+        options = {'max_threads': args.threads, 'timeout': args.timeout, 'engine': args.engine,
+                   'concurrency': args.concurrency}
+        # Seules les listes d'exclusion sont nécessaires ici (pas de scanner ni de géolocalisation)
+        exclusions = ExclusionList.from_files(path for path in config.get('exclusions.files', [])
+                                              if os.path.exists(path))
+        job_id = coordinator.create_job(ranges, args.ports, chunk_size=args.chunk_size, seed=args.seed,
+                                        options=options, exclude=exclusions.intervals or None)
+        print(f"📋 Job {job_id} créé dans {db_path}")
+
+    processes = run_local_workers(db_path, max(args.workers, 1), args.lease_timeout)
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        print("\n⏹️ Workers interrompus (les morceaux en cours seront repris à l'expiration de leur bail)")
+        for process in processes:
+            process.terminate()
+
+    status = coordinator.status()
+    print(f"🎉 Morceaux terminés: {status['done']} - en attente: {status['pending'] + status['leased']} "
+          f"- {status['found']} serveurs")
+    if args.output:
+        scanner = MinecraftScanner()
+        scanner.servers = [MinecraftServer.from_dict(data) for data in coordinator.results()]
+        scanner.save_servers(args.output)
+    coordinator.close()
+    return 0
+
+
+def enable_store(scanner: MinecraftScanner, args, config: Config):
+    """Enregistre les résultats dans la base --db; sans -o ils ne sont pas gardés en mémoire"""
+    scanner.enable_store(args.db, batch_size=config.get('storage.batch_size', 500),
+                         max_delay=config.get('storage.max_delay', 1.0), history=config.get('storage.history', True),
+                         keep_in_memory=args.output is not None)
+
+
+def run_list(args) -> int:
+    """Affiche une page des serveurs enregistrés dans la base --db"""
+    if not args.db:
+        print("❌ --list demande une base (--db FICHIER ou storage.database)")
+        return 1
+    store = ResultStore(args.db)
+    filters = {'country': args.country, 'version': args.game_version, 'search': args.search}
+    total = store.count(**filters)
+    pages = max(1, -(-total // args.page_size))
+    page = min(max(1, args.page), pages)
+    print(f"📄 Page {page}/{pages} - {total} serveurs")
+    for server in store.page((page - 1) * args.page_size, args.page_size, order_by=args.sort,
+                             descending=args.sort not in ('ip', 'country', 'version', 'name', 'ping'), **filters):
+        print(f"  {server.ip}:{server.port:<6} {server.players_online:>5}/{server.players_max:<6} {server.ping:>4}ms "
+              f"{server.version[:20]:<20} {server.country[:15]:<15} {server.name[:50]}")
+    store.close()
+    return 0
+
+
+def run_monitor(args, config: Config) -> int:
+    """Re-ping en continu les serveurs d'un fichier, puis les réenregistre à l'arrêt"""
+    scanner = MinecraftScanner.from_config(config)
+    scanner.load_servers(args.monitor)
+    if args.query:
+        enable_query(scanner, config)
+    monitor = ServerMonitor.from_config(scanner, config)
+    monitor.start()
+    print(f"👁️  Surveillance de {len(monitor)} serveurs ({monitor.probe_budget} sondes/s) - Ctrl+C pour arrêter")
+    try:
+        while True:
+            time.sleep(monitor.interval)
+            stats = monitor.stats()
+            print(f"📊 {stats['online']}/{stats['tracked']} en ligne - {stats['probes']} sondes")
+    except KeyboardInterrupt:
+        print("\n⏹️ Surveillance arrêtée")
+    monitor.stop()
+    if scanner.query_enricher is not None:
+        scanner.query_enricher.flush()
+    scanner.save_servers(args.output or args.monitor)
+    return 0
+
+
+def main(argv=None):
+    """Point d'entrée de la ligne de commande"""
+    config = Config()
+    args = build_parser(config).parse_args(argv)
+    ranges = args.ranges or config.get('scan_settings.scan_ranges', [])
+    if args.ports is None:
+        args.ports = [DEFAULT_BEDROCK_PORT] if args.engine == 'bedrock' else config.get_scan_ports()
+
+    if args.list:
+        return run_list(args)
+
+    if args.monitor:
+        return run_monitor(args, config)
+
+    if args.job or args.join:
+        return run_distributed(args, ranges, config)
+
+    scanner = MinecraftScanner.from_config(config)
+    if args.query:
+        enable_query(scanner, config)
+    if args.db:
+        enable_store(scanner, args, config)
+
+    def on_progress(progress, scanned, total, found):
+        print(f"\r📊 {progress:.1f}% ({scanned}/{total}) - {found} serveurs", end='', flush=True)
+
+    def on_complete(count):
+        print(f"\n🎉 Scan terminé: {count} serveurs trouvés")
+
+    scanner.add_callback('progress_update', on_progress)
+    scanner.add_callback('scan_complete', on_complete)
+
+    try:
+        if args.resume:
+            scanner.resume(args.resume, args.checkpoint_interval)
+        elif args.hosts:
+            scanner.scan_hosts(load_host_file(args.hosts), max_threads=args.threads, timeout=args.timeout,
+                               engine=args.engine, concurrency=args.concurrency)
+        else:
+            scanner.scan_multiple_ranges(ranges, args.ports, max_threads=args.threads, timeout=args.timeout,
+                                         engine=args.engine, concurrency=args.concurrency, seed=args.seed,
+                                         workers=args.workers, checkpoint_path=args.checkpoint,
+                                         checkpoint_interval=args.checkpoint_interval)
+    except KeyboardInterrupt:
+        print("\n⏹️ Scan interrompu")
+        scanner.stop_scan()
+
+    if args.output:
+        scanner.save_servers(args.output)
+    if scanner.store is not None:
+        scanner.disable_store()
+        print(f"🗄️  Résultats enregistrés dans {args.db}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -28,7 +28,7 @@ class SimpleMineSpyderApp:
         
         # Configuration
         self.config = Config()
-        self.scanner = MinecraftScanner()
+        self.scanner = MinecraftScanner.from_config(self.config)
         
         self.setup_ui()
     
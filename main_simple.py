@@ -16,8 +16,10 @@ class SimpleMineSpyderGUI:
         self.root.title("MineSpyder - Minecraft Server Scanner")
         self.root.geometry("900x700")
         
-        self.scanner = MinecraftScanner()
         self.config = Config()
+        self.scanner = MinecraftScanner.from_config(self.config)
+        
+        self.tree_items = {}  # (ip, port) -> élément du treeview
         
         self.setup_ui()
         self.setup_callbacks()
@@ -127,6 +129,7 @@ class SimpleMineSpyderGUI:
     def setup_callbacks(self):
         """Configure les callbacks du scanner"""
         self.scanner.add_callback('server_found', self.on_server_found)
+        self.scanner.add_callback('server_removed', self.on_server_removed)
         self.scanner.add_callback('progress_update', self.on_progress_update)
         self.scanner.add_callback('scan_started', self.on_scan_started)
         self.scanner.add_callback('scan_complete', self.on_scan_complete)
@@ -186,6 +189,7 @@ class SimpleMineSpyderGUI:
         """Efface les résultats"""
         for item in self.tree.get_children():
             self.tree.delete(item)
+        self.tree_items.clear()
         self.scanner.clear_servers()
         self.status_label.config(text="Résultats effacés")
     
@@ -199,7 +203,14 @@ class SimpleMineSpyderGUI:
         version_text = server.version or "Inconnue"
         location_text = f"{server.location['city']}, {server.location['country']}"
         
-        self.tree.insert('', 'end', values=(ip_text, name_text, players_text, ping_text, version_text, location_text))
+        item = self.tree.insert('', 'end', values=(ip_text, name_text, players_text, ping_text, version_text, location_text))
+        self.tree_items[(server.ip, server.port)] = item
+    
+    def on_server_removed(self, server):
+        """Appelé quand un serveur est retiré (whitelist détectée)"""
+        item = self.tree_items.pop((server.ip, server.port), None)
+        if item is not None:
+            self.tree.delete(item)
     
     def on_progress_update(self, progress, scanned, total, found):
         """Appelé lors de la mise à jour du progrès"""
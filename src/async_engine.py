@@ -0,0 +1,228 @@
+"""
+Moteur de scan asynchrone pour MineSpyder
+Exécute l'échange handshake/status avec des milliers de connexions sur un seul thread
+"""
+
+import asyncio
+import time
+from typing import Iterable, Tuple
+
+try:
+    from .protocol import PacketReader, ProtocolError, status_payload
+except ImportError:
+    from protocol import PacketReader, ProtocolError, status_payload
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def raise_fd_limit(wanted: int) -> int:
+    """Relève la limite de descripteurs de fichiers si possible et retourne la limite effective"""
+    if resource is None:
+        return wanted
+    try:
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if soft == resource.RLIM_INFINITY or soft >= wanted:
+            return wanted
+        target = wanted if hard == resource.RLIM_INFINITY else min(wanted, hard)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+        return target
+    except (ValueError, OSError):
+        soft, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+        return soft
+
+
+class AsyncStatusEngine:
+    """Moteur de ping asyncio: une coroutine par cible, bornée par un sémaphore"""
+
+    # Descripteurs réservés au reste du processus (fichiers, GUI, whitelist...)
+    RESERVED_FDS = 64
+
+    def __init__(self, scanner, concurrency: int = 5000, timeout: float = 3):
+        self.scanner = scanner
+        self.timeout = timeout
+
+        # Chaque connexion consomme un descripteur de fichier
+        fd_limit = raise_fd_limit(concurrency + self.RESERVED_FDS)
+        self.concurrency = max(1, min(concurrency, fd_limit - self.RESERVED_FDS))
+
+        # PacketReader libres, réutilisés d'une connexion à l'autre
+        self._readers = []
+
+    def run(self, targets: Iterable[Tuple[str, int]]):
+        """Scanne les cibles (bloquant) en publiant les résultats via le scanner"""
+        asyncio.run(self.scan(targets))
+
+    async def scan(self, targets: Iterable[Tuple[str, int]]):
+        """Scanne les cibles en gardant au plus self.concurrency connexions ouvertes"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        pending = set()
+
+        for ip, port in targets:
+            if self.scanner.stop_flag.is_set():
+                break
+
+            await semaphore.acquire()
+            task = asyncio.ensure_future(self._probe(ip, port))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+            task.add_done_callback(lambda _: semaphore.release())
+
+        if self.scanner.stop_flag.is_set():
+            for task in pending:
+                task.cancel()
+
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _probe(self, ip: str, port: int):
+        """Ping une cible et publie le résultat (même chemin que le moteur à threads)"""
+        try:
+            server = await self.ping_server(ip, port)
+        except Exception:
+            server = None
+
+        if not self.scanner.stop_flag.is_set():
+            self.scanner._record_result(server, target=(ip, port))
+
+    async def ping_server(self, ip: str, port: int = 25565):
+        """Équivalent asynchrone de MinecraftScanner.ping_server"""
+        if self.scanner.is_excluded(ip):
+            return None
+        start_time = time.time()
+        loop = asyncio.get_running_loop()
+        reader = self._readers.pop() if self._readers else PacketReader()
+        reader.reset()
+
+        try:
+            try:
+                transport, protocol = await asyncio.wait_for(
+                    loop.create_connection(lambda: StatusProtocol(reader), ip, port), self.timeout)
+            except (OSError, asyncio.TimeoutError):
+                return None
+
+            try:
+                # Handshake + status request en une seule écriture
+                transport.write(self.scanner._create_status_request(ip, port))
+
+                frame = await asyncio.wait_for(protocol.frame, self.timeout)
+                payload = status_payload(frame)
+            except (OSError, asyncio.TimeoutError, ProtocolError):
+                return None
+            finally:
+                transport.close()
+
+            if not payload:
+                return None
+
+            ping_time = int((time.time() - start_time) * 1000)
+
+            # Décodé directement depuis le tampon, avant que le lecteur ne retourne au pool.
+            # Géolocalisation et whitelist sont faites en différé par le scanner (_record_result)
+            return self.scanner._server_from_payload(ip, port, payload, ping_time)
+        finally:
+            self._readers.append(reader)
+
+
+class StatusProtocol(asyncio.BufferedProtocol):
+    """Protocole asyncio qui reçoit directement dans le tampon d'un PacketReader"""
+
+    def __init__(self, reader: PacketReader):
+        self.reader = reader
+        self.frame = asyncio.get_running_loop().create_future()
+
+    def get_buffer(self, sizehint: int) -> memoryview:
+        return self.reader.get_buffer(sizehint)
+
+    def buffer_updated(self, nbytes: int):
+        self.reader.buffer_updated(nbytes)
+        if self.frame.done():
+            return
+        try:
+            frame = self.reader.next_frame()
+        except ProtocolError as e:
+            self.frame.set_exception(e)
+            return
+        if frame is not None:
+            self.frame.set_result(frame)
+
+    def connection_lost(self, exc):
+        if not self.frame.done():
+            self.frame.set_exception(exc or ConnectionError("Connexion fermée"))
+
+
+class TwoPhaseEngine(AsyncStatusEngine):
+    """Pipeline en deux étapes: balayage TCP connect puis échange status sur les ports ouverts
+
+    Le balayage tourne avec une forte concurrence et un timeout court; ses
+    succès passent par une file bornée vers probe_workers coroutines qui font
+    le handshake/status/JSON avec le timeout normal.
+    """
+
+    def __init__(self, scanner, concurrency: int = 5000, timeout: float = 3,
+                 sweep_timeout: float = 1, probe_workers: int = 100):
+        super().__init__(scanner, concurrency=concurrency + probe_workers, timeout=timeout)
+        self.sweep_concurrency = max(1, self.concurrency - probe_workers)
+        self.sweep_timeout = sweep_timeout
+        self.probe_workers = max(1, probe_workers)
+        self.open_ports = 0
+
+    async def scan(self, targets: Iterable[Tuple[str, int]]):
+        """Balaye les cibles et alimente l'étape de ping au fil de l'eau"""
+        queue = asyncio.Queue(maxsize=self.probe_workers * 4)
+        workers = [asyncio.ensure_future(self._probe_worker(queue)) for _ in range(self.probe_workers)]
+
+        semaphore = asyncio.Semaphore(self.sweep_concurrency)
+        pending = set()
+
+        for ip, port in targets:
+            if self.scanner.stop_flag.is_set():
+                break
+
+            await semaphore.acquire()
+            task = asyncio.ensure_future(self._sweep(ip, port, queue))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+            task.add_done_callback(lambda _: semaphore.release())
+
+        if self.scanner.stop_flag.is_set():
+            for task in pending:
+                task.cancel()
+
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        # Fin du balayage: une sentinelle par worker
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    async def _sweep(self, ip: str, port: int, queue: asyncio.Queue):
+        """Étape 1: simple connexion TCP, les cibles fermées sont comptabilisées directement"""
+        if not self.scanner.is_excluded(ip) and await is_port_open_async(ip, port, self.sweep_timeout):
+            self.open_ports += 1
+            await queue.put((ip, port))
+        elif not self.scanner.stop_flag.is_set():
+            self.scanner._record_result(None, target=(ip, port))
+
+    async def _probe_worker(self, queue: asyncio.Queue):
+        """Étape 2: échange status complet pour les ports ouverts"""
+        while True:
+            target = await queue.get()
+            if target is None:
+                return
+            if self.scanner.stop_flag.is_set():
+                continue
+            await self._probe(*target)
+
+
+async def is_port_open_async(ip: str, port: int, timeout: float = 1) -> bool:
+    """Équivalent asynchrone de utils.is_port_open"""
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), timeout)
+    except (OSError, asyncio.TimeoutError):
+        return False
+    writer.close()
+    return True
@@ -0,0 +1,192 @@
+"""
+Scan des serveurs Minecraft Bedrock Edition
+Ping RakNet non connecté (UDP 19132) sur un seul socket non bloquant, à débit contrôlé
+"""
+
+import asyncio
+import socket
+import struct
+import time
+import random
+from collections import deque
+from typing import Iterable, List, Optional, Tuple
+
+try:
+    from .protocol import ProtocolError, DatagramForwarder
+    from .chat import strip_codes, normalize_motd
+except ImportError:
+    from protocol import ProtocolError, DatagramForwarder
+    from chat import strip_codes, normalize_motd
+
+# Port par défaut des serveurs Bedrock
+DEFAULT_BEDROCK_PORT = 19132
+
+# Séquence "magique" présente dans tous les packets RakNet hors connexion
+RAKNET_MAGIC = bytes.fromhex('00ffff00fefefefefdfdfdfd12345678')
+
+ID_UNCONNECTED_PING = 0x01
+ID_UNCONNECTED_PONG = 0x1C
+
+# ID (1) + temps (8) + GUID serveur (8) + magic (16) + longueur de la chaîne (2)
+_PONG_HEADER_SIZE = 35
+
+_INT64 = struct.Struct('>q')
+_UINT16 = struct.Struct('>H')
+
+
+def build_ping(timestamp: int, client_guid: int) -> bytes:
+    """Packet Unconnected Ping: ID, temps (renvoyé tel quel par le serveur), magic, GUID client"""
+    return bytes((ID_UNCONNECTED_PING,)) + _INT64.pack(timestamp) + RAKNET_MAGIC + _INT64.pack(client_guid)
+
+
+def parse_pong(data: bytes) -> Tuple[int, List[str]]:
+    """Décode un Unconnected Pong: (temps renvoyé, champs de l'identifiant serveur séparés par ;)"""
+    if len(data) < _PONG_HEADER_SIZE or data[0] != ID_UNCONNECTED_PONG or data[17:33] != RAKNET_MAGIC:
+        raise ProtocolError("Réponse RakNet invalide")
+    timestamp = _INT64.unpack_from(data, 1)[0]
+    length = _UINT16.unpack_from(data, 33)[0]
+    text = data[_PONG_HEADER_SIZE:_PONG_HEADER_SIZE + length].decode('utf-8', 'replace')
+    return timestamp, text.split(';')
+
+
+def _field(fields: List[str], index: int, default: str = '') -> str:
+    return fields[index] if index < len(fields) else default
+
+
+def _int_field(fields: List[str], index: int) -> int:
+    try:
+        return int(_field(fields, index, '0'))
+    except ValueError:
+        return 0
+
+
+class BedrockEngine:
+    """Moteur de ping Bedrock: toutes les cibles partagent un socket UDP
+
+    Les pings partent au plus à rate paquets par seconde, avec au plus
+    concurrency réponses attendues à la fois. Une cible sans réponse après
+    timeout secondes est comptée comme scannée sans résultat. Les serveurs
+    trouvés passent par scanner._record_result comme pour les autres moteurs.
+    """
+
+    def __init__(self, scanner, concurrency: int = 5000, timeout: float = 2, rate: Optional[float] = 2000):
+        self.scanner = scanner
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        self.rate = rate
+        self.client_guid = random.getrandbits(63)
+        self._pending = {}        # (ip, port) -> instant d'envoi
+        self._order = deque()     # (instant d'envoi, ip, port) dans l'ordre d'envoi
+        self._epoch = time.monotonic()
+        self._answered = None
+        self.transport = None
+
+    def run(self, targets: Iterable[Tuple[str, int]]):
+        """Scanne les cibles (bloquant)"""
+        asyncio.run(self.scan(targets))
+
+    async def scan(self, targets: Iterable[Tuple[str, int]]):
+        loop = asyncio.get_running_loop()
+        self._answered = asyncio.Event()
+        self.transport, _ = await loop.create_datagram_endpoint(lambda: DatagramForwarder(self.on_datagram),
+                                                                family=socket.AF_INET, local_addr=('0.0.0.0', 0))
+        sock = self.transport.get_extra_info('socket')
+        try:
+            # Grand tampon de réception: les réponses arrivent en rafales
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+        except OSError:
+            pass
+
+        try:
+            interval = 1 / self.rate if self.rate else 0
+            next_send = time.monotonic()
+            for ip, port in targets:
+                if self.scanner.stop_flag.is_set():
+                    return
+                if self.scanner.is_excluded(ip):
+                    self.scanner._record_result(None, target=(ip, port))
+                    continue
+
+                # Fenêtre pleine: attendre une réponse ou l'expiration de la plus ancienne
+                while len(self._pending) >= self.concurrency:
+                    await self._wait_for_slot()
+                    self._expire()
+
+                # Contrôle du débit
+                if interval:
+                    delay = next_send - time.monotonic()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    next_send = max(next_send, time.monotonic() - 1) + interval
+
+                self._send(ip, port)
+                self._expire()
+
+            # Attendre les dernières réponses
+            while self._pending and not self.scanner.stop_flag.is_set():
+                await self._wait_for_slot()
+                self._expire()
+        finally:
+            self.transport.close()
+
+    def _now_ms(self) -> int:
+        return int((time.monotonic() - self._epoch) * 1000)
+
+    def _send(self, ip: str, port: int):
+        sent = time.monotonic()
+        self._pending[(ip, port)] = sent
+        self._order.append((sent, ip, port))
+        self.transport.sendto(build_ping(self._now_ms(), self.client_guid), (ip, port))
+
+    async def _wait_for_slot(self):
+        """Attend une réponse, ou l'échéance de la plus ancienne cible en attente"""
+        self._answered.clear()
+        delay = self._order[0][0] + self.timeout - time.monotonic() if self._order else self.timeout
+        if delay <= 0:
+            return
+        try:
+            await asyncio.wait_for(self._answered.wait(), delay)
+        except asyncio.TimeoutError:
+            pass
+
+    def _expire(self):
+        """Comptabilise les cibles restées sans réponse plus de timeout secondes"""
+        deadline = time.monotonic() - self.timeout
+        while self._order and self._order[0][0] <= deadline:
+            _, ip, port = self._order.popleft()
+            if self._pending.pop((ip, port), None) is not None:
+                self.scanner._record_result(None, target=(ip, port))
+
+    def on_datagram(self, data: bytes, addr: Tuple[str, int]):
+        """Réponse reçue: ignorée si elle ne correspond à aucune cible en attente"""
+        key = (addr[0], addr[1])
+        if key not in self._pending or self.scanner.stop_flag.is_set():
+            return
+        try:
+            timestamp, fields = parse_pong(data)
+        except ProtocolError:
+            return
+        del self._pending[key]
+        server = self.build_server(addr[0], addr[1], fields, max(self._now_ms() - timestamp, 0))
+        self.scanner._record_result(server, target=key)
+        self._answered.set()
+
+    def build_server(self, ip: str, port: int, fields: List[str], ping_time: int):
+        """Construit un MinecraftServer depuis "MCPE;motd;protocole;version;joueurs;max;id;motd2;mode;..." """
+        try:
+            from .scanner import MinecraftServer
+        except ImportError:
+            from scanner import MinecraftServer
+
+        server = MinecraftServer(ip, port)
+        server.edition = 'bedrock'
+        server.ping = ping_time
+        sub_motd = _field(fields, 7)
+        server.motd = f"{_field(fields, 1)}\n{sub_motd}" if sub_motd else _field(fields, 1)
+        server.description = normalize_motd(strip_codes(server.motd))
+        server.name = normalize_motd(strip_codes(_field(fields, 1))).replace('\n', ' ')
+        server.protocol = _int_field(fields, 2)
+        server.version = _field(fields, 3)
+        server.players_online = _int_field(fields, 4)
+        server.players_max = _int_field(fields, 5)
+        return server
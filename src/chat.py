@@ -0,0 +1,180 @@
+"""
+Composants de chat Minecraft
+Aplatit un MOTD (texte, extra, translate) en texte brut et en texte à codes §, en un seul parcours
+"""
+
+import re
+from itertools import repeat
+from typing import Any, List, Optional, Tuple
+
+# Couleurs nommées du format JSON et leur code § (avec leur valeur RGB pour les couleurs hexadécimales)
+COLORS = {
+    'black': ('0', 0x000000), 'dark_blue': ('1', 0x0000AA), 'dark_green': ('2', 0x00AA00),
+    'dark_aqua': ('3', 0x00AAAA), 'dark_red': ('4', 0xAA0000), 'dark_purple': ('5', 0xAA00AA),
+    'gold': ('6', 0xFFAA00), 'gray': ('7', 0xAAAAAA), 'dark_gray': ('8', 0x555555),
+    'blue': ('9', 0x5555FF), 'green': ('a', 0x55FF55), 'aqua': ('b', 0x55FFFF),
+    'red': ('c', 0xFF5555), 'light_purple': ('d', 0xFF55FF), 'yellow': ('e', 0xFFFF55),
+    'white': ('f', 0xFFFFFF),
+}
+
+# Styles booléens dans l'ordre du tuple de style, avec leur code §
+FORMATS = (('obfuscated', 'k'), ('bold', 'l'), ('strikethrough', 'm'), ('underlined', 'n'), ('italic', 'o'))
+
+# Style: (code couleur ou None, puis un booléen par entrée de FORMATS)
+DEFAULT_STYLE = (None,) + (False,) * len(FORMATS)
+
+_LEGACY_CODE = re.compile('§.?', re.S)
+_TRANSLATE_ARG = re.compile(r'%(?:(\d+)\$)?s|%%')
+
+# Clés JSON qui modifient le style
+STYLE_KEYS = ('color',) + tuple(name for name, _ in FORMATS)
+
+_HEX_COLOR = re.compile('#[0-9a-fA-F]{6}')
+
+# Couleurs "#RRGGBB" valides déjà ramenées au code § le plus proche (vidé au-delà de HEX_CACHE_SIZE),
+# codes § de chaque style rencontré
+HEX_CACHE_SIZE = 4096
+_hex_codes = {}
+_style_cache = {}
+
+
+def strip_codes(text: str) -> str:
+    """Retire les codes de formatage § d'un texte"""
+    return _LEGACY_CODE.sub('', text) if '§' in text else text
+
+
+def color_code(color: Any) -> Optional[str]:
+    """Code § d'une couleur nommée ou "#RRGGBB" (couleur nommée la plus proche), None si inconnue"""
+    if not isinstance(color, str):
+        return None
+    named = COLORS.get(color)
+    if named is not None:
+        return named[0]
+    code = _hex_codes.get(color)
+    if code is None:
+        # Valeurs invalides jamais mises en cache: les clés restent des couleurs réelles
+        if not _HEX_COLOR.fullmatch(color):
+            return None
+        value = int(color[1:], 16)
+        rgb = (value >> 16, (value >> 8) & 0xFF, value & 0xFF)
+        code = min(COLORS.values(), key=lambda entry: sum(
+            (a - b) ** 2 for a, b in zip(rgb, (entry[1] >> 16, (entry[1] >> 8) & 0xFF, entry[1] & 0xFF))))[0]
+        if len(_hex_codes) >= HEX_CACHE_SIZE:
+            _hex_codes.clear()
+        _hex_codes[color] = code
+    return code
+
+
+def _style_codes(style: Tuple) -> str:
+    """Codes § qui établissent style depuis un texte sans formatage"""
+    codes = _style_cache.get(style)
+    if codes is None:
+        codes = '§' + style[0] if style[0] else ''
+        for (_, code), enabled in zip(FORMATS, style[1:]):
+            if enabled:
+                codes += '§' + code
+        _style_cache[style] = codes
+    return codes
+
+
+def _restyle(component: dict, style: Tuple) -> Tuple:
+    """Style d'un composant: celui du parent, modifié par les clés présentes"""
+    values = list(style)
+    if 'color' in component:
+        code = color_code(component['color'])
+        if code is not None:
+            values[0] = code
+    for index, (name, _) in enumerate(FORMATS, 1):
+        if name in component:
+            values[index] = bool(component[name])
+    return tuple(values)
+
+
+def _translate_pieces(component: dict) -> List[Any]:
+    """Clé de traduction découpée en textes et arguments ("%s", "%1$s"), dans l'ordre d'affichage
+
+    Sans table de traduction, le texte affiché est "fallback" s'il existe,
+    la clé elle-même sinon (comme le client quand une traduction manque).
+    """
+    template = component.get('fallback')
+    if not isinstance(template, str):
+        template = str(component['translate'])
+    args = component.get('with')
+    if not isinstance(args, list):
+        args = []
+    pieces = []
+    last = 0
+    position = 0
+    for match in _TRANSLATE_ARG.finditer(template):
+        pieces.append(template[last:match.start()])
+        last = match.end()
+        if match.group() == '%%':
+            pieces.append('%')
+            continue
+        index = int(match.group(1)) - 1 if match.group(1) else position
+        position += 1
+        if 0 <= index < len(args):
+            pieces.append(args[index])
+    pieces.append(template[last:])
+    return pieces
+
+
+def flatten_component(component: Any) -> Tuple[str, str]:
+    """Aplatit un composant de chat: (texte brut, texte à codes §)
+
+    Le composant est parcouru une seule fois, sans récursion (pile
+    explicite): "text", puis "translate" (avec ses arguments "with"),
+    puis "extra", chaque enfant héritant du style de son parent. Le texte
+    brut n'a plus aucun code §, qu'il vienne du style JSON ou du texte
+    lui-même; le texte à codes rend le style JSON en codes §.
+    """
+    plain = []
+    formatted = []
+    current = DEFAULT_STYLE
+    stack = [(component, DEFAULT_STYLE)]
+    while stack:
+        node, style = stack.pop()
+        if isinstance(node, list):
+            # Tableau de composants: frères au même style
+            stack.extend(zip(reversed(node), repeat(style)))
+            continue
+        if isinstance(node, dict):
+            for key in STYLE_KEYS:
+                if key in node:
+                    style = _restyle(node, style)
+                    break
+            children = node.get('extra')
+            if isinstance(children, list):
+                stack.extend(zip(reversed(children), repeat(style)))
+            if 'translate' in node:
+                stack.extend(zip(reversed(_translate_pieces(node)), repeat(style)))
+            text = node.get('text', node.get('keybind', ''))
+            if not isinstance(text, str):
+                text = '' if text is None else str(text)
+        elif isinstance(node, str):
+            text = node
+        elif node is None:
+            continue
+        else:
+            text = str(node).lower() if isinstance(node, bool) else str(node)
+        if not text:
+            continue
+        if style != current:
+            formatted.append('§r' + _style_codes(style) if current != DEFAULT_STYLE else _style_codes(style))
+            current = style
+        formatted.append(text)
+        plain.append(_LEGACY_CODE.sub('', text) if '§' in text else text)
+    return ''.join(plain), ''.join(formatted)
+
+
+def normalize_motd(plain: str) -> str:
+    """MOTD brut nettoyé: espaces superflus retirés, lignes vides supprimées"""
+    if '\n' not in plain:
+        return ' '.join(plain.split())
+    return '\n'.join(filter(None, [' '.join(line.split()) for line in plain.split('\n')]))
+
+
+def parse_motd(description: Any) -> Tuple[str, str]:
+    """(MOTD brut nettoyé, MOTD à codes §) d'une description de réponse status (composant ou texte)"""
+    plain, formatted = flatten_component(description)
+    return normalize_motd(plain), formatted
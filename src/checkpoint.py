@@ -0,0 +1,242 @@
+"""
+Points de reprise des scans longs
+Curseur du parcours, morceaux terminés et serveurs trouvés, sauvegardés périodiquement
+"""
+
+import os
+import time
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    from .targets import TargetGenerator
+    from .favicons import favicon_store
+    from .utils import write_json_atomic
+    from . import jsoncodec
+except ImportError:
+    from targets import TargetGenerator
+    from favicons import favicon_store
+    from utils import write_json_atomic
+    import jsoncodec
+
+# Nombre de pas du parcours par morceau suivi
+DEFAULT_CHUNK_SIZE = 4096
+
+CHECKPOINT_VERSION = 2
+
+# Fichier des serveurs trouvés, à côté du point de reprise (une ligne JSON par serveur ou lot de favicons)
+SERVERS_SUFFIX = ".servers"
+
+
+class ScanCheckpoint:
+    """Suit l'avancement d'un scan et l'écrit dans path toutes les interval secondes
+
+    Le parcours est découpé en morceaux de chunk_size pas à partir de base.
+    Un morceau est terminé quand toutes ses cibles ont été émises et ont
+    reçu une réponse (ou un échec). Le fichier garde le premier morceau non
+    terminé (low), les morceaux terminés au-delà, et pour les morceaux en
+    cours les pas déjà traités: la reprise ne resonde aucune cible terminée.
+    Les serveurs sont enregistrés dès leur découverte, avant géolocalisation,
+    dans un fichier à part (path + SERVERS_SUFFIX) complété à chaque
+    sauvegarde: seuls les nouveaux serveurs y sont ajoutés, avec leur seule
+    empreinte de favicon, et chaque image n'y est écrite qu'une fois. Le
+    point de reprise retient la taille de ce fichier au moment de la
+    sauvegarde; ce qui a été écrit au-delà est ignoré à la reprise.
+    """
+
+    def __init__(self, path: str, targets: TargetGenerator, options: Optional[Dict] = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, interval: float = 30):
+        self.path = path
+        self.targets = targets
+        self.options = options or {}
+        self.chunk_size = chunk_size
+        self.interval = interval
+        self.base = targets.cursor
+        self.low = 0                 # Premier morceau non terminé
+        self.done = set()            # Morceaux terminés au-delà de low
+        self.partial = {}            # Morceau en cours -> pas déjà traités
+        self.scanned = 0             # Cibles traitées
+        self.servers: List[Dict] = []  # Serveurs relus du point de reprise (republiés à la reprise)
+        self.finished = False
+        self._pending: List[Dict] = []  # Serveurs trouvés depuis la dernière sauvegarde
+        self._favicons_written = set()
+        self._servers_size = None       # Taille du fichier des serveurs (None: fichier à recréer)
+        self._save_lock = threading.Lock()
+        self._issued = {}            # Morceau en cours -> cibles émises
+        self._completed = {}         # Morceau en cours -> cibles traitées
+        self._in_flight = {}         # (ip, port) -> pas
+        self._open_chunk = None      # Morceau en cours d'émission
+        self._last_save = time.time()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: str, interval: float = 30) -> 'ScanCheckpoint':
+        """Relit un point de reprise écrit par save()"""
+        with open(path, 'rb') as f:
+            data = jsoncodec.load(f)
+        if data.get('version') not in (1, CHECKPOINT_VERSION):
+            raise ValueError(f"Version de point de reprise non supportée: {data.get('version')}")
+        checkpoint = cls(path, TargetGenerator.from_state(data['targets']), data.get('options', {}),
+                         data['chunk_size'], interval)
+        checkpoint.base = data['base']
+        checkpoint.low = data['low']
+        checkpoint.done = set(data['done'])
+        checkpoint.partial = {int(chunk): set(steps) for chunk, steps in data['partial'].items()}
+        checkpoint.scanned = data['scanned']
+        if data['version'] == 1:
+            # Ancien format: serveurs (favicons intégrés) dans le point de reprise, recopiés à la prochaine sauvegarde
+            checkpoint.servers = data['servers']
+            checkpoint._pending = list(data['servers'])
+        else:
+            checkpoint._read_servers(data['servers_size'])
+        checkpoint.finished = data.get('finished', False)
+        return checkpoint
+
+    @property
+    def servers_path(self) -> str:
+        return self.path + SERVERS_SUFFIX
+
+    def _read_servers(self, size: int):
+        """Relit les size premiers octets du fichier des serveurs et coupe ce qui suit (écrit après la sauvegarde)"""
+        self._servers_size = size
+        if not size:
+            return
+        with open(self.servers_path, 'r+b') as f:
+            data = f.read(size)
+            f.truncate(size)
+        for line in data.splitlines():
+            entry = jsoncodec.loads(line)
+            if 'favicons' in entry:
+                favicon_store.load(entry['favicons'])
+                self._favicons_written.update(entry['favicons'])
+            else:
+                self.servers.append(entry['server'])
+
+    def iter_targets(self) -> Iterator[Tuple[str, int]]:
+        """Cibles restantes (ip, port), en sautant tout ce qui est déjà traité"""
+        targets = self.targets
+        size = self.chunk_size
+        step = self.base + self.low * size
+        while step < targets.stop:
+            chunk = (step - self.base) // size
+            chunk_stop = min(step + size, targets.stop)
+            if chunk in self.done:
+                step = chunk_stop
+                continue
+            with self._lock:
+                self._open_chunk = chunk
+                self._issued.setdefault(chunk, 0)
+                self._completed.setdefault(chunk, 0)
+                skip = self.partial.setdefault(chunk, set())
+            for target in targets.iter_targets(step, chunk_stop):
+                current = targets.cursor - 1
+                if current in skip:
+                    continue
+                with self._lock:
+                    self._issued[chunk] += 1
+                    self._in_flight[target] = current
+                yield target
+            with self._lock:
+                self._open_chunk = None
+                self._close(chunk)
+            step = chunk_stop
+
+    def target_done(self, target: Tuple[str, int], server=None):
+        """Enregistre la fin du traitement d'une cible (appelé par le scanner pour chaque résultat)"""
+        with self._lock:
+            step = self._in_flight.pop(target, None)
+            if step is None:
+                return
+            if server is not None:
+                self._pending.append(server.to_dict())
+            chunk = (step - self.base) // self.chunk_size
+            self._completed[chunk] += 1
+            self.partial[chunk].add(step)
+            if chunk != self._open_chunk:
+                self._close(chunk)
+        if time.time() - self._last_save >= self.interval:
+            self.save()
+
+    def _close(self, chunk: int):
+        """Marque le morceau terminé si toutes ses cibles émises ont été traitées (verrou tenu)"""
+        if self._completed.get(chunk, 0) < self._issued.get(chunk, 0):
+            return
+        self.scanned += len(self.partial.pop(chunk, ()))
+        self._issued.pop(chunk, None)
+        self._completed.pop(chunk, None)
+        self.done.add(chunk)
+        while self.low in self.done:
+            self.done.discard(self.low)
+            self.low += 1
+
+    @property
+    def progress(self) -> int:
+        """Cibles traitées, y compris dans les morceaux en cours"""
+        with self._lock:
+            return self.scanned + sum(len(steps) for steps in self.partial.values())
+
+    def save(self):
+        """Ajoute les nouveaux serveurs à leur fichier puis écrit le point de reprise (remplacement atomique)"""
+        with self._save_lock:
+            self._save()
+
+    def _save(self):
+        with self._lock:
+            pending, self._pending = self._pending, []
+            self.finished = finished = self.base + self.low * self.chunk_size >= self.targets.stop
+            data = {
+                'version': CHECKPOINT_VERSION,
+                'targets': self.targets.state(),
+                'options': self.options,
+                'chunk_size': self.chunk_size,
+                'base': self.base,
+                'low': self.low,
+                'done': sorted(self.done),
+                'partial': {str(chunk): sorted(steps) for chunk, steps in self.partial.items() if steps},
+                'scanned': self.scanned,
+                'finished': finished,
+                'saved': time.time()
+            }
+            self._last_save = time.time()
+        try:
+            data['servers_size'] = self._append_servers(pending)
+        except Exception as e:
+            with self._lock:
+                self._pending[:0] = pending  # Réessayés à la prochaine sauvegarde
+            print(f"⚠️  Erreur lors de la sauvegarde du point de reprise: {e}")
+            return
+        try:
+            write_json_atomic(self.path, data)
+        except Exception as e:
+            print(f"⚠️  Erreur lors de la sauvegarde du point de reprise: {e}")
+
+    def _append_servers(self, servers: List[Dict]) -> int:
+        """Ajoute servers (et les favicons pas encore écrits) au fichier des serveurs; retourne sa taille"""
+        lines = []
+        entries = []
+        for data in servers:
+            if data.get('favicon'):
+                # Serveur d'un point de reprise au format 1: favicon intégré ramené au magasin
+                data = dict(data)
+                data['favicon_hash'] = favicon_store.add(data.pop('favicon'))
+            entries.append(data)
+        favicons = favicon_store.export(data['favicon_hash'] for data in entries
+                                        if data.get('favicon_hash') not in self._favicons_written)
+        if favicons:
+            lines.append(jsoncodec.dumps_bytes({'favicons': favicons}))
+        lines.extend(jsoncodec.dumps_bytes({'server': data}) for data in entries)
+        if not lines and self._servers_size is not None:
+            return self._servers_size
+        directory = os.path.dirname(self.servers_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        size = self._servers_size or 0
+        with open(self.servers_path, 'r+b' if size else 'wb') as f:
+            # Repartir de la dernière taille sauvegardée: rien d'un ancien scan ni d'une écriture interrompue
+            f.seek(size)
+            f.truncate()
+            for line in lines:
+                f.write(line + b'\n')
+            self._servers_size = f.tell()
+        self._favicons_written.update(favicons)
+        return self._servers_size
@@ -0,0 +1,306 @@
+"""
+Table de résultats en colonnes
+Colonnes NumPy (ip, port, ping, joueurs, protocole, horodatages) et pays/version encodés par dictionnaire
+"""
+
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Colonnes numériques et leur type
+NUMERIC_COLUMNS = {
+    'ip': 'uint32',              # IPv4 entière (0 pour un nom d'hôte ou une IPv6)
+    'port': 'uint16',
+    'ping': 'int32',
+    'players_online': 'int32',
+    'players_max': 'int32',
+    'protocol': 'int32',
+    'last_seen': 'float64',
+    'online': 'bool',
+}
+
+# Colonnes texte encodées par dictionnaire: chaque valeur distincte reçoit un code entier
+ENCODED_COLUMNS = ('country', 'version')
+
+INITIAL_CAPACITY = 1024
+
+
+def _clamp(value, dtype: str) -> int:
+    """Valeur entière bornée au type de la colonne (0 si elle n'est pas numérique)"""
+    try:
+        value = int(value)
+    except (TypeError, ValueError, OverflowError):
+        return 0
+    limits = np.iinfo(dtype)
+    return min(max(value, int(limits.min)), int(limits.max))
+
+
+def available() -> bool:
+    """Vrai si NumPy est installé"""
+    return np is not None
+
+
+class Dictionary:
+    """Encodage d'une colonne texte: valeurs distinctes et leur code"""
+
+    def __init__(self):
+        self.values: List[str] = []
+        self.codes: Dict[str, int] = {}
+
+    def encode(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class ServerTable:
+    """Résultats d'un scan rangés en colonnes, pour des statistiques et filtres vectorisés
+
+    Chaque serveur ajouté occupe une ligne; la table garde aussi une
+    référence vers l'objet MinecraftServer, rendu par servers() pour les
+    lignes sélectionnées. Les lignes retirées sont seulement marquées
+    (colonne alive) puis compactées quand elles deviennent majoritaires.
+    Les lectures prennent un instantané sous verrou: la table peut être
+    alimentée par les threads du scan pendant que l'interface la consulte.
+    """
+
+    def __init__(self, capacity: int = INITIAL_CAPACITY):
+        if np is None:
+            raise ImportError("NumPy n'est pas installé (pip install numpy)")
+        self._capacity = max(1, capacity)
+        self._columns = {name: np.zeros(self._capacity, dtype=dtype) for name, dtype in NUMERIC_COLUMNS.items()}
+        for name in ENCODED_COLUMNS:
+            self._columns[name] = np.zeros(self._capacity, dtype=np.uint32)
+        self._columns['alive'] = np.zeros(self._capacity, dtype=bool)
+        self.dictionaries = {name: Dictionary() for name in ENCODED_COLUMNS}
+        self._objects: List = []
+        self._rows: Dict[int, int] = {}  # id(serveur) -> ligne
+        self._size = 0
+        self._removed = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_servers(cls, servers: Iterable) -> 'ServerTable':
+        table = cls()
+        table.extend(servers)
+        return table
+
+    def __len__(self) -> int:
+        return self._size - self._removed
+
+    # Écriture
+
+    def append(self, server):
+        """Ajoute un serveur (ou met à jour sa ligne s'il est déjà présent)"""
+        with self._lock:
+            row = self._rows.get(id(server))
+            if row is not None:
+                self._write(row, server)
+                return
+            if self._size == self._capacity:
+                self._grow(self._capacity * 2)
+            # Ligne écrite avant d'être comptée: un échec ne laisse pas de ligne à moitié ajoutée
+            row = self._size
+            self._write(row, server)
+            self._size += 1
+            self._objects.append(server)
+            self._rows[id(server)] = row
+
+    def extend(self, servers: Iterable):
+        for server in servers:
+            self.append(server)
+
+    def update(self, server):
+        """Recopie les valeurs actuelles d'un serveur déjà présent (ignoré sinon)"""
+        with self._lock:
+            row = self._rows.get(id(server))
+            if row is not None:
+                self._write(row, server)
+
+    def remove(self, server):
+        with self._lock:
+            row = self._rows.pop(id(server), None)
+            if row is None:
+                return
+            self._columns['alive'][row] = False
+            self._objects[row] = None
+            self._removed += 1
+            if self._removed > INITIAL_CAPACITY and self._removed * 2 > self._size:
+                self._compact()
+
+    def clear(self):
+        with self._lock:
+            self._columns['alive'][:self._size] = False
+            self._objects.clear()
+            self._rows.clear()
+            self._size = 0
+            self._removed = 0
+
+    def rebuild(self, servers: Iterable):
+        """Remplace le contenu par servers (ex: après un chargement de fichier)"""
+        self.clear()
+        self.extend(servers)
+
+    def _write(self, row: int, server):
+        columns = self._columns
+        columns['ip'][row] = server.packed_ip or 0
+        columns['port'][row] = server.port
+        # Valeurs venues de la réponse du serveur: bornées plutôt que de faire échouer l'ajout
+        columns['ping'][row] = _clamp(server.ping, 'int32')
+        columns['players_online'][row] = _clamp(server.players_online, 'int32')
+        columns['players_max'][row] = _clamp(server.players_max, 'int32')
+        columns['protocol'][row] = _clamp(server.protocol, 'int32')
+        columns['last_seen'][row] = server.last_seen
+        columns['online'][row] = server.online
+        columns['country'][row] = self.dictionaries['country'].encode(server.country)
+        columns['version'][row] = self.dictionaries['version'].encode(server.version)
+        columns['alive'][row] = True
+
+    def _grow(self, capacity: int):
+        for name, column in self._columns.items():
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            self._columns[name] = grown
+        self._capacity = capacity
+
+    def _compact(self):
+        """Supprime les lignes retirées (sous verrou)"""
+        keep = self._columns['alive'][:self._size]
+        for name, column in self._columns.items():
+            kept = column[:self._size][keep]
+            column[:len(kept)] = kept
+        self._objects = [server for server in self._objects if server is not None]
+        self._rows = {id(server): row for row, server in enumerate(self._objects)}
+        self._columns['alive'][len(self._objects):self._size] = False
+        self._size = len(self._objects)
+        self._removed = 0
+
+    # Lecture
+
+    def snapshot(self, names: Optional[Iterable[str]] = None,
+                 objects: bool = True) -> Tuple[Dict[str, 'np.ndarray'], List]:
+        """Copie des colonnes names (toutes par défaut) et, avec objects, des objets des lignes présentes"""
+        names = list(NUMERIC_COLUMNS) + list(ENCODED_COLUMNS) if names is None else list(names)
+        unknown = [name for name in names if name not in NUMERIC_COLUMNS and name not in ENCODED_COLUMNS]
+        if unknown:
+            raise ValueError(f"Colonne inconnue: {', '.join(unknown)}")
+        with self._lock:
+            size = self._size
+            if self._removed:
+                alive = self._columns['alive'][:size]
+                columns = {name: self._columns[name][:size][alive] for name in names}
+                servers = [server for server in self._objects if server is not None] if objects else []
+            else:
+                columns = {name: self._columns[name][:size].copy() for name in names}
+                servers = list(self._objects) if objects else []
+        return columns, servers
+
+    def column(self, name: str) -> 'np.ndarray':
+        """Valeurs d'une colonne pour les lignes présentes (codes pour pays et version)"""
+        return self.snapshot([name], objects=False)[0][name]
+
+    def counts(self, name: str, limit: Optional[int] = None) -> List[Tuple[str, int]]:
+        """[(valeur, nombre de serveurs)] d'une colonne encodée, du plus fréquent au moins fréquent"""
+        return self._counts(self.column(name), name, limit)
+
+    def stats(self, top: int = 5) -> Dict:
+        """Totaux et répartitions: serveurs, joueurs, ping moyen, principaux pays et versions"""
+        with self._lock:
+            size = self._size
+            alive = self._columns['alive'][:size] if self._removed else slice(None)
+            columns = {name: self._columns[name][:size][alive]
+                       for name in ('online', 'players_online', 'players_max', 'ping', 'country', 'version')}
+            total = len(columns['online'])
+            return {
+                'servers': total,
+                'online': int(np.count_nonzero(columns['online'])),
+                'players_online': int(columns['players_online'].sum(dtype=np.int64)),
+                'players_max': int(columns['players_max'].sum(dtype=np.int64)),
+                'average_ping': float(columns['ping'].mean()) if total else 0.0,
+                'countries': self._counts(columns['country'], 'country', top),
+                'versions': self._counts(columns['version'], 'version', top),
+            }
+
+    def _counts(self, codes: 'np.ndarray', name: str, limit: Optional[int]) -> List[Tuple[str, int]]:
+        dictionary = self.dictionaries[name]
+        counts = np.bincount(codes, minlength=len(dictionary))
+        present = np.flatnonzero(counts)
+        # Tri stable: à nombre égal, l'ordre d'apparition est conservé
+        order = present[np.argsort(-counts[present], kind='stable')]
+        if limit is not None:
+            order = order[:limit]
+        return [(dictionary.values[code], int(counts[code])) for code in order]
+
+    def top(self, name: str, k: int = 10, largest: bool = True) -> List:
+        """Les k serveurs aux plus grandes (ou plus petites) valeurs d'une colonne numérique"""
+        if name not in NUMERIC_COLUMNS:
+            raise ValueError(f"Colonne inconnue: {name}")
+        with self._lock:
+            size = self._size
+            keys = self._columns[name][:size].astype(np.float64)
+            if largest:
+                keys = -keys
+            keys[~self._columns['alive'][:size]] = np.inf  # Lignes retirées en dernier
+            k = min(k, len(self))
+            if k <= 0:
+                return []
+            # Sélection partielle O(n), puis tri des seuls k retenus
+            chosen = np.argpartition(keys, k - 1)[:k]
+            chosen = chosen[np.argsort(keys[chosen], kind='stable')]
+            return [self._objects[row] for row in chosen.tolist()]
+
+    def where(self, search: Optional[str] = None, **conditions) -> List:
+        """Serveurs qui vérifient toutes les conditions, dans l'ordre d'ajout
+
+        Colonne numérique: (minimum, maximum) inclus, None pour une borne
+        ouverte, ou valeur exacte. Pays et version: valeur ou liste de
+        valeurs acceptées. Exemple: where(players_online=(10, None),
+        ping=(None, 100), country=["France", "Belgium"]). search (texte
+        en minuscules) n'est cherché que dans les serveurs retenus par les
+        colonnes (MinecraftServer.search_text).
+        """
+        unknown = [name for name in conditions if name not in NUMERIC_COLUMNS and name not in ENCODED_COLUMNS]
+        if unknown:
+            raise ValueError(f"Colonne inconnue: {', '.join(unknown)}")
+        with self._lock:
+            size = self._size
+            mask = self._columns['alive'][:size].copy()
+            for name, condition in conditions.items():
+                values = self._columns[name][:size]
+                if name in self.dictionaries:
+                    accepted = [condition] if isinstance(condition, str) else list(condition)
+                    codes = self.dictionaries[name].codes
+                    wanted = [codes[value] for value in accepted if value in codes]
+                    if len(wanted) == 1:
+                        mask &= values == wanted[0]
+                    else:
+                        # Table de correspondance code -> accepté: un seul accès indexé par ligne
+                        lookup = np.zeros(len(codes), dtype=bool)
+                        lookup[wanted] = True
+                        mask &= lookup[values]
+                elif isinstance(condition, tuple):
+                    low, high = condition
+                    if low is not None:
+                        mask &= values >= low
+                    if high is not None:
+                        mask &= values <= high
+                else:
+                    mask &= values == condition
+            objects = self._objects
+            selected = [objects[row] for row in np.flatnonzero(mask).tolist()]
+        if search:
+            selected = [server for server in selected if search in server.search_text]
+        return selected
+
+    def servers(self) -> List:
+        """Objets MinecraftServer des lignes présentes, dans l'ordre d'ajout"""
+        return self.snapshot([], objects=True)[1]
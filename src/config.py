@@ -2,9 +2,15 @@
 Configuration et paramètres de l'application MineSpyder
 """
 
-import json
 import os
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Union
+
+try:
+    from .rangeset import dedupe_ranges
+    from . import jsoncodec
+except ImportError:
+    from rangeset import dedupe_ranges
+    import jsoncodec
 
 class Config:
     """Classe de configuration de l'application"""
@@ -15,6 +21,12 @@ class Config:
             "scan_settings": {
                 "timeout": 3,
                 "max_threads": 100,
+                "engine": "threads",
+                "concurrency": 5000,
+                "sweep_timeout": 1,
+                "workers": 1,
+                "bedrock_rate": 2000,
+                "lazy_status": False,
                 "ports": [25565, 25566, 25567, 25568, 25569],
                 "scan_ranges": [
                     "8.8.8.0/24",  # Exemple de plage
@@ -24,7 +36,9 @@ class Config:
             "display_settings": {
                 "max_servers_displayed": 1000,
                 "refresh_interval": 30,
-                "show_offline_servers": False
+                "show_offline_servers": False,
+                "keep_favicons": True,
+                "columnar_table": False
             },
             "countries": {
                 "France": ["FR", "194.2.0.0/16", "193.252.0.0/16"],
@@ -36,9 +50,52 @@ class Config:
                 "Japan": ["JP", "133.205.0.0/16", "202.32.0.0/11"],
                 "Brazil": ["BR", "189.0.0.0/8", "177.0.0.0/8"]
             },
+            "whitelist": {
+                "enabled": False,
+                "max_workers": 20,
+                "ttl": 86400,
+                "timeout": 2,
+                "cache_path": "data/whitelist_cache.json"
+            },
             "geoip": {
                 "database_path": "data/GeoLite2-City.mmdb",
-                "auto_update": True
+                "auto_update": True,
+                "http_fallback": False,
+                "http_url": "http://ip-api.com",
+                "http_cache_path": "data/geoip_cache.json",
+                "http_cache_ttl": 604800
+            },
+            "query": {
+                "enabled": False,
+                "timeout": 2,
+                "retries": 1,
+                "concurrency": 1000,
+                "port": None
+            },
+            "dns": {
+                "nameservers": [],
+                "timeout": 2,
+                "retries": 2,
+                "concurrency": 500,
+                "min_ttl": 30,
+                "max_ttl": 86400,
+                "negative_ttl": 300
+            },
+            "storage": {
+                "database": None,
+                "batch_size": 500,
+                "max_delay": 1.0,
+                "history": True,
+                "keep_in_memory": True
+            },
+            "exclusions": {
+                "files": ["data/exclusions.txt"]
+            },
+            "monitoring": {
+                "probe_budget": 50,
+                "max_backoff": 21600,
+                "timeout": 3,
+                "max_workers": 20
             }
         }
         self.config = self.load_config()
@@ -47,8 +104,8 @@ class Config:
         """Charge la configuration depuis le fichier"""
         if os.path.exists(self.config_file):
             try:
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
+                with open(self.config_file, 'rb') as f:
+                    config = jsoncodec.load(f)
                 # Fusionner avec la config par défaut pour les nouvelles clés
                 return self.merge_configs(self.default_config, config)
             except Exception as e:
@@ -75,8 +132,8 @@ class Config:
             config = self.config
         
         try:
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(config, f, indent=2, ensure_ascii=False)
+            with open(self.config_file, 'wb') as f:
+                jsoncodec.dump(config, f, indent=True)
         except Exception as e:
             print(f"⚠️  Erreur lors de la sauvegarde de la config : {e}")
     
@@ -114,6 +171,22 @@ class Config:
         """Récupère le nombre maximum de threads"""
         return self.get('scan_settings.max_threads', 100)
     
+    def get_scan_engine(self) -> str:
+        """Récupère le moteur de scan ("threads", "asyncio", "pipeline" ou "bedrock")"""
+        return self.get('scan_settings.engine', 'threads')
+    
+    def get_concurrency(self) -> int:
+        """Récupère le nombre de connexions simultanées du moteur asyncio"""
+        return self.get('scan_settings.concurrency', 5000)
+    
+    def get_sweep_timeout(self) -> float:
+        """Récupère le timeout du balayage TCP du moteur pipeline"""
+        return self.get('scan_settings.sweep_timeout', 1)
+    
+    def get_workers(self) -> int:
+        """Récupère le nombre de processus de scan (1 = pas de découpage)"""
+        return self.get('scan_settings.workers', 1)
+    
     def get_scan_ports(self) -> List[int]:
         """Récupère la liste des ports à scanner"""
         return self.get('scan_settings.ports', [25565])
@@ -122,9 +195,17 @@ class Config:
         """Récupère la liste des pays et leurs plages IP"""
         return self.get('countries', {})
     
-    def get_country_ranges(self, country: str) -> List[str]:
-        """Récupère les plages IP d'un pays spécifique"""
+    def get_country_ranges(self, country: Union[str, List[str]]) -> List[str]:
+        """Récupère les plages IP d'un pays (ou de plusieurs), sans doublons"""
         countries = self.get_countries()
-        if country in countries:
-            return countries[country][1:]  # Ignore le code pays
-        return []
+        names = [country] if isinstance(country, str) else country
+        ip_ranges = []
+        for name in names:
+            if name in countries:
+                ip_ranges.extend(countries[name][1:])  # Ignore le code pays
+        if not ip_ranges:
+            return []
+        ip_ranges, duplicates = dedupe_ranges(ip_ranges)
+        if duplicates:
+            print(f"♻️  {duplicates} adresses communes à plusieurs plages de {', '.join(names)} (sondées une fois)")
+        return ip_ranges
@@ -0,0 +1,312 @@
+"""
+Scan distribué sur plusieurs machines
+Découpage en morceaux, baux avec battements de cœur et fusion des résultats dans un fichier SQLite partagé
+"""
+
+import os
+import time
+import uuid
+import socket
+import sqlite3
+import threading
+import multiprocessing
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from .targets import TargetGenerator
+    from . import jsoncodec
+except ImportError:
+    from targets import TargetGenerator
+    import jsoncodec
+
+# Nombre de pas du parcours par morceau (un /16 sur un port)
+DEFAULT_CHUNK_SIZE = 65536
+
+# Durée d'un bail sans battement de cœur avant qu'un autre worker reprenne le morceau
+DEFAULT_LEASE_TIMEOUT = 120
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    targets TEXT NOT NULL,
+    options TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id INTEGER NOT NULL,
+    start INTEGER NOT NULL,
+    stop INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    scanned INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS chunks_status ON chunks (status, lease_expires);
+CREATE TABLE IF NOT EXISTS results (
+    ip TEXT NOT NULL,
+    port INTEGER NOT NULL,
+    job_id INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (ip, port)
+);
+"""
+
+
+class ScanCoordinator:
+    """File de travail partagée: morceaux à scanner, baux et résultats
+
+    Coordinateur et workers ouvrent le même fichier SQLite (disque local pour
+    des processus d'une même machine, partage réseau pour plusieurs nœuds).
+    Un worker prend un morceau en bail pour lease_timeout secondes et le
+    prolonge par heartbeat(); un bail expiré est repris par le prochain
+    lease(). Les résultats sont fusionnés sur (ip, port): un morceau scanné
+    deux fois ne crée pas de doublons. Les échéances utilisent l'horloge
+    de chaque nœud, qui doivent donc être synchronisées (NTP).
+    """
+
+    def __init__(self, db_path: str, lease_timeout: float = DEFAULT_LEASE_TIMEOUT):
+        self.db_path = db_path
+        self.lease_timeout = lease_timeout
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(db_path, timeout=60, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._db.executescript(_SCHEMA)
+
+    def create_job(self, ip_ranges: List[str], ports: List[int], chunk_size: int = DEFAULT_CHUNK_SIZE,
+                   seed: Optional[int] = None, randomize: bool = True, options: Optional[Dict] = None,
+                   exclude: Optional[List[Tuple[int, int]]] = None) -> int:
+        """Enregistre un scan découpé en morceaux de chunk_size pas; retourne l'id du job
+
+        Les intervalles exclude sont retirés des cibles du job: les workers
+        ne peuvent pas les générer, quelle que soit leur propre configuration.
+        """
+        targets = TargetGenerator(ip_ranges, ports, seed=seed, shuffle=randomize, exclude=exclude)
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                cursor = self._db.execute("INSERT INTO jobs (targets, options, created) VALUES (?, ?, ?)",
+                                          (jsoncodec.dumps(targets.state()), jsoncodec.dumps(options or {}), time.time()))
+                job_id = cursor.lastrowid
+                self._db.executemany("INSERT INTO chunks (job_id, start, stop) VALUES (?, ?, ?)",
+                                     ((job_id, start, stop) for start, stop in targets.chunks(chunk_size)))
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return job_id
+
+    def lease(self, worker: str) -> Optional[Tuple[int, TargetGenerator, Dict]]:
+        """Prend en bail le prochain morceau libre ou expiré: (id, générateur, options) ou None"""
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT chunks.id, chunks.start, chunks.stop, jobs.targets, jobs.options "
+                    "FROM chunks JOIN jobs ON jobs.id = chunks.job_id "
+                    "WHERE chunks.status = 'pending' OR (chunks.status = 'leased' AND chunks.lease_expires < ?) "
+                    "ORDER BY chunks.id LIMIT 1", (now,)).fetchone()
+                if row is not None:
+                    self._db.execute("UPDATE chunks SET status = 'leased', worker = ?, lease_expires = ?, "
+                                     "attempts = attempts + 1 WHERE id = ?",
+                                     (worker, now + self.lease_timeout, row[0]))
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        chunk_id, start, stop, state, options = row
+        targets = TargetGenerator.from_state(jsoncodec.loads(state)).chunk(start, stop)
+        return chunk_id, targets, jsoncodec.loads(options)
+
+    def heartbeat(self, worker: str, chunk_id: int, scanned: int = 0) -> bool:
+        """Prolonge le bail; False si le morceau a été repris par un autre worker"""
+        with self._lock:
+            cursor = self._db.execute("UPDATE chunks SET lease_expires = ?, scanned = ? "
+                                      "WHERE id = ? AND worker = ? AND status = 'leased'",
+                                      (time.time() + self.lease_timeout, scanned, chunk_id, worker))
+        return cursor.rowcount == 1
+
+    def complete(self, worker: str, chunk_id: int, servers: List[Dict], scanned: int = 0) -> bool:
+        """Enregistre les serveurs d'un morceau et le marque terminé
+
+        Retourne False (rien n'est enregistré) si le worker ne tient plus le
+        bail: le morceau a été repris par un autre worker ou rendu.
+        """
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                cursor = self._db.execute("UPDATE chunks SET status = 'done', lease_expires = NULL, scanned = ? "
+                                          "WHERE id = ? AND worker = ? AND status = 'leased'",
+                                          (scanned, chunk_id, worker))
+                if cursor.rowcount != 1:
+                    self._db.execute("ROLLBACK")
+                    return False
+                job_id = self._db.execute("SELECT job_id FROM chunks WHERE id = ?", (chunk_id,)).fetchone()[0]
+                self._db.executemany("INSERT OR REPLACE INTO results (ip, port, job_id, data) VALUES (?, ?, ?, ?)",
+                                     ((server['ip'], server['port'], job_id, jsoncodec.dumps(server))
+                                      for server in servers))
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return True
+
+    def release(self, worker: str, chunk_id: int):
+        """Rend un morceau non terminé (arrêt du worker) pour qu'il soit repris tout de suite"""
+        with self._lock:
+            self._db.execute("UPDATE chunks SET status = 'pending', worker = NULL, lease_expires = NULL "
+                             "WHERE id = ? AND worker = ? AND status = 'leased'", (chunk_id, worker))
+
+    def status(self) -> Dict:
+        """Avancement global: morceaux par état, cibles scannées, serveurs trouvés"""
+        with self._lock:
+            counts = dict(self._db.execute("SELECT status, COUNT(*) FROM chunks GROUP BY status").fetchall())
+            scanned = self._db.execute("SELECT COALESCE(SUM(scanned), 0) FROM chunks").fetchone()[0]
+            found = self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        return {'pending': counts.get('pending', 0), 'leased': counts.get('leased', 0),
+                'done': counts.get('done', 0), 'scanned': scanned, 'found': found}
+
+    def is_finished(self) -> bool:
+        """Vrai quand tous les morceaux sont terminés"""
+        status = self.status()
+        return status['pending'] == 0 and status['leased'] == 0
+
+    def results(self) -> List[Dict]:
+        """Serveurs trouvés (un par ip:port), au format MinecraftServer.to_dict()"""
+        with self._lock:
+            rows = self._db.execute("SELECT data FROM results ORDER BY ip, port").fetchall()
+        return [jsoncodec.loads(data) for data, in rows]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class ScanWorker:
+    """Nœud de scan: prend des morceaux en bail et y fait tourner un MinecraftScanner"""
+
+    def __init__(self, coordinator: ScanCoordinator, scanner=None, worker_id: Optional[str] = None,
+                 heartbeat_interval: Optional[float] = None):
+        if scanner is None:
+            try:
+                from .scanner import MinecraftScanner
+            except ImportError:
+                from scanner import MinecraftScanner
+            scanner = MinecraftScanner()
+        self.coordinator = coordinator
+        self.scanner = scanner
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.heartbeat_interval = heartbeat_interval or coordinator.lease_timeout / 3
+        self.stop_flag = threading.Event()
+
+    def run(self, idle_exit: bool = True, poll_interval: float = 2) -> int:
+        """Traite des morceaux jusqu'à épuisement (ou stop()); retourne le nombre de morceaux faits"""
+        done = 0
+        while not self.stop_flag.is_set():
+            lease = self.coordinator.lease(self.worker_id)
+            if lease is None:
+                if idle_exit and self.coordinator.is_finished():
+                    break
+                # Morceaux tous en bail ailleurs: attendre une fin ou une expiration
+                self.stop_flag.wait(poll_interval)
+                continue
+            if self.run_chunk(*lease):
+                done += 1
+        return done
+
+    def run_chunk(self, chunk_id: int, targets: TargetGenerator, options: Dict) -> bool:
+        """Scanne un morceau en entretenant son bail; False s'il a été perdu ou interrompu"""
+        found = []
+        lost = threading.Event()
+        finished = threading.Event()
+
+        def on_found(server):
+            found.append(server)
+
+        def keep_alive():
+            while not finished.wait(self.heartbeat_interval):
+                if not self.coordinator.heartbeat(self.worker_id, chunk_id, self.scanner.scanned_ips):
+                    lost.set()
+                    self.scanner.stop_scan()
+                    return
+                if self.stop_flag.is_set():
+                    self.scanner.stop_scan()
+
+        self.scanner.add_callback('server_found', on_found)
+        heart = threading.Thread(target=keep_alive, daemon=True)
+        heart.start()
+        try:
+            self.scanner.scan_targets(targets, **options)
+        finally:
+            finished.set()
+            heart.join()
+            self.scanner.callbacks['server_found'].remove(on_found)
+
+        try:
+            if lost.is_set():
+                print(f"⚠️  Bail perdu sur le morceau {chunk_id}, abandonné")
+                return False
+            if self.stop_flag.is_set() or self.scanner.stop_flag.is_set():
+                self.coordinator.release(self.worker_id, chunk_id)
+                return False
+
+            servers = [server.to_dict(embed_favicon=True) for server in found if not server.whitelist]
+            if not self.coordinator.complete(self.worker_id, chunk_id, servers, self.scanner.scanned_ips):
+                print(f"⚠️  Bail perdu sur le morceau {chunk_id}, résultats ignorés")
+                return False
+            return True
+        finally:
+            found.clear()
+            self._discard_results()
+
+    def _discard_results(self):
+        """Libère les résultats du morceau: ils sont chez le coordinateur (ou le morceau sera rescanné)"""
+        if self.scanner.store is not None:
+            self.scanner.store.flush()
+        self.scanner.clear_servers()
+
+    def stop(self):
+        """Arrête le worker après avoir rendu son morceau en cours"""
+        self.stop_flag.set()
+        self.scanner.stop_scan()
+
+
+def _worker_main(db_path: str, lease_timeout: float, use_config: bool):
+    """Point d'entrée d'un processus worker local"""
+    try:
+        from .scanner import MinecraftScanner
+        from .config import Config
+    except ImportError:
+        from scanner import MinecraftScanner
+        from config import Config
+
+    scanner = MinecraftScanner.from_config(Config()) if use_config else MinecraftScanner()
+    coordinator = ScanCoordinator(db_path, lease_timeout)
+    try:
+        ScanWorker(coordinator, scanner).run()
+    finally:
+        coordinator.close()
+
+
+def run_local_workers(db_path: str, count: int, lease_timeout: float = DEFAULT_LEASE_TIMEOUT,
+                      use_config: bool = True) -> List[multiprocessing.Process]:
+    """Démarre count processus workers sur cette machine (à joindre par l'appelant)
+
+    Avec use_config, chaque worker géolocalise et vérifie les whitelists
+    selon config.json, comme un scan local.
+    """
+    # spawn et non fork, comme ShardedScan: le parent peut déjà avoir des threads
+    context = multiprocessing.get_context('spawn')
+    processes = []
+    for _ in range(count):
+        process = context.Process(target=_worker_main, args=(db_path, lease_timeout, use_config))
+        process.start()
+        processes.append(process)
+    return processes
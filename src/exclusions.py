@@ -0,0 +1,110 @@
+"""
+Listes d'exclusion (opt-out)
+Plages CIDR compilées en intervalles entiers triés et fusionnés, appartenance par recherche dichotomique
+"""
+
+import bisect
+import ipaddress
+from typing import Iterable, List, Tuple, Union
+
+try:
+    from .targets import ip_to_int, merge_intervals
+except ImportError:
+    from targets import ip_to_int, merge_intervals
+
+
+class ExclusionList:
+    """Adresses IPv4 à ne jamais contacter
+
+    Les fichiers contiennent une entrée par ligne: plage CIDR, adresse seule
+    ou intervalle "début - fin"; tout ce qui suit # est un commentaire. Les
+    entrées sont compilées en intervalles [début, fin] disjoints et triés:
+    un test d'appartenance coûte O(log n), et TargetGenerator retire ces
+    intervalles des plages avant même de générer les cibles.
+    """
+
+    def __init__(self, entries: Iterable[str] = ()):
+        self._pending: List[Tuple[int, int]] = []
+        self.intervals: List[Tuple[int, int]] = []
+        self._starts: List[int] = []
+        self.ignored = 0  # Lignes IPv6 ou invalides
+        for entry in entries:
+            self.add(entry)
+        self.compile()
+
+    @classmethod
+    def from_files(cls, paths: Iterable[str]) -> 'ExclusionList':
+        """Charge et compile plusieurs fichiers d'exclusion"""
+        exclusions = cls()
+        for path in paths:
+            exclusions.load_file(path)
+        exclusions.compile()
+        return exclusions
+
+    def load_file(self, path: str) -> int:
+        """Ajoute les entrées d'un fichier (à compiler ensuite); retourne le nombre d'entrées lues"""
+        count = 0
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.split('#', 1)[0].strip()
+                if line and self.add(line):
+                    count += 1
+        return count
+
+    def add(self, entry: str) -> bool:
+        """Ajoute une plage, une adresse ou un intervalle "a - b" (pris en compte au prochain compile)"""
+        try:
+            if '-' in entry:
+                first, last = (ip_to_int(part.strip()) for part in entry.split('-', 1))
+            else:
+                network = ipaddress.ip_network(entry.strip(), strict=False)
+                if network.version != 4:
+                    self.ignored += 1
+                    return False
+                first, last = int(network.network_address), int(network.broadcast_address)
+        except (ValueError, OSError):
+            self.ignored += 1
+            return False
+        self._pending.append((min(first, last), max(first, last)))
+        return True
+
+    def add_interval(self, first: int, last: int):
+        """Ajoute un intervalle d'entiers [first, last] (pris en compte au prochain compile)"""
+        self._pending.append((first, last))
+
+    def compile(self):
+        """Trie et fusionne les entrées ajoutées depuis le dernier compile"""
+        if self._pending:
+            self.intervals = merge_intervals(self.intervals + self._pending)
+            self._starts = [start for start, _ in self.intervals]
+            self._pending = []
+
+    def __contains__(self, ip: Union[str, int]) -> bool:
+        """Vrai si l'adresse (texte ou entier) est exclue; False pour un nom d'hôte"""
+        if isinstance(ip, str):
+            try:
+                ip = ip_to_int(ip)
+            except OSError:
+                return False
+        position = bisect.bisect_right(self._starts, ip) - 1
+        return position >= 0 and ip <= self.intervals[position][1]
+
+    def overlap(self, first: int, last: int) -> int:
+        """Nombre d'adresses exclues dans [first, last]"""
+        count = 0
+        position = max(bisect.bisect_right(self._starts, first) - 1, 0)
+        for start, end in self.intervals[position:]:
+            if start > last:
+                break
+            if end >= first:
+                count += min(end, last) - max(start, first) + 1
+        return count
+
+    def __len__(self) -> int:
+        """Nombre d'intervalles compilés"""
+        return len(self.intervals)
+
+    @property
+    def address_count(self) -> int:
+        """Nombre total d'adresses exclues"""
+        return sum(end - start + 1 for start, end in self.intervals)
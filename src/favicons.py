@@ -0,0 +1,116 @@
+"""
+Stockage des favicons
+Magasin adressé par contenu: une seule copie de chaque image, les serveurs ne gardent que son empreinte
+"""
+
+import base64
+import binascii
+import hashlib
+import threading
+from typing import Callable, Dict, Iterable, Optional
+
+DATA_URI_PREFIX = 'data:image/png;base64,'
+
+
+def decode_favicon(favicon: str) -> bytes:
+    """Octets PNG d'un favicon "data:image/png;base64,..." (ou base64 nu)"""
+    if favicon.startswith(DATA_URI_PREFIX):
+        favicon = favicon[len(DATA_URI_PREFIX):]
+    return base64.b64decode(favicon)
+
+
+def favicon_hash(image: bytes) -> str:
+    """Empreinte d'une image (BLAKE2b 128 bits en hexadécimal)"""
+    return hashlib.blake2b(image, digest_size=16).hexdigest()
+
+
+class FaviconStore:
+    """Images des serveurs indexées par empreinte de leur contenu
+
+    Les serveurs d'un même hébergeur partagent souvent la même icône: elle
+    n'est gardée qu'une fois, et MinecraftServer ne stocke que son
+    empreinte. Les miniatures (ex: PhotoImage 16x16 de l'interface) sont
+    construites à la première demande puis gardées en cache. Avec
+    retain=False, aucune image n'est conservée.
+    """
+
+    def __init__(self, retain: bool = True):
+        self.retain = retain
+        self._images: Dict[str, bytes] = {}
+        self._thumbnails = {}  # (empreinte, taille) -> objet construit
+        self._lock = threading.Lock()
+
+    def add(self, favicon: Optional[str]) -> Optional[str]:
+        """Ajoute un favicon (data URI ou base64); retourne son empreinte, ou None si absent, invalide ou non retenu"""
+        if not favicon or not self.retain:
+            return None
+        try:
+            image = decode_favicon(favicon)
+        except (binascii.Error, ValueError):
+            return None
+        return self.add_bytes(image)
+
+    def add_bytes(self, image: bytes) -> str:
+        key = favicon_hash(image)
+        with self._lock:
+            self._images.setdefault(key, image)
+        return key
+
+    def get(self, key: Optional[str]) -> Optional[bytes]:
+        """Octets PNG d'une empreinte"""
+        return self._images.get(key) if key else None
+
+    def data_uri(self, key: Optional[str]) -> Optional[str]:
+        """Favicon recomposé au format du protocole ("data:image/png;base64,...")"""
+        image = self.get(key)
+        return DATA_URI_PREFIX + base64.b64encode(image).decode('ascii') if image is not None else None
+
+    def thumbnail(self, key: Optional[str], size: int, build: Callable[[bytes, int], object]):
+        """Miniature size x size construite par build(octets, taille) une seule fois par image"""
+        image = self.get(key)
+        if image is None:
+            return None
+        cache_key = (key, size)
+        if cache_key not in self._thumbnails:
+            try:
+                self._thumbnails[cache_key] = build(image, size)
+            except Exception:
+                self._thumbnails[cache_key] = None  # Image illisible: ne pas réessayer
+        return self._thumbnails[cache_key]
+
+    def export(self, keys: Iterable[Optional[str]]) -> Dict[str, str]:
+        """{empreinte: base64} des images référencées (pour l'enregistrement)"""
+        result = {}
+        for key in keys:
+            image = self.get(key)
+            if image is not None and key not in result:
+                result[key] = base64.b64encode(image).decode('ascii')
+        return result
+
+    def load(self, favicons: Dict[str, str]):
+        """Recharge des images exportées par export()"""
+        if not self.retain:
+            return
+        with self._lock:
+            for key, data in favicons.items():
+                try:
+                    self._images.setdefault(key, base64.b64decode(data))
+                except (binascii.Error, ValueError):
+                    continue
+
+    def clear(self):
+        with self._lock:
+            self._images.clear()
+            self._thumbnails.clear()
+
+    def __len__(self) -> int:
+        return len(self._images)
+
+    @property
+    def size(self) -> int:
+        """Octets d'images conservés"""
+        return sum(len(image) for image in self._images.values())
+
+
+# Magasin partagé par tous les serveurs du processus
+favicon_store = FaviconStore()
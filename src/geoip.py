@@ -0,0 +1,401 @@
+"""
+Géolocalisation des serveurs découverts
+Base MaxMind locale (mmap + cache LRU par préfixe), HTTP ip-api.com uniquement en secours explicite
+"""
+
+import os
+import time
+import queue
+import threading
+import ipaddress
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    from . import jsoncodec
+    from .utils import write_json_atomic
+except ImportError:
+    import jsoncodec
+    from utils import write_json_atomic
+
+try:
+    import maxminddb
+except ImportError:
+    maxminddb = None
+
+DEFAULT_DATABASE_PATH = "data/GeoLite2-City.mmdb"
+DEFAULT_HTTP_CACHE_PATH = "data/geoip_cache.json"
+
+
+def unknown_location() -> Dict[str, any]:
+    """Localisation par défaut quand aucune source ne répond"""
+    return {'country': 'Unknown', 'city': 'Unknown', 'lat': 0, 'lon': 0}
+
+
+class MaxMindGeoIPProvider:
+    """Recherche dans une base MaxMind (GeoLite2-City) ouverte une seule fois en mmap
+
+    Les résultats sont mis en cache par préfixe réseau (celui renvoyé par la
+    base), donc toutes les IP d'un même bloc partagent une seule entrée.
+    """
+
+    def __init__(self, database_path: str = DEFAULT_DATABASE_PATH, cache_size: int = 65536, reader=None):
+        if reader is None:
+            if maxminddb is None:
+                raise ImportError("Le module maxminddb n'est pas installé (pip install maxminddb)")
+            reader = maxminddb.open_database(database_path, maxminddb.MODE_MMAP)
+        self.reader = reader
+        self.cache_size = cache_size
+        self._cache = OrderedDict()  # (version, longueur de préfixe, réseau) -> localisation ou None
+        self._prefix_lengths = []    # Longueurs de préfixe présentes dans le cache, de la plus longue à la plus courte
+        self._lock = threading.Lock()
+
+    def lookup(self, ip: str) -> Optional[Dict[str, any]]:
+        """Retourne la localisation de l'IP, ou None si la base ne la connaît pas"""
+        address = ipaddress.ip_address(ip)
+        value = int(address)
+        bits = address.max_prefixlen
+
+        with self._lock:
+            for prefix_len in self._prefix_lengths:
+                key = (address.version, prefix_len, value >> (bits - prefix_len))
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    location = self._cache[key]
+                    return dict(location) if location else None
+
+        record, prefix_len = self.reader.get_with_prefix_len(ip)
+        location = self._to_location(record) if record else None
+        prefix_len = min(prefix_len, bits)
+
+        with self._lock:
+            key = (address.version, prefix_len, value >> (bits - prefix_len))
+            self._cache[key] = location
+            if prefix_len not in self._prefix_lengths:
+                self._prefix_lengths = sorted(self._prefix_lengths + [prefix_len], reverse=True)
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+        return dict(location) if location else None
+
+    @staticmethod
+    def _to_location(record: Dict) -> Dict[str, any]:
+        """Convertit un enregistrement GeoLite2 au format de MinecraftServer.location"""
+        country = record.get('country') or record.get('registered_country') or {}
+        city = record.get('city') or {}
+        coordinates = record.get('location') or {}
+        return {
+            'country': country.get('names', {}).get('en', 'Unknown'),
+            'city': city.get('names', {}).get('en', 'Unknown'),
+            'lat': coordinates.get('latitude', 0),
+            'lon': coordinates.get('longitude', 0)
+        }
+
+    def close(self):
+        """Ferme la base"""
+        self.reader.close()
+
+
+class GeoCache:
+    """Cache disque des localisations HTTP, avec durée de validité, clé = IP ou préfixe
+
+    Le fichier JSON est rechargé au démarrage, donc les re-scans et les
+    serveurs multi-ports d'une même IP ne coûtent plus de requête.
+    """
+
+    def __init__(self, path: Optional[str] = None, ttl: float = 7 * 24 * 3600, prefix_len: int = 32,
+                 autosave_every: int = 100):
+        self.path = path
+        self.ttl = ttl
+        self.prefix_len = prefix_len
+        self.autosave_every = autosave_every
+        self._entries = {}  # clé -> [horodatage, localisation ou None]
+        self._dirty = 0
+        self._lock = threading.Lock()
+        self.load()
+
+    def key(self, ip: str) -> str:
+        """Clé de cache: l'IP elle-même ou son réseau /prefix_len"""
+        address = ipaddress.ip_address(ip)
+        if self.prefix_len >= address.max_prefixlen:
+            return str(address)
+        return str(ipaddress.ip_network(f"{address}/{self.prefix_len}", strict=False))
+
+    def get(self, ip: str):
+        """Retourne (trouvé, localisation); une entrée expirée compte comme absente"""
+        with self._lock:
+            entry = self._entries.get(self.key(ip))
+        if entry is None or time.time() - entry[0] > self.ttl:
+            return False, None
+        return True, entry[1]
+
+    def put(self, ip: str, location: Optional[Dict[str, any]]):
+        """Mémorise une localisation (None = IP inconnue du service)"""
+        with self._lock:
+            self._entries[self.key(ip)] = [time.time(), location]
+            self._dirty += 1
+            autosave = self.path and self._dirty >= self.autosave_every
+        if autosave:
+            self.save()
+
+    def load(self):
+        """Charge le cache depuis le disque en ignorant les entrées expirées"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'rb') as f:
+                entries = jsoncodec.load(f)
+            now = time.time()
+            with self._lock:
+                self._entries = {key: entry for key, entry in entries.items() if now - entry[0] <= self.ttl}
+        except Exception as e:
+            print(f"⚠️  Cache GeoIP illisible ({self.path}): {e}")
+
+    def save(self):
+        """Écrit le cache sur le disque (remplacement atomique du fichier)"""
+        if not self.path:
+            return
+        with self._lock:
+            entries = dict(self._entries)
+            self._dirty = 0
+        try:
+            write_json_atomic(self.path, entries)
+        except Exception as e:
+            print(f"⚠️  Erreur lors de la sauvegarde du cache GeoIP: {e}")
+
+
+class IpApiGeoIPProvider:
+    """Géolocalisation via le service HTTP ip-api.com
+
+    Une requests.Session partagée garde les connexions ouvertes, les IP
+    manquantes sont demandées par lots de 100 à l'API /batch et les réponses
+    passent par un GeoCache persistant.
+    """
+
+    # Taille maximale d'un lot accepté par /batch
+    BATCH_SIZE = 100
+    FIELDS = "status,country,city,lat,lon,query"
+
+    def __init__(self, base_url: str = "http://ip-api.com", timeout: float = 2, cache: GeoCache = None,
+                 pool_size: int = 10):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.cache = cache if cache is not None else GeoCache()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def lookup(self, ip: str) -> Optional[Dict[str, any]]:
+        """Retourne la localisation de l'IP, ou None en cas d'échec"""
+        return self.lookup_many([ip]).get(ip)
+
+    def lookup_many(self, ips: List[str]) -> Dict[str, Optional[Dict[str, any]]]:
+        """Localise plusieurs IP: cache d'abord, puis une requête /batch par tranche de 100"""
+        results = {}
+        missing = []
+        for ip in dict.fromkeys(ips):
+            ipaddress.ip_address(ip)  # ValueError pour un nom d'hôte, comme le provider MaxMind
+            found, location = self.cache.get(ip)
+            if found:
+                results[ip] = location
+            else:
+                missing.append(ip)
+
+        for start in range(0, len(missing), self.BATCH_SIZE):
+            results.update(self._fetch_batch(missing[start:start + self.BATCH_SIZE]))
+        return results
+
+    def _fetch_batch(self, ips: List[str]) -> Dict[str, Optional[Dict[str, any]]]:
+        """Interroge /batch; les erreurs réseau ne sont pas mises en cache"""
+        try:
+            response = self.session.post(f"{self.base_url}/batch", params={'fields': self.FIELDS},
+                                         json=ips, timeout=self.timeout)
+            if response.status_code != 200:
+                return {}
+            answers = response.json()
+        except Exception:
+            return {}
+
+        results = {}
+        for ip, data in zip(ips, answers):
+            location = None
+            if data.get('status') == 'success':
+                location = {
+                    'country': data.get('country', 'Unknown'),
+                    'city': data.get('city', 'Unknown'),
+                    'lat': data.get('lat', 0),
+                    'lon': data.get('lon', 0)
+                }
+            self.cache.put(ip, location)
+            results[ip] = location
+        return results
+
+    def close(self):
+        """Ferme les connexions et écrit le cache"""
+        self.session.close()
+        self.cache.save()
+
+
+class GeoLocator:
+    """Chaîne de providers interrogés dans l'ordre: base locale puis, si activé, HTTP"""
+
+    def __init__(self, database_path: str = DEFAULT_DATABASE_PATH, http_fallback: bool = False, providers=None,
+                 http_url: str = "http://ip-api.com", http_cache_path: Optional[str] = DEFAULT_HTTP_CACHE_PATH,
+                 http_cache_ttl: float = 7 * 24 * 3600):
+        self.database_path = database_path
+        self.http_fallback = http_fallback
+        self.http_url = http_url
+        self.http_cache_path = http_cache_path
+        self.http_cache_ttl = http_cache_ttl
+        self._providers = providers
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config) -> 'GeoLocator':
+        """Construit le localisateur depuis la section geoip de la configuration"""
+        return cls(database_path=config.get('geoip.database_path', DEFAULT_DATABASE_PATH),
+                   http_fallback=config.get('geoip.http_fallback', False),
+                   http_url=config.get('geoip.http_url', "http://ip-api.com"),
+                   http_cache_path=config.get('geoip.http_cache_path', DEFAULT_HTTP_CACHE_PATH),
+                   http_cache_ttl=config.get('geoip.http_cache_ttl', 7 * 24 * 3600))
+
+    @property
+    def providers(self):
+        """Providers ouverts au premier usage (la base n'est mappée qu'une fois)"""
+        if self._providers is None:
+            with self._lock:
+                if self._providers is None:
+                    self._providers = self._open_providers()
+        return self._providers
+
+    def _open_providers(self):
+        providers = []
+        if os.path.exists(self.database_path):
+            try:
+                providers.append(MaxMindGeoIPProvider(self.database_path))
+            except Exception as e:
+                print(f"⚠️  Impossible d'ouvrir la base GeoIP {self.database_path}: {e}")
+        else:
+            print(f"⚠️  Base GeoIP introuvable: {self.database_path}")
+
+        if self.http_fallback:
+            cache = GeoCache(self.http_cache_path, ttl=self.http_cache_ttl)
+            providers.append(IpApiGeoIPProvider(self.http_url, cache=cache))
+        elif not providers:
+            print("💡 Géolocalisation désactivée (activez geoip.http_fallback pour utiliser ip-api.com)")
+        return providers
+
+    @property
+    def batched(self) -> bool:
+        """Vrai si un provider distant est utilisé: les localisations gagnent alors à être groupées"""
+        return any(hasattr(provider, 'lookup_many') for provider in self.providers)
+
+    def locate(self, ip: str) -> Dict[str, any]:
+        """Obtient la géolocalisation d'une IP"""
+        for provider in self.providers:
+            try:
+                location = provider.lookup(ip)
+            except ValueError:  # Pas une adresse IP (nom d'hôte)
+                continue
+            if location:
+                return location
+        return unknown_location()
+
+    def locate_many(self, ips: List[str]) -> Dict[str, Dict[str, any]]:
+        """Géolocalise plusieurs IP; chaque provider ne reçoit que celles encore inconnues"""
+        results = {}
+        remaining = list(dict.fromkeys(ips))
+        for provider in self.providers:
+            if not remaining:
+                break
+            if hasattr(provider, 'lookup_many'):
+                ip_addresses = [ip for ip in remaining if self._is_ip(ip)]
+                found = provider.lookup_many(ip_addresses) if ip_addresses else {}
+            else:
+                found = {}
+                for ip in remaining:
+                    try:
+                        found[ip] = provider.lookup(ip)
+                    except ValueError:
+                        continue
+            results.update((ip, location) for ip, location in found.items() if location)
+            remaining = [ip for ip in remaining if ip not in results]
+
+        for ip in remaining:
+            results[ip] = unknown_location()
+        return results
+
+    @staticmethod
+    def _is_ip(value: str) -> bool:
+        try:
+            ipaddress.ip_address(value)
+            return True
+        except ValueError:
+            return False
+
+    def save(self):
+        """Écrit les caches persistants des providers"""
+        for provider in self._providers or []:
+            cache = getattr(provider, 'cache', None)
+            if cache is not None:
+                cache.save()
+
+    def close(self):
+        """Ferme les providers ouverts"""
+        for provider in self._providers or []:
+            provider.close()
+        self._providers = None
+
+
+class GeoBatcher:
+    """Géolocalise les serveurs trouvés par lots, dans un thread dédié
+
+    Le scan n'attend pas le service HTTP: les serveurs sont accumulés jusqu'à
+    batch_size ou max_delay secondes, localisés en une requête puis transmis
+    à on_located.
+    """
+
+    def __init__(self, geolocator: GeoLocator, on_located: Callable, batch_size: int = 100, max_delay: float = 0.5):
+        self.geolocator = geolocator
+        self.on_located = on_located
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, server):
+        """Ajoute un serveur à géolocaliser"""
+        self._queue.put(server)
+
+    def flush(self):
+        """Attend que tous les serveurs soumis aient été localisés et transmis"""
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.time() + self.max_delay
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                locations = self.geolocator.locate_many([server.ip for server in batch])
+                for server in batch:
+                    server.location = locations.get(server.ip) or unknown_location()
+                    self.on_located(server)
+            except Exception as e:
+                print(f"Erreur de géolocalisation: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
@@ -6,29 +6,44 @@ import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import threading
 import time
-from typing import List, Dict, Optional
+from typing import List, Optional
 from PIL import Image, ImageTk
-import base64
 import io
 
 from .scanner import MinecraftScanner, MinecraftServer
+from .favicons import favicon_store
 from .config import Config
+from .monitor import ServerMonitor
 
 class ServerListFrame(ttk.Frame):
     """Frame contenant la liste des serveurs"""
     
-    def __init__(self, parent, scanner: MinecraftScanner):
+    def __init__(self, parent, scanner: MinecraftScanner, config: Optional[Config] = None):
         super().__init__(parent)
         self.scanner = scanner
+        self.config = config or Config()
         self.servers = []
         self.filtered_servers = []
         self.current_filter = ""
         self.current_country_filter = ""
+        self.current_min_players = 0
+        self.show_offline = self.config.get('display_settings.show_offline_servers', False)
+        self.refresh_interval = self.config.get('display_settings.refresh_interval', 30)
+        self.monitor = ServerMonitor.from_config(scanner, self.config)
+        self._dirty = False
+        # Résultats dans la base seulement: la liste est lue page par page
+        self.page = 0
+        self.page_size = self.config.get('display_settings.max_servers_displayed', 1000)
         
         self.setup_ui()
         
         # Callbacks du scanner
         self.scanner.add_callback('server_found', self.on_server_found)
+        self.scanner.add_callback('server_removed', self.on_server_removed)
+        self.scanner.add_callback('server_updated', self.on_server_updated)
+        
+        # Les mises à jour de la surveillance sont regroupées: un rafraîchissement par refresh_interval
+        self.after(int(self.refresh_interval * 1000), self.periodic_refresh)
     
     def setup_ui(self):
         """Configure l'interface de la liste de serveurs"""
@@ -50,8 +65,27 @@ class ServerListFrame(ttk.Frame):
         self.country_combo.pack(side='left', padx=(5, 10))
         self.country_combo.bind('<<ComboboxSelected>>', self.on_country_filter_change)
         
+        # Filtre par nombre de joueurs connectés
+        ttk.Label(filter_frame, text="Joueurs min:").pack(side='left')
+        self.min_players_var = tk.StringVar(value="0")
+        self.min_players_var.trace('w', self.on_min_players_change)
+        ttk.Spinbox(filter_frame, from_=0, to=100000, textvariable=self.min_players_var,
+                    width=6).pack(side='left', padx=(5, 10))
+        
+        # Pages (résultats lus dans la base SQLite)
+        self.pager_frame = ttk.Frame(filter_frame)
+        ttk.Button(self.pager_frame, text="◀", width=2, command=lambda: self.change_page(-1)).pack(side='left')
+        self.page_label = ttk.Label(self.pager_frame, text="Page 1/1")
+        self.page_label.pack(side='left', padx=5)
+        ttk.Button(self.pager_frame, text="▶", width=2, command=lambda: self.change_page(1)).pack(side='left')
+        if self.paged:
+            self.pager_frame.pack(side='left', padx=(5, 10))
+        
         # Boutons d'action
         ttk.Button(filter_frame, text="Rafraîchir", command=self.refresh_servers).pack(side='right', padx=5)
+        self.monitor_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(filter_frame, text="Surveillance", variable=self.monitor_var,
+                        command=self.toggle_monitoring).pack(side='right', padx=5)
         ttk.Button(filter_frame, text="Effacer", command=self.clear_servers).pack(side='right')
         
         # Treeview pour la liste des serveurs
@@ -99,42 +133,133 @@ class ServerListFrame(ttk.Frame):
         self.tree.bind('<Button-3>', self.show_context_menu)  # Clic droit sur macOS
         self.tree.bind('<Button-2>', self.show_context_menu)  # Clic droit sur Linux/Windows
     
+    @property
+    def paged(self) -> bool:
+        """Vrai si les résultats ne sont que dans la base (scanner.keep_servers faux)"""
+        return self.scanner.store is not None and not self.scanner.keep_servers
+    
     def on_server_found(self, server: MinecraftServer):
         """Appelé quand un nouveau serveur est trouvé"""
+        if self.paged:
+            # Lu depuis la base au prochain rafraîchissement, une fois le lot écrit
+            self._dirty = True
+            return
         self.servers.append(server)
         self.update_country_filter()
         self.apply_filters()
     
+    def on_server_removed(self, server: MinecraftServer):
+        """Appelé quand un serveur est retiré des résultats (whitelist détectée)"""
+        if self.paged:
+            self._dirty = True
+        elif server in self.servers:
+            self.servers.remove(server)
+            self.apply_filters()
+    
+    def on_server_updated(self, server: MinecraftServer):
+        """Appelé quand un serveur a été re-pingé (affiché au prochain rafraîchissement)"""
+        self._dirty = True
+    
+    def periodic_refresh(self):
+        """Réaffiche la liste si des serveurs ont changé depuis le dernier passage"""
+        if self._dirty:
+            self._dirty = False
+            self.apply_filters()
+        self.after(int(self.refresh_interval * 1000), self.periodic_refresh)
+    
+    def toggle_monitoring(self):
+        """Active ou désactive la surveillance des serveurs connus"""
+        if self.monitor_var.get():
+            self.monitor.start()
+        else:
+            threading.Thread(target=self.monitor.stop, daemon=True).start()
+    
     def on_filter_change(self, *args):
         """Appelé quand le filtre texte change"""
         self.current_filter = self.filter_var.get().lower()
+        self.page = 0
         self.apply_filters()
     
     def on_country_filter_change(self, event=None):
         """Appelé quand le filtre pays change"""
         self.current_country_filter = self.country_var.get()
+        self.page = 0
+        self.apply_filters()
+    
+    def on_min_players_change(self, *args):
+        """Appelé quand le nombre minimal de joueurs change (valeur invalide = pas de filtre)"""
+        try:
+            self.current_min_players = max(0, int(self.min_players_var.get()))
+        except ValueError:
+            self.current_min_players = 0
+        self.page = 0
+        self.apply_filters()
+    
+    def change_page(self, step: int):
+        """Affiche la page précédente (-1) ou suivante (1)"""
+        self.page = max(0, self.page + step)
         self.apply_filters()
     
     def apply_filters(self):
         """Applique les filtres et met à jour l'affichage"""
+        if self.paged:
+            self.apply_page()
+            return
+        
+        country = self.current_country_filter if self.current_country_filter not in ("", "Tous") else None
+        
+        # Table en colonnes: filtres vectorisés, texte cherché seulement dans les serveurs retenus
+        if self.scanner.table is not None:
+            conditions = {}
+            if not self.show_offline:
+                conditions['online'] = True
+            if country:
+                conditions['country'] = country
+            if self.current_min_players:
+                conditions['players_online'] = (self.current_min_players, None)
+            self.filtered_servers = self.scanner.table.where(search=self.current_filter or None, **conditions)
+            self.update_tree()
+            return
+        
         self.filtered_servers = []
         
         for server in self.servers:
-            # Filtre par texte
-            if self.current_filter:
-                searchable_text = f"{server.ip} {server.name} {server.description} {server.version}".lower()
-                if self.current_filter not in searchable_text:
-                    continue
+            # Serveurs hors ligne (surveillance)
+            if not server.online and not self.show_offline:
+                continue
+            
+            # Filtre par nombre de joueurs
+            if server.players_online < self.current_min_players:
+                continue
             
             # Filtre par pays
-            if self.current_country_filter and self.current_country_filter != "Tous":
-                if server.location['country'] != self.current_country_filter:
-                    continue
+            if country and server.country != country:
+                continue
+            
+            # Filtre par texte
+            if self.current_filter and self.current_filter not in server.search_text:
+                continue
             
             self.filtered_servers.append(server)
         
         self.update_tree()
     
+    def apply_page(self):
+        """Affiche la page courante des résultats de la base, filtrée par SQLite"""
+        filters = {
+            'search': self.current_filter or None,
+            'country': self.current_country_filter if self.current_country_filter != "Tous" else None,
+            'online': None if self.show_offline else True,
+            'min_players': self.current_min_players or None,
+        }
+        total = self.scanner.count_servers(**filters)
+        pages = max(1, -(-total // self.page_size))
+        self.page = min(self.page, pages - 1)
+        self.filtered_servers = self.scanner.page_servers(self.page * self.page_size, self.page_size, **filters)
+        self.page_label.config(text=f"Page {self.page + 1}/{pages} ({total})")
+        self.update_country_filter()
+        self.update_tree()
+    
     def update_tree(self):
         """Met à jour l'affichage du treeview"""
         # Effacer les éléments existants
@@ -166,9 +291,9 @@ class ServerListFrame(ttk.Frame):
                                   tags=(tag,))
             
             # Ajouter l'icône si disponible
-            if server.favicon:
+            if server.favicon_hash:
                 try:
-                    icon = self.decode_favicon(server.favicon)
+                    icon = self.decode_favicon(server.favicon_hash)
                     if icon:
                         self.tree.set(item, '#0', '🖼️')
                 except:
@@ -181,10 +306,14 @@ class ServerListFrame(ttk.Frame):
     
     def update_country_filter(self):
         """Met à jour la liste des pays dans le filtre"""
-        countries = set()
-        for server in self.servers:
-            if server.location['country'] != 'Unknown':
-                countries.add(server.location['country'])
+        if self.paged:
+            countries = set(self.scanner.store.countries())
+            countries.discard('Unknown')
+        else:
+            countries = set()
+            for server in self.servers:
+                if server.location['country'] != 'Unknown':
+                    countries.add(server.location['country'])
         
         countries_list = ["Tous"] + sorted(list(countries))
         self.country_combo['values'] = countries_list
@@ -192,39 +321,31 @@ class ServerListFrame(ttk.Frame):
         if not self.country_var.get():
             self.country_var.set("Tous")
     
-    def decode_favicon(self, favicon_data: str) -> Optional[ImageTk.PhotoImage]:
-        """Décode et redimensionne un favicon de serveur"""
-        try:
-            # Le favicon est en base64, préfixé par "data:image/png;base64,"
-            if favicon_data.startswith('data:image/png;base64,'):
-                base64_data = favicon_data[22:]  # Enlever le préfixe
-            else:
-                base64_data = favicon_data
-            
-            # Décoder le base64
-            image_data = base64.b64decode(base64_data)
-            
-            # Créer l'image PIL
-            image = Image.open(io.BytesIO(image_data))
-            
-            # Redimensionner à 16x16
-            image = image.resize((16, 16), Image.Resampling.LANCZOS)
-            
-            # Convertir pour Tkinter
-            return ImageTk.PhotoImage(image)
-            
-        except Exception as e:
-            return None
+    def decode_favicon(self, favicon_hash: str) -> Optional[ImageTk.PhotoImage]:
+        """Miniature 16x16 d'un favicon, décodée une seule fois par image (cache du magasin)"""
+        return favicon_store.thumbnail(favicon_hash, 16, self._build_thumbnail)
+    
+    @staticmethod
+    def _build_thumbnail(image_data: bytes, size: int) -> ImageTk.PhotoImage:
+        """Redimensionne une image PNG et la convertit pour Tkinter"""
+        image = Image.open(io.BytesIO(image_data))
+        image = image.resize((size, size), Image.Resampling.LANCZOS)
+        return ImageTk.PhotoImage(image)
     
     def refresh_servers(self):
-        """Rafraîchit les informations des serveurs"""
-        # Ici on pourrait re-ping les serveurs pour mettre à jour leurs infos
+        """Rafraîchit les informations des serveurs (re-ping des moins récents d'abord, dans le budget)"""
+        if not self.monitor.is_running:
+            self.monitor_var.set(True)
+            self.monitor.start()
+        self.monitor.refresh_now()
         self.apply_filters()
     
     def clear_servers(self):
-        """Efface tous les serveurs de la liste"""
+        """Efface tous les serveurs de la liste (la base SQLite, elle, est conservée)"""
+        self.page = 0
         self.servers.clear()
         self.filtered_servers.clear()
+        self.monitor.clear()
         self.scanner.clear_servers()
         self.update_tree()
         self.update_country_filter()
@@ -401,7 +522,11 @@ class ScanControlFrame(ttk.Frame):
     def run_scan(self, ip_ranges: List[str], ports: List[int], max_threads: int, timeout: int):
         """Lance le scan (à exécuter dans un thread)"""
         try:
-            self.scanner.scan_multiple_ranges(ip_ranges, ports, max_threads, timeout)
+            self.scanner.scan_multiple_ranges(ip_ranges, ports, max_threads, timeout,
+                                              engine=self.config.get_scan_engine(),
+                                              concurrency=self.config.get_concurrency(),
+                                              sweep_timeout=self.config.get_sweep_timeout(),
+                                              workers=self.config.get_workers())
         except Exception as e:
             print(f"Erreur durant le scan: {e}")
     
@@ -487,6 +612,16 @@ class ServerDetailsWindow:
             ("Whitelist:", "Oui" if self.server.whitelist else "Non"),
             ("Dernière vérification:", time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.server.last_seen)))
         ]
+        if self.server.hostnames:
+            info_items.insert(1, ("Noms d'hôte:", ", ".join(self.server.hostnames)))
+        # Informations Query (si le serveur a répondu)
+        if self.server.map:
+            info_items.append(("Carte:", self.server.map))
+        if self.server.plugins:
+            info_items.append(("Plugins:", ", ".join(self.server.plugins)))
+        if self.server.mods:
+            info_items.append(("Mods:", f"{len(self.server.mods)} ({', '.join(self.server.mods[:10])}"
+                                        f"{', ...' if len(self.server.mods) > 10 else ''})"))
         
         for i, (label, value) in enumerate(info_items):
             ttk.Label(general_frame, text=label, font=('TkDefaultFont', 9, 'bold')).grid(row=i, column=0, sticky='nw', padx=(0, 10))
@@ -532,19 +667,13 @@ class ServerDetailsWindow:
             ttk.Label(location_frame, text=value).grid(row=i, column=1, sticky='w')
         
         # Favicon (si disponible)
-        if self.server.favicon:
+        if self.server.favicon_hash:
             favicon_frame = ttk.LabelFrame(main_frame, text="Icône du serveur", padding="10")
             favicon_frame.pack(fill='x', pady=(0, 10))
             
             try:
-                # Décoder le favicon
-                if self.server.favicon.startswith('data:image/png;base64,'):
-                    base64_data = self.server.favicon[22:]
-                else:
-                    base64_data = self.server.favicon
-                
-                image_data = base64.b64decode(base64_data)
-                image = Image.open(io.BytesIO(image_data))
+                # Image décodée une seule fois dans le magasin partagé
+                image = Image.open(io.BytesIO(favicon_store.get(self.server.favicon_hash)))
                 
                 # Agrandir l'image pour l'affichage
                 image = image.resize((64, 64), Image.Resampling.NEAREST)
@@ -598,7 +727,7 @@ class MineSpyderGUI:
         main_paned.add(self.scan_control, weight=0)
         
         # Frame de la liste des serveurs (en bas)
-        self.server_list = ServerListFrame(main_paned, self.scanner)
+        self.server_list = ServerListFrame(main_paned, self.scanner, self.config)
         main_paned.add(self.server_list, weight=1)
         
         # Barre de statut
@@ -664,38 +793,52 @@ class MineSpyderGUI:
     
     def show_stats(self):
         """Affiche les statistiques"""
-        total_servers = len(self.scanner.servers)
+        total_servers = self.scanner.count_servers()
         if total_servers == 0:
             messagebox.showinfo("Statistiques", "Aucun serveur scanné")
             return
         
-        # Calculer des statistiques
-        countries = {}
-        versions = {}
-        total_players = 0
-        
-        for server in self.scanner.servers:
-            # Compter par pays
-            country = server.location.get('country', 'Inconnu')
-            countries[country] = countries.get(country, 0) + 1
+        # Calculer des statistiques (base SQLite ou table en colonnes si activées, parcours des objets sinon)
+        if not self.scanner.keep_servers:
+            stats = self.scanner.store.stats(top=5)
+            total_players = stats['players_online']
+            top_countries = stats['countries']
+            top_versions = [(version or 'Inconnue', count) for version, count in stats['versions']]
+        elif self.scanner.table is not None:
+            stats = self.scanner.table.stats(top=5)
+            total_players = stats['players_online']
+            top_countries = stats['countries']
+            top_versions = [(version or 'Inconnue', count) for version, count in stats['versions']]
+        else:
+            countries = {}
+            versions = {}
+            total_players = 0
             
-            # Compter par version
-            version = server.version or 'Inconnue'
-            versions[version] = versions.get(version, 0) + 1
+            for server in self.scanner.servers:
+                # Compter par pays
+                country = server.location.get('country', 'Inconnu')
+                countries[country] = countries.get(country, 0) + 1
+                
+                # Compter par version
+                version = server.version or 'Inconnue'
+                versions[version] = versions.get(version, 0) + 1
+                
+                # Compter les joueurs
+                total_players += server.players_online
             
-            # Compter les joueurs
-            total_players += server.players_online
+            top_countries = sorted(countries.items(), key=lambda x: x[1], reverse=True)[:5]
+            top_versions = sorted(versions.items(), key=lambda x: x[1], reverse=True)[:5]
         
         # Créer le message de statistiques
         stats_msg = f"Total de serveurs: {total_servers}\n"
         stats_msg += f"Total de joueurs: {total_players}\n\n"
         
         stats_msg += "Top 5 pays:\n"
-        for country, count in sorted(countries.items(), key=lambda x: x[1], reverse=True)[:5]:
+        for country, count in top_countries:
             stats_msg += f"  {country}: {count}\n"
         
         stats_msg += "\nTop 5 versions:\n"
-        for version, count in sorted(versions.items(), key=lambda x: x[1], reverse=True)[:5]:
+        for version, count in top_versions:
             stats_msg += f"  {version}: {count}\n"
         
         messagebox.showinfo("Statistiques", stats_msg)
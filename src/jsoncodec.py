@@ -0,0 +1,111 @@
+"""
+Encodage JSON
+orjson s'il est installé (pip install orjson), bibliothèque standard sinon, derrière la même interface
+"""
+
+import gc
+import json
+from typing import Any, BinaryIO, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# orjson.JSONDecodeError hérite de json.JSONDecodeError: une seule exception à intercepter
+JSONDecodeError = json.JSONDecodeError
+
+
+class StdlibCodec:
+    """Module json de la bibliothèque standard"""
+
+    name = "json"
+
+    def loads(self, data: Union[str, bytes, bytearray, memoryview]) -> Any:
+        if isinstance(data, memoryview):
+            data = bytes(data)
+        return json.loads(data)
+
+    def dumps(self, obj: Any, indent: bool = False) -> bytes:
+        return json.dumps(obj, indent=2 if indent else None, ensure_ascii=False).encode('utf-8')
+
+
+class OrjsonCodec:
+    """orjson: encodage et décodage natifs, plusieurs fois plus rapides
+
+    orjson refuse quelques valeurs que json accepte (entiers de plus de
+    64 bits, clés non textuelles): elles repassent par la bibliothèque
+    standard plutôt que de faire échouer l'enregistrement.
+    """
+
+    name = "orjson"
+
+    def __init__(self):
+        self._fallback = StdlibCodec()
+
+    def loads(self, data: Union[str, bytes, bytearray, memoryview]) -> Any:
+        return orjson.loads(data)
+
+    def dumps(self, obj: Any, indent: bool = False) -> bytes:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+        except TypeError:
+            return self._fallback.dumps(obj, indent)
+
+
+_codec = OrjsonCodec() if orjson is not None else StdlibCodec()
+
+
+def backend() -> str:
+    """Nom de l'encodeur utilisé ("orjson" ou "json")"""
+    return _codec.name
+
+
+def set_backend(name: str):
+    """Choisit l'encodeur ("orjson" ou "json"), par exemple pour comparer les deux"""
+    global _codec
+    if name == "orjson":
+        if orjson is None:
+            raise ImportError("Le module orjson n'est pas installé (pip install orjson)")
+        _codec = OrjsonCodec()
+    elif name == "json":
+        _codec = StdlibCodec()
+    else:
+        raise ValueError(f"Encodeur JSON inconnu: {name}")
+
+
+def loads(data: Union[str, bytes, bytearray, memoryview]) -> Any:
+    """Décode un document JSON (texte ou octets UTF-8)"""
+    return _codec.loads(data)
+
+
+def dumps_bytes(obj: Any, indent: bool = False) -> bytes:
+    """Encode en octets UTF-8 (indentation de 2 espaces avec indent)"""
+    return _codec.dumps(obj, indent)
+
+
+def dumps(obj: Any, indent: bool = False) -> str:
+    """Encode en texte"""
+    return _codec.dumps(obj, indent).decode('utf-8')
+
+
+def load(f: BinaryIO) -> Any:
+    """Décode le contenu d'un fichier ouvert en binaire
+
+    Le ramasse-miettes est suspendu pendant le décodage: les centaines de
+    milliers de dictionnaires créés d'un coup déclencheraient sinon des
+    collectes répétées, qui coûtent plus cher que le décodage lui-même.
+    """
+    data = f.read()
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _codec.loads(data)
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def dump(obj: Any, f: BinaryIO, indent: bool = False):
+    """Écrit obj dans un fichier ouvert en binaire"""
+    f.write(_codec.dumps(obj, indent))
@@ -0,0 +1,230 @@
+"""
+Surveillance des serveurs connus
+Re-ping continu par file de priorité (fraîcheur et importance), backoff exponentiel et budget de sondes fixe
+"""
+
+import math
+import heapq
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+
+class ServerMonitor:
+    """Re-ping les serveurs du scanner sans rescanner les plages
+
+    Chaque serveur a une échéance dans un tas: la prochaine sonde part vers
+    le serveur dont l'échéance est la plus ancienne. Un serveur en ligne
+    revient après interval secondes, divisé par son importance (les
+    serveurs peuplés sont suivis de plus près); un serveur hors ligne
+    attend interval x 2^échecs, au plus max_backoff. Au plus probe_budget
+    sondes partent par seconde quel que soit le nombre de serveurs suivis:
+    avec 100k serveurs la file prend simplement du retard, en servant
+    toujours d'abord les informations les plus anciennes.
+    """
+
+    def __init__(self, scanner, interval: float = 30, probe_budget: float = 50, max_backoff: float = 6 * 3600,
+                 timeout: float = 3, max_workers: int = 20):
+        self.scanner = scanner
+        self.interval = interval
+        self.probe_budget = probe_budget
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self._heap = []       # (échéance, numéro, clé)
+        self._entries = {}    # (ip, port) -> [serveur, échecs, numéro de l'entrée valide]
+        self._counter = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._executor = None
+        self.probes = 0
+
+        scanner.add_callback('server_found', self.track)
+        scanner.add_callback('server_removed', self.untrack)
+
+    @classmethod
+    def from_config(cls, scanner, config) -> 'ServerMonitor':
+        """Crée un moniteur depuis display_settings.refresh_interval et la section monitoring"""
+        return cls(scanner, interval=config.get('display_settings.refresh_interval', 30),
+                   probe_budget=config.get('monitoring.probe_budget', 50),
+                   max_backoff=config.get('monitoring.max_backoff', 6 * 3600),
+                   timeout=config.get('monitoring.timeout', 3),
+                   max_workers=config.get('monitoring.max_workers', 20))
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def track(self, server, due: Optional[float] = None):
+        """Ajoute un serveur à surveiller (première sonde après interval, ou à due)"""
+        key = (server.ip, server.port)
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = [server, 0, None]
+            self._schedule(key, due if due is not None else time.time() + self._period(server, 0))
+        self._wakeup.set()
+
+    def track_all(self):
+        """Surveille tous les serveurs déjà connus du scanner, les moins récemment vus en premier"""
+        for server in list(self.scanner.servers):
+            self.track(server, due=server.last_seen + self.interval)
+
+    def untrack(self, server):
+        """Arrête la surveillance d'un serveur"""
+        with self._lock:
+            self._entries.pop((server.ip, server.port), None)
+
+    def clear(self):
+        """Oublie tous les serveurs suivis"""
+        with self._lock:
+            self._entries.clear()
+            self._heap.clear()
+
+    def refresh_now(self):
+        """Rend tous les serveurs dus immédiatement (toujours dans la limite du budget)"""
+        now = time.time()
+        with self._lock:
+            for key, entry in self._entries.items():
+                if entry[2] is None:
+                    continue  # Sonde déjà en cours
+                # Les moins récemment vus gardent la priorité
+                self._schedule(key, min(now, entry[0].last_seen))
+        self._wakeup.set()
+
+    def start(self):
+        """Démarre la surveillance en arrière-plan"""
+        if self.is_running:
+            return
+        self.track_all()
+        self._stop.clear()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Arrête la surveillance (les sondes en cours se terminent)"""
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def _period(self, server, failures: int) -> float:
+        """Délai avant la prochaine sonde d'un serveur"""
+        if failures:
+            return min(self.interval * (2 ** failures), self.max_backoff)
+        # Importance: un serveur avec 100 joueurs est sondé ~7 fois plus souvent qu'un serveur vide
+        return self.interval / (1 + math.log2(1 + max(server.players_online, 0)))
+
+    def _schedule(self, key: Tuple[str, int], due: float):
+        """Programme la prochaine sonde (verrou tenu); l'ancienne entrée du tas devient caduque"""
+        self._counter += 1
+        self._entries[key][2] = self._counter
+        heapq.heappush(self._heap, (due, self._counter, key))
+
+    def _next_due(self) -> Optional[Tuple[float, Tuple[str, int]]]:
+        """Prochaine entrée valide du tas (verrou tenu), en jetant les entrées caduques"""
+        while self._heap:
+            due, number, key = self._heap[0]
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] == number:
+                return due, key
+            heapq.heappop(self._heap)
+        return None
+
+    def _run(self):
+        """Boucle d'ordonnancement: seau à jetons de probe_budget sondes par seconde"""
+        tokens = 1.0
+        last = time.time()
+        while not self._stop.is_set():
+            now = time.time()
+            tokens = min(tokens + (now - last) * self.probe_budget, max(self.probe_budget, 1))
+            last = now
+
+            wait = 1.0
+            with self._lock:
+                while tokens >= 1 and self._in_flight < self.max_workers:
+                    head = self._next_due()
+                    if head is None:
+                        break
+                    due, key = head
+                    if due > now:
+                        wait = min(wait, due - now)
+                        break
+                    heapq.heappop(self._heap)
+                    self._entries[key][2] = None  # Sonde en cours: pas d'échéance
+                    self._in_flight += 1
+                    tokens -= 1
+                    self._executor.submit(self._probe, key)
+                else:
+                    if tokens < 1:
+                        wait = (1 - tokens) / self.probe_budget
+
+            self._wakeup.wait(wait)
+            self._wakeup.clear()
+
+    def _probe(self, key: Tuple[str, int]):
+        """Re-ping un serveur et met à jour l'objet en place"""
+        try:
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is None:
+                return
+            server = entry[0]
+            if getattr(server, 'edition', 'java') == 'bedrock':
+                fresh = self.scanner.ping_bedrock(server.ip, server.port, self.timeout)
+            else:
+                fresh = self.scanner.ping_server(server.ip, server.port, self.timeout, locate=False,
+                                                 check_whitelist=False)
+            self.probes += 1
+
+            with self._lock:
+                if fresh is not None:
+                    server.name = fresh.name
+                    server.description = fresh.description
+                    server.motd = fresh.motd
+                    server.version = fresh.version
+                    server.protocol = fresh.protocol
+                    server.players_online = fresh.players_online
+                    server.players_max = fresh.players_max
+                    server.players_list = fresh.players_list
+                    server.ping = fresh.ping
+                    server.favicon_hash = fresh.favicon_hash
+                    server.last_seen = time.time()
+                    server.online = True
+                    failures = 0
+                else:
+                    server.online = False
+                    failures = entry[1] + 1
+                if self._entries.get(key) is entry:
+                    entry[1] = failures
+                    self._schedule(key, time.time() + self._period(server, failures))
+
+            self.scanner._notify_updated(server)
+            # Le status ne donne qu'un échantillon de joueurs: recompléter par Query
+            if fresh is not None and self.scanner.query_enricher is not None \
+                    and getattr(server, 'edition', 'java') == 'java':
+                self.scanner.query_enricher.submit(server, self.scanner._on_queried)
+        except Exception as e:
+            print(f"Erreur de surveillance pour {key[0]}:{key[1]}: {e}")
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+            self._wakeup.set()
+
+    def stats(self) -> Dict:
+        """Serveurs suivis, en ligne, et sondes effectuées"""
+        with self._lock:
+            online = sum(1 for entry in self._entries.values() if entry[0].online)
+            return {'tracked': len(self._entries), 'online': online, 'probes': self.probes}
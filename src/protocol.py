@@ -0,0 +1,249 @@
+"""
+Encodage et lecture des packets du protocole Minecraft (Java Edition)
+Handshakes précalculés, tampon de réception réutilisable et décodage sans copie, protocole UDP commun
+"""
+
+import asyncio
+import socket
+import struct
+from typing import Callable, Iterable, Optional, Tuple
+
+# Limite de sécurité pour un packet (les réponses status avec favicon restent bien en dessous)
+MAX_PACKET_SIZE = 1024 * 1024
+
+# Taille au-delà de laquelle un tampon agrandi par une grosse réponse est libéré entre deux connexions
+MAX_IDLE_BUFFER_SIZE = 64 * 1024
+
+# Un VarInt de longueur de packet tient sur 5 octets au maximum
+MAX_VARINT_SIZE = 5
+
+# Version de protocole annoncée dans le handshake (759 = 1.19)
+PROTOCOL_VERSION = 759
+
+# États demandés par le handshake
+NEXT_STATE_STATUS = 1
+NEXT_STATE_LOGIN = 2
+
+# Packet status request (longueur 1, ID 0x00)
+STATUS_REQUEST = b'\x01\x00'
+
+
+class ProtocolError(Exception):
+    """Données reçues invalides (VarInt trop long, packet hors limites...)"""
+
+
+def decode_varint(view, pos: int = 0, end: int = None) -> Optional[Tuple[int, int]]:
+    """Décode un VarInt depuis un buffer; retourne (valeur, position suivante) ou None si incomplet"""
+    if end is None:
+        end = len(view)
+    result = 0
+    shift = 0
+    while pos < end:
+        byte = view[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not (byte & 0x80):
+            return result, pos
+        shift += 7
+        if shift >= 7 * MAX_VARINT_SIZE:
+            raise ProtocolError("VarInt trop long")
+    return None
+
+
+def _encode_varint(value: int, out: bytearray):
+    """Ajoute l'encodage VarInt de value à out"""
+    value &= 0xFFFFFFFF  # Les VarInt négatifs sont encodés en complément à deux sur 32 bits
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+# Encodages précalculés des petites valeurs (longueurs, IDs de packet, états)
+_SMALL_VARINTS = []
+for _value in range(1 << 14):
+    _encoded = bytearray()
+    _encode_varint(_value, _encoded)
+    _SMALL_VARINTS.append(bytes(_encoded))
+del _value, _encoded
+
+
+def pack_varint(value: int) -> bytes:
+    """Encode un entier en VarInt"""
+    if 0 <= value < len(_SMALL_VARINTS):
+        return _SMALL_VARINTS[value]
+    out = bytearray()
+    _encode_varint(value, out)
+    return bytes(out)
+
+
+def pack_varints(values: Iterable[int]) -> bytes:
+    """Encode une suite d'entiers en VarInt dans un seul buffer"""
+    out = bytearray()
+    for value in values:
+        if 0 <= value < len(_SMALL_VARINTS):
+            out += _SMALL_VARINTS[value]
+        else:
+            _encode_varint(value, out)
+    return bytes(out)
+
+
+def frame_packet(packet_data: bytes) -> bytes:
+    """Préfixe un packet par sa longueur"""
+    return pack_varint(len(packet_data)) + packet_data
+
+
+class HandshakeTemplates:
+    """Handshakes précalculés par (port, longueur d'adresse, état suivant)
+
+    Seuls les octets de l'adresse changent d'une cible à l'autre: le préfixe
+    (longueur, ID, protocole, longueur d'adresse) et le suffixe (port, état,
+    packet suivant éventuel) sont construits une seule fois.
+    """
+
+    def __init__(self, protocol_version: int = PROTOCOL_VERSION):
+        self.protocol_version = protocol_version
+        self._templates = {}
+
+    def build(self, address: bytes, port: int, next_state: int, trailer: bytes = b'') -> bytes:
+        """Handshake pour address:port, suivi de trailer (ex: STATUS_REQUEST) dans le même buffer"""
+        key = (port, len(address), next_state, trailer)
+        template = self._templates.get(key)
+        if template is None:
+            template = self._templates[key] = self._compile(port, len(address), next_state, trailer)
+        prefix, suffix = template
+        return prefix + address + suffix
+
+    def status_request(self, address: bytes, port: int) -> bytes:
+        """Handshake (état status) + status request, à envoyer en une seule écriture"""
+        return self.build(address, port, NEXT_STATE_STATUS, STATUS_REQUEST)
+
+    def _compile(self, port: int, address_length: int, next_state: int, trailer: bytes) -> Tuple[bytes, bytes]:
+        # Packet ID 0x00 + protocole + longueur d'adresse | adresse | port + état suivant
+        head = b'\x00' + pack_varints((self.protocol_version, address_length))
+        tail = struct.pack('>H', port) + pack_varint(next_state)
+        length = len(head) + address_length + len(tail)
+        return pack_varint(length) + head, tail + trailer
+
+
+class PacketReader:
+    """Découpe un flux TCP en packets Minecraft avec un tampon réutilisable
+
+    Le tampon est alimenté soit par sock.recv_into (read_frame), soit par un
+    asyncio.BufferedProtocol (get_buffer / buffer_updated). Les frames
+    retournées sont des memoryview sur le tampon: elles restent valides
+    jusqu'au prochain remplissage. Un tampon agrandi au-delà de
+    max_idle_size par une grosse réponse repart à initial_size au reset():
+    des centaines de lecteurs réutilisés ne gardent pas chacun le plus
+    gros packet qu'ils ont vu.
+    """
+
+    def __init__(self, initial_size: int = 4096, max_packet_size: int = MAX_PACKET_SIZE,
+                 max_idle_size: int = MAX_IDLE_BUFFER_SIZE):
+        self.max_packet_size = max_packet_size
+        self.initial_size = initial_size
+        self.max_idle_size = max(max_idle_size, initial_size)
+        self._buffer = bytearray(initial_size)
+        self._view = memoryview(self._buffer)
+        self._start = 0  # Début des données non consommées
+        self._end = 0    # Fin des données reçues
+
+    def reset(self):
+        """Oublie les données en attente (réutilisation pour une nouvelle connexion)"""
+        self._start = 0
+        self._end = 0
+        if len(self._buffer) > self.max_idle_size:
+            # Nouveau bytearray: les memoryview encore tenues sur l'ancien restent valides
+            self._buffer = bytearray(self.initial_size)
+            self._view = memoryview(self._buffer)
+
+    def get_buffer(self, sizehint: int = -1) -> memoryview:
+        """Zone libre où écrire les prochains octets reçus"""
+        if self._end == len(self._buffer):
+            self._make_room(max(sizehint, len(self._buffer)))
+        return self._view[self._end:]
+
+    def buffer_updated(self, nbytes: int):
+        """Signale que nbytes ont été écrits dans la zone retournée par get_buffer"""
+        self._end += nbytes
+
+    def next_frame(self) -> Optional[memoryview]:
+        """Retourne le prochain packet complet (sans son préfixe de longueur) ou None"""
+        header = decode_varint(self._view, self._start, self._end)
+        if header is None:
+            return None
+
+        length, payload_start = header
+        if length <= 0 or length > self.max_packet_size:  # Limite de sécurité
+            raise ProtocolError(f"Taille de packet invalide: {length}")
+
+        payload_end = payload_start + length
+        if payload_end > self._end:
+            # Packet incomplet: s'assurer que le tampon pourra le contenir en entier
+            if payload_end - self._start > len(self._buffer):
+                self._make_room(payload_end - self._start)
+            return None
+
+        self._start = payload_end
+        return self._view[payload_start:payload_end]
+
+    def read_frame(self, sock: socket.socket) -> memoryview:
+        """Lit un packet complet depuis un socket bloquant"""
+        while True:
+            frame = self.next_frame()
+            if frame is not None:
+                return frame
+            nbytes = sock.recv_into(self.get_buffer())
+            if not nbytes:
+                raise ConnectionError("Connexion fermée")
+            self.buffer_updated(nbytes)
+
+    def _make_room(self, needed: int):
+        """Compacte le tampon, et l'agrandit si needed octets ne tiennent pas"""
+        pending = self._end - self._start
+        size = len(self._buffer)
+        if needed > size:
+            while size < needed:
+                size *= 2
+            # Nouveau bytearray: les memoryview déjà retournées restent valides
+            buffer = bytearray(size)
+            buffer[:pending] = self._view[self._start:self._end]
+            self._buffer = buffer
+            self._view = memoryview(buffer)
+        elif self._start:
+            self._view[:pending] = self._view[self._start:self._end]
+        self._start = 0
+        self._end = pending
+
+
+def status_payload(frame: memoryview) -> Optional[memoryview]:
+    """Extrait la chaîne JSON d'un packet 0x00 (status response ou disconnect), sans copie"""
+    if not len(frame) or frame[0] != 0x00:
+        return None
+
+    header = decode_varint(frame, 1)
+    if header is None:
+        return None
+
+    json_length, json_start = header
+    if json_start >= len(frame):
+        return None
+
+    return frame[json_start:json_start + json_length]
+
+
+class DatagramForwarder(asyncio.DatagramProtocol):
+    """Protocole UDP qui transmet chaque datagramme reçu à on_datagram(data, addr)
+
+    Partagé par les clients UDP (DNS, Query, ping Bedrock): chacun envoie
+    depuis un seul socket et rapproche lui-même réponses et requêtes.
+    """
+
+    def __init__(self, on_datagram: Callable[[bytes, Tuple], None]):
+        self.on_datagram = on_datagram
+
+    def datagram_received(self, data: bytes, addr):
+        self.on_datagram(data, addr)
+
+    def error_received(self, exc):
+        pass  # ICMP port unreachable: la requête en attente expirera normalement
@@ -0,0 +1,252 @@
+"""
+Protocole Query (GameSpy4, UDP) des serveurs Java
+Enrichissement optionnel: liste complète des joueurs, plugins et carte, toutes les sessions sur un seul socket
+"""
+
+import asyncio
+import socket
+import struct
+import threading
+import time
+from concurrent.futures import wait
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    from .protocol import ProtocolError, DatagramForwarder
+except ImportError:
+    from protocol import ProtocolError, DatagramForwarder
+
+QUERY_MAGIC = b'\xfe\xfd'
+
+TYPE_HANDSHAKE = 0x09
+TYPE_STAT = 0x00
+
+# Bourrage fixe avant les paires clé/valeur et avant la liste des joueurs (full stat)
+KV_PADDING = b'splitnum\x00\x80\x00'
+PLAYERS_MARKER = b'\x01player_\x00\x00'
+
+# Un challenge token reste valide 30 s côté serveur: on le réutilise un peu moins longtemps
+TOKEN_TTL = 25
+
+_UINT32 = struct.Struct('>I')
+
+
+def session_id(number: int) -> int:
+    """Identifiant de session numéro number (seuls les 4 bits bas de chaque octet sont significatifs)"""
+    return ((number & 0xF000) << 12) | ((number & 0x0F00) << 8) | ((number & 0x00F0) << 4) | (number & 0x000F)
+
+
+def build_handshake(session: int) -> bytes:
+    return QUERY_MAGIC + bytes((TYPE_HANDSHAKE,)) + _UINT32.pack(session)
+
+
+def build_full_stat(session: int, token: int) -> bytes:
+    # Les 4 octets de bourrage distinguent le full stat du basic stat
+    return QUERY_MAGIC + bytes((TYPE_STAT,)) + _UINT32.pack(session) + _UINT32.pack(token) + b'\x00\x00\x00\x00'
+
+
+def parse_header(data: bytes) -> Tuple[int, int]:
+    """(type, session) d'une réponse"""
+    if len(data) < 5:
+        raise ProtocolError("Réponse Query trop courte")
+    return data[0], _UINT32.unpack_from(data, 1)[0]
+
+
+def parse_handshake(data: bytes) -> int:
+    """Challenge token d'une réponse de handshake (nombre décimal terminé par un octet nul)"""
+    try:
+        token = int(data[5:].split(b'\x00', 1)[0])
+    except ValueError:
+        raise ProtocolError("Challenge token invalide")
+    return token & 0xFFFFFFFF
+
+
+def parse_full_stat(data: bytes) -> Tuple[Dict[str, str], List[str]]:
+    """Décode une réponse full stat: (paires clé/valeur, joueurs)"""
+    start = 5 + len(KV_PADDING)
+    marker = data.find(PLAYERS_MARKER, start)
+    if data[5:start] != KV_PADDING or marker < 0:
+        raise ProtocolError("Réponse full stat invalide")
+
+    items = data[start:marker].decode('utf-8', 'replace').split('\x00')
+    info = {}
+    for i in range(0, len(items) - 1, 2):
+        if not items[i]:
+            break  # Clé vide: fin de la section
+        info[items[i]] = items[i + 1]
+
+    players = [name for name in data[marker + len(PLAYERS_MARKER):].decode('utf-8', 'replace').split('\x00') if name]
+    return info, players
+
+
+def parse_plugins(value: str) -> Tuple[str, List[str]]:
+    """Sépare "Paper on 1.20.4: WorldEdit 7.2; Essentials 2.20" en (logiciel, plugins)"""
+    software, _, plugins = value.partition(':')
+    return software.strip(), [plugin.strip() for plugin in plugins.split(';') if plugin.strip()]
+
+
+class QueryClient:
+    """Client Query asynchrone: les échanges de tous les serveurs passent par un socket UDP
+
+    Chaque échange est identifié par (adresse, port, session): des milliers
+    de handshakes et de full stats peuvent être en vol en même temps. Les
+    challenge tokens sont gardés TOKEN_TTL secondes, si bien qu'une
+    nouvelle interrogation du même serveur ne coûte qu'un aller-retour.
+    """
+
+    def __init__(self, timeout: float = 2, retries: int = 1, concurrency: int = 1000):
+        self.timeout = timeout
+        self.retries = retries
+        self.concurrency = max(1, concurrency)
+        self.transport = None
+        self._waiters = {}    # (ip, port, session) -> Future de la réponse
+        self._tokens = {}     # (ip, port) -> (horodatage, token)
+        self._counter = 0
+        self._semaphore = None
+
+    async def open(self):
+        loop = asyncio.get_running_loop()
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self.transport, _ = await loop.create_datagram_endpoint(lambda: DatagramForwarder(self.on_datagram),
+                                                                family=socket.AF_INET, local_addr=('0.0.0.0', 0))
+        try:
+            self.transport.get_extra_info('socket').setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+        except OSError:
+            pass
+
+    def close(self):
+        if self.transport is not None:
+            self.transport.close()
+            self.transport = None
+
+    async def query(self, ip: str, port: int) -> Optional[Dict]:
+        """Full stat d'un serveur: {'info': {...}, 'players': [...]}, ou None sans réponse"""
+        async with self._semaphore:
+            try:
+                address = await self._resolve(ip, port)
+            except OSError:
+                return None
+            for _ in range(self.retries + 1):
+                try:
+                    token = await self._token(address)
+                    if token is None:
+                        continue
+                    data = await self._exchange(address, lambda session: build_full_stat(session, token))
+                    if data is None:
+                        # Token peut-être expiré (redémarrage du serveur): refaire le handshake
+                        self._tokens.pop(address, None)
+                        continue
+                    info, players = parse_full_stat(data)
+                    return {'info': info, 'players': players}
+                except ProtocolError:
+                    return None
+            return None
+
+    async def _resolve(self, ip: str, port: int) -> Tuple[str, int]:
+        """Les réponses arrivent de l'adresse IP: un nom d'hôte est résolu d'abord"""
+        try:
+            socket.inet_aton(ip)
+            return ip, port
+        except OSError:
+            infos = await asyncio.get_running_loop().getaddrinfo(ip, port, family=socket.AF_INET,
+                                                                 type=socket.SOCK_DGRAM)
+            return infos[0][4][0], port
+
+    async def _token(self, address: Tuple[str, int]) -> Optional[int]:
+        cached = self._tokens.get(address)
+        if cached is not None and time.monotonic() - cached[0] < TOKEN_TTL:
+            return cached[1]
+        data = await self._exchange(address, build_handshake)
+        if data is None:
+            return None
+        token = parse_handshake(data)
+        self._tokens[address] = (time.monotonic(), token)
+        return token
+
+    async def _exchange(self, address: Tuple[str, int], build: Callable[[int], bytes]) -> Optional[bytes]:
+        """Envoie un packet avec une session libre et attend la réponse correspondante"""
+        self._counter = (self._counter + 1) & 0xFFFF
+        key = (address[0], address[1], session_id(self._counter))
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[key] = future
+        try:
+            self.transport.sendto(build(key[2]), address)
+            return await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            self._waiters.pop(key, None)
+
+    def on_datagram(self, data: bytes, addr: Tuple[str, int]):
+        """Réponse reçue: transmise à l'échange en attente, ignorée sinon"""
+        try:
+            _, session = parse_header(data)
+        except ProtocolError:
+            return
+        future = self._waiters.get((addr[0], addr[1], session))
+        if future is not None and not future.done():
+            future.set_result(data)
+
+
+def apply_query(server, result: Dict):
+    """Recopie un full stat dans un MinecraftServer (joueurs, plugins, carte)"""
+    info = result['info']
+    server.players_list = result['players']
+    server.map = info.get('map', '')
+    server.plugins = parse_plugins(info.get('plugins', ''))[1]
+
+
+class QueryEnricher:
+    """Interroge en Query les serveurs trouvés, dans son propre thread, sans bloquer le scan
+
+    Un seul socket UDP et une boucle asyncio servent tous les serveurs
+    soumis; au plus concurrency échanges sont en vol. Les serveurs qui
+    n'activent pas enable-query expirent simplement après timeout.
+    """
+
+    def __init__(self, timeout: float = 2, retries: int = 1, concurrency: int = 1000, port: Optional[int] = None):
+        self.port = port  # Port Query s'il diffère du port de jeu (query.port)
+        self.client = QueryClient(timeout=timeout, retries=retries, concurrency=concurrency)
+        self.answered = 0
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self.client.open(), self._loop).result()
+
+    def submit(self, server, on_queried: Callable):
+        """Planifie l'interrogation; on_queried(server) n'est appelé que si le serveur a répondu"""
+        future = asyncio.run_coroutine_threadsafe(self._run(server, on_queried), self._loop)
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(self._discard)
+
+    def _discard(self, future):
+        with self._lock:
+            self._pending.discard(future)
+
+    async def _run(self, server, on_queried: Callable):
+        result = await self.client.query(server.ip, self.port or server.port)
+        if result is None:
+            return
+        apply_query(server, result)
+        self.answered += 1
+        try:
+            on_queried(server)
+        except Exception as e:
+            print(f"Erreur après interrogation Query: {e}")
+
+    def flush(self):
+        """Attend la fin des interrogations en cours"""
+        with self._lock:
+            pending = list(self._pending)
+        wait(pending)
+
+    def close(self):
+        """Arrête la boucle après les interrogations en cours"""
+        self.flush()
+        self._loop.call_soon_threadsafe(self.client.close)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
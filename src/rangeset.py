@@ -0,0 +1,122 @@
+"""
+Ensembles de plages IPv4
+Union, intersection, différence et normalisation en CIDR minimaux sur des intervalles d'entiers
+"""
+
+import bisect
+import ipaddress
+from typing import Iterable, List, Tuple, Union
+
+try:
+    from .targets import int_to_ip, merge_intervals, subtract_intervals, host_interval
+except ImportError:
+    from targets import int_to_ip, merge_intervals, subtract_intervals, host_interval
+
+
+class RangeSet:
+    """Ensemble d'adresses IPv4 stocké en intervalles [début, fin] disjoints et triés
+
+    RangeSet(["81.2.69.0/24", "81.2.0.0/16"]) ne contient qu'une fois les
+    adresses communes; to_cidrs() le réécrit avec le moins de plages CIDR
+    possible. Les opérations retournent de nouveaux ensembles.
+    """
+
+    def __init__(self, ranges: Iterable[Union[str, ipaddress.IPv4Network]] = ()):
+        intervals = []
+        for ip_range in ranges:
+            network = ipaddress.ip_network(ip_range, strict=False)
+            if network.version != 4:
+                raise ValueError(f"Seules les plages IPv4 sont supportées: {ip_range}")
+            intervals.append((int(network.network_address), int(network.broadcast_address)))
+        self.intervals: List[Tuple[int, int]] = merge_intervals(intervals)
+
+    @classmethod
+    def from_intervals(cls, intervals: Iterable[Tuple[int, int]]) -> 'RangeSet':
+        """Ensemble construit depuis des intervalles d'entiers (quelconques)"""
+        range_set = cls()
+        range_set.intervals = merge_intervals(intervals)
+        return range_set
+
+    @classmethod
+    def hosts(cls, ranges: Iterable[str]) -> 'RangeSet':
+        """Adresses scannées pour ces plages (sans adresse réseau ni broadcast, comme network.hosts())"""
+        return cls.from_intervals(host_interval(ipaddress.ip_network(ip_range, strict=False)) for ip_range in ranges)
+
+    def __or__(self, other: 'RangeSet') -> 'RangeSet':
+        return RangeSet.from_intervals(self.intervals + other.intervals)
+
+    def __and__(self, other: 'RangeSet') -> 'RangeSet':
+        result = []
+        i = j = 0
+        while i < len(self.intervals) and j < len(other.intervals):
+            start = max(self.intervals[i][0], other.intervals[j][0])
+            end = min(self.intervals[i][1], other.intervals[j][1])
+            if start <= end:
+                result.append((start, end))
+            # Avancer l'intervalle qui se termine en premier
+            if self.intervals[i][1] < other.intervals[j][1]:
+                i += 1
+            else:
+                j += 1
+        range_set = RangeSet()
+        range_set.intervals = result
+        return range_set
+
+    def __sub__(self, other: 'RangeSet') -> 'RangeSet':
+        range_set = RangeSet()
+        range_set.intervals = subtract_intervals(self.intervals, other.intervals)
+        return range_set
+
+    union = __or__
+    intersection = __and__
+    difference = __sub__
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, RangeSet) and self.intervals == other.intervals
+
+    def __bool__(self) -> bool:
+        return bool(self.intervals)
+
+    def __contains__(self, ip: Union[str, int]) -> bool:
+        if isinstance(ip, str):
+            ip = int(ipaddress.IPv4Address(ip))
+        position = bisect.bisect_right(self.intervals, (ip, 1 << 32)) - 1
+        return position >= 0 and ip <= self.intervals[position][1]
+
+    def __len__(self) -> int:
+        return self.address_count
+
+    @property
+    def address_count(self) -> int:
+        """Nombre d'adresses de l'ensemble"""
+        return sum(end - start + 1 for start, end in self.intervals)
+
+    def to_cidrs(self) -> List[str]:
+        """Plus petite liste de plages CIDR couvrant exactement l'ensemble"""
+        cidrs = []
+        for start, end in self.intervals:
+            while start <= end:
+                # Plus grand bloc aligné sur start qui ne dépasse pas end
+                size = start & -start if start else 1 << 32
+                while size > end - start + 1:
+                    size >>= 1
+                cidrs.append(f"{int_to_ip(start)}/{33 - size.bit_length()}")
+                start += size
+        return cidrs
+
+    def __repr__(self) -> str:
+        return f"RangeSet({self.to_cidrs()!r})"
+
+
+def dedupe_ranges(ip_ranges: List[str]) -> Tuple[List[str], int]:
+    """Plages sans doublons exacts et nombre d'adresses d'hôtes communes à plusieurs plages
+
+    Les plages elles-mêmes ne sont pas réécrites: fusionner deux /24
+    voisins en /23 ajouterait leurs adresses réseau et broadcast aux
+    cibles. TargetGenerator fusionne déjà les intervalles d'hôtes: chaque
+    adresse commune n'y est sondée qu'une fois.
+    """
+    unique = list(dict.fromkeys(ip_ranges))
+    requested = sum(end - start + 1 for start, end in
+                    (host_interval(ipaddress.ip_network(ip_range, strict=False)) for ip_range in ip_ranges))
+    return unique, requested - RangeSet.hosts(unique).address_count
@@ -0,0 +1,414 @@
+"""
+Résolution DNS des listes de noms d'hôte
+Client DNS asynchrone (A et SRV _minecraft._tcp) sur un seul socket UDP, avec cache respectant les TTL
+"""
+
+import asyncio
+import ipaddress
+import random
+import socket
+import struct
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    from .protocol import ProtocolError, DatagramForwarder
+except ImportError:
+    from protocol import ProtocolError, DatagramForwarder
+
+DEFAULT_PORT = 25565
+DNS_PORT = 53
+
+# Enregistrement consulté par le client Minecraft quand aucun port n'est donné
+SRV_PREFIX = '_minecraft._tcp.'
+
+TYPE_A = 1
+TYPE_CNAME = 5
+TYPE_SRV = 33
+CLASS_IN = 1
+
+RCODE_OK = 0
+RCODE_NXDOMAIN = 3
+
+# Nombre maximal de CNAME suivis (et de pointeurs de compression par nom)
+MAX_CNAME_DEPTH = 8
+MAX_POINTERS = 64
+
+_HEADER = struct.Struct('>HHHHHH')
+_RECORD = struct.Struct('>HHIH')
+_SRV = struct.Struct('>HHH')
+
+Endpoint = Tuple[str, int]
+
+
+def is_ip_address(host: str) -> bool:
+    """Vrai pour une adresse IPv4 littérale (pas de résolution nécessaire)"""
+    try:
+        ipaddress.IPv4Address(host)
+        return True
+    except ValueError:
+        return False
+
+
+def parse_host_entry(entry: str) -> Tuple[str, Optional[int]]:
+    """Sépare "hôte:port" en (hôte, port); port vaut None s'il n'est pas précisé"""
+    host, sep, port = entry.strip().rpartition(':')
+    if sep and port.isdigit():
+        return host.lower(), int(port)
+    return entry.strip().lower(), None
+
+
+def load_host_file(path: str) -> List[str]:
+    """Lit une liste de noms d'hôte (un par ligne, "hôte" ou "hôte:port", # pour les commentaires)"""
+    hosts = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if line:
+                hosts.append(line)
+    return hosts
+
+
+def system_nameservers(path: str = '/etc/resolv.conf') -> List[Endpoint]:
+    """Serveurs DNS IPv4 du système (vide si resolv.conf est absent, ex: Windows)"""
+    nameservers = []
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0] == 'nameserver' and is_ip_address(parts[1]):
+                    nameservers.append((parts[1], DNS_PORT))
+    except OSError:
+        pass
+    return nameservers
+
+
+def parse_nameserver(entry: str) -> Endpoint:
+    """ "1.1.1.1" ou "127.0.0.1:5353" -> (adresse, port)"""
+    host, port = parse_host_entry(entry)
+    return host, port or DNS_PORT
+
+
+def encode_name(name: str) -> bytes:
+    out = bytearray()
+    for label in name.rstrip('.').split('.'):
+        encoded = label.encode('idna') if label else b''
+        if not encoded or len(encoded) > 63:
+            raise ValueError(f"Nom de domaine invalide: {name}")
+        out.append(len(encoded))
+        out += encoded
+    out.append(0)
+    return bytes(out)
+
+
+def build_query(query_id: int, name: str, qtype: int) -> bytes:
+    """Requête récursive (RD) pour un seul nom"""
+    return _HEADER.pack(query_id, 0x0100, 1, 0, 0, 0) + encode_name(name) + struct.pack('>HH', qtype, CLASS_IN)
+
+
+def read_name(data: bytes, pos: int) -> Tuple[str, int]:
+    """Lit un nom (avec pointeurs de compression); retourne (nom, position après le nom)"""
+    labels = []
+    end = None
+    for _ in range(MAX_POINTERS):
+        if pos >= len(data):
+            raise ProtocolError("Nom DNS tronqué")
+        length = data[pos]
+        if length & 0xC0 == 0xC0:
+            if pos + 1 >= len(data):
+                raise ProtocolError("Pointeur DNS tronqué")
+            if end is None:
+                end = pos + 2
+            pos = ((length & 0x3F) << 8) | data[pos + 1]
+            continue
+        if length == 0:
+            return '.'.join(labels).lower(), end if end is not None else pos + 1
+        labels.append(data[pos + 1:pos + 1 + length].decode('ascii', 'replace'))
+        pos += 1 + length
+    raise ProtocolError("Trop de pointeurs de compression DNS")
+
+
+def parse_response(data: bytes) -> Tuple[int, int, str, List[Tuple[str, int, int, object]]]:
+    """Décode une réponse: (id, rcode, nom demandé, [(nom, type, ttl, valeur)])
+
+    La valeur est l'adresse pour A, le nom canonique pour CNAME et
+    (priorité, poids, port, cible) pour SRV; les autres types sont ignorés.
+    """
+    if len(data) < _HEADER.size:
+        raise ProtocolError("Réponse DNS trop courte")
+    query_id, flags, questions, answers, _, _ = _HEADER.unpack_from(data)
+    pos = _HEADER.size
+    question = ''
+    for i in range(questions):
+        name, pos = read_name(data, pos)
+        if i == 0:
+            question = name
+        pos += 4
+
+    records = []
+    try:
+        for _ in range(answers):
+            name, pos = read_name(data, pos)
+            rtype, _, ttl, length = _RECORD.unpack_from(data, pos)
+            pos += _RECORD.size
+            rdata = pos
+            pos += length
+            if rtype == TYPE_A and length == 4:
+                records.append((name, rtype, ttl, socket.inet_ntoa(data[rdata:rdata + 4])))
+            elif rtype == TYPE_CNAME:
+                records.append((name, rtype, ttl, read_name(data, rdata)[0]))
+            elif rtype == TYPE_SRV and length >= _SRV.size + 1:
+                priority, weight, port = _SRV.unpack_from(data, rdata)
+                records.append((name, rtype, ttl, (priority, weight, port, read_name(data, rdata + _SRV.size)[0])))
+    except struct.error:
+        raise ProtocolError("Enregistrement DNS tronqué")
+    return query_id, flags & 0x000F, question, records
+
+
+class DNSCache:
+    """Réponses DNS gardées le temps de leur TTL (borné par min_ttl et max_ttl)
+
+    Les réponses négatives (nom inexistant, aucun enregistrement) sont
+    gardées negative_ttl secondes; les échecs (délai dépassé) ne le sont pas.
+    """
+
+    def __init__(self, min_ttl: float = 30, max_ttl: float = 86400, negative_ttl: float = 300):
+        self.min_ttl = min_ttl
+        self.max_ttl = max_ttl
+        self.negative_ttl = negative_ttl
+        self._entries = {}  # (nom, type) -> (expiration, valeurs)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, name: str, qtype: int) -> Optional[List]:
+        with self._lock:
+            entry = self._entries.get((name, qtype))
+            if entry is None or entry[0] < time.monotonic():
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[1]
+
+    def put(self, name: str, qtype: int, values: List, ttl: Optional[float]):
+        ttl = self.negative_ttl if not values or ttl is None else min(max(ttl, self.min_ttl), self.max_ttl)
+        with self._lock:
+            self._entries[(name, qtype)] = (time.monotonic() + ttl, values)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class DNSResolver:
+    """Résout des noms d'hôte comme le client Minecraft, en masse et sans bloquer
+
+    Pour un nom sans port, l'enregistrement SRV _minecraft._tcp.nom est
+    consulté d'abord (cible et port), puis l'enregistrement A. Toutes les
+    requêtes partent d'un seul socket UDP vers nameservers (ceux du système
+    par défaut), au plus concurrency à la fois, depuis une boucle asyncio
+    dans un thread dédié démarré à la première résolution: resolve() et
+    resolve_many() s'appellent depuis n'importe quel thread. Sans serveur
+    DNS connu, les adresses sont demandées à getaddrinfo (sans SRV).
+    """
+
+    def __init__(self, nameservers: Optional[Iterable[str]] = None, timeout: float = 2, retries: int = 2,
+                 concurrency: int = 500, min_ttl: float = 30, max_ttl: float = 86400, negative_ttl: float = 300):
+        self.nameservers = [parse_nameserver(entry) for entry in nameservers] if nameservers \
+            else system_nameservers()
+        self.timeout = timeout
+        self.retries = retries
+        self.concurrency = max(1, concurrency)
+        self.cache = DNSCache(min_ttl, max_ttl, negative_ttl)
+        self.queries = 0
+        self.transport = None
+        self._waiters = {}  # id -> (Future, nom, type)
+        self._semaphore = None
+        self._loop = None
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config) -> 'DNSResolver':
+        """Crée un résolveur depuis la section dns"""
+        return cls(nameservers=config.get('dns.nameservers') or None, timeout=config.get('dns.timeout', 2),
+                   retries=config.get('dns.retries', 2), concurrency=config.get('dns.concurrency', 500),
+                   min_ttl=config.get('dns.min_ttl', 30), max_ttl=config.get('dns.max_ttl', 86400),
+                   negative_ttl=config.get('dns.negative_ttl', 300))
+
+    def resolve(self, host: str, port: Optional[int] = None) -> Optional[Endpoint]:
+        """Point d'accès (ip, port) d'un nom d'hôte, ou None s'il ne se résout pas"""
+        if is_ip_address(host):
+            return host, port or DEFAULT_PORT
+        return self._run(self._resolve(host.lower(), port))
+
+    def resolve_many(self, entries: Iterable[str]) -> Tuple[Dict[Endpoint, List[str]], List[str]]:
+        """Résout des entrées "hôte" / "hôte:port" en parallèle
+
+        Retourne ({(ip, port): [entrées]}, entrées non résolues): plusieurs
+        noms qui mènent au même point d'accès n'y figurent qu'une fois.
+        """
+        entries = list(dict.fromkeys(entry.strip() for entry in entries if entry.strip()))
+        results = self._run(self._resolve_all(entries))
+        endpoints = {}
+        unresolved = []
+        for entry, endpoint in zip(entries, results):
+            if endpoint is None:
+                unresolved.append(entry)
+            else:
+                endpoints.setdefault(endpoint, []).append(entry)
+        return endpoints, unresolved
+
+    def close(self):
+        """Arrête la boucle de résolution (le cache est conservé)"""
+        with self._start_lock:
+            if self._loop is None:
+                return
+            self._loop.call_soon_threadsafe(self._close_transport)
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
+            self._loop = self._thread = None
+
+    def _close_transport(self):
+        if self.transport is not None:
+            self.transport.close()
+            self.transport = None
+
+    def _run(self, coroutine):
+        """Exécute une coroutine dans la boucle du résolveur et attend son résultat"""
+        with self._start_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+                self._thread.start()
+                if self.nameservers:
+                    asyncio.run_coroutine_threadsafe(self._open(), self._loop).result()
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    async def _resolve_all(self, entries: List[str]) -> List[Optional[Endpoint]]:
+        async def resolve_entry(entry):
+            host, port = parse_host_entry(entry)
+            if is_ip_address(host):
+                return host, port or DEFAULT_PORT
+            return await self._resolve(host, port)
+        results = await asyncio.gather(*(resolve_entry(entry) for entry in entries), return_exceptions=True)
+        # Une entrée en erreur est non résolue, sans interrompre les autres
+        return [None if isinstance(result, Exception) else result for result in results]
+
+    async def _resolve(self, host: str, port: Optional[int]) -> Optional[Endpoint]:
+        if port is None:
+            for priority, weight, srv_port, target in await self._srv(SRV_PREFIX + host):
+                address = target if is_ip_address(target) else await self._address(target)
+                if address is not None:
+                    return address, srv_port
+            port = DEFAULT_PORT
+        address = await self._address(host)
+        return (address, port) if address is not None else None
+
+    async def _srv(self, name: str) -> List[Tuple[int, int, int, str]]:
+        """Enregistrements SRV triés par priorité croissante puis poids décroissant"""
+        if not self.nameservers:
+            return []
+        records = await self._lookup(name, TYPE_SRV)
+        return sorted((record for record in records if record[3] not in ('', '.')),
+                      key=lambda record: (record[0], -record[1]))
+
+    async def _address(self, host: str) -> Optional[str]:
+        """Première adresse IPv4 d'un nom (en suivant les CNAME)"""
+        if not self.nameservers:
+            return await self._getaddrinfo(host)
+        for _ in range(MAX_CNAME_DEPTH):
+            records = await self._lookup(host, TYPE_A)
+            addresses = [value for rtype, value in records if rtype == TYPE_A]
+            if addresses:
+                return addresses[0]
+            aliases = [value for rtype, value in records if rtype == TYPE_CNAME]
+            if not aliases:
+                return None
+            host = aliases[-1]  # Le serveur récursif n'a pas suivi la chaîne: la suivre ici
+        return None
+
+    async def _getaddrinfo(self, host: str) -> Optional[str]:
+        cached = self.cache.get(host, TYPE_A)
+        if cached is not None:
+            return cached[0][1] if cached else None
+        try:
+            infos = await asyncio.get_running_loop().getaddrinfo(host, None, family=socket.AF_INET,
+                                                                 type=socket.SOCK_STREAM)
+        except (OSError, ValueError):  # ValueError (UnicodeError): nom mal formé
+            infos = []
+        values = [(TYPE_A, info[4][0]) for info in infos[:1]]
+        self.cache.put(host, TYPE_A, values, None if not values else self.cache.min_ttl)
+        return values[0][1] if values else None
+
+    async def _lookup(self, name: str, qtype: int) -> List:
+        """Valeurs des enregistrements de réponse (cache d'abord)
+
+        Pour A, retourne des paires (type, valeur) afin de distinguer adresses et CNAME.
+        """
+        cached = self.cache.get(name, qtype)
+        if cached is not None:
+            return cached
+        try:
+            encode_name(name)
+        except ValueError:  # Label vide ou trop long, IDNA invalide: réponse négative sans requête
+            self.cache.put(name, qtype, [], None)
+            return []
+
+        async with self._semaphore:
+            for attempt in range(self.retries + 1):
+                nameserver = self.nameservers[attempt % len(self.nameservers)]
+                response = await self._exchange(name, qtype, nameserver)
+                if response is None:
+                    continue
+                rcode, records = response
+                if rcode not in (RCODE_OK, RCODE_NXDOMAIN):
+                    continue  # SERVFAIL, REFUSED...: essayer le serveur suivant
+                if qtype == TYPE_A:
+                    values = [(rtype, value) for _, rtype, _, value in records if rtype in (TYPE_A, TYPE_CNAME)]
+                else:
+                    values = [value for _, rtype, _, value in records if rtype == qtype]
+                ttl = min((record[2] for record in records), default=None)
+                self.cache.put(name, qtype, values, ttl)
+                return values
+        return []
+
+    async def _open(self):
+        loop = asyncio.get_running_loop()
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self.transport, _ = await loop.create_datagram_endpoint(lambda: DatagramForwarder(self.on_datagram),
+                                                                family=socket.AF_INET, local_addr=('0.0.0.0', 0))
+
+    async def _exchange(self, name: str, qtype: int, nameserver: Endpoint):
+        """Envoie une requête et attend la réponse portant le même identifiant"""
+        query_id = random.getrandbits(16)
+        while query_id in self._waiters:
+            query_id = random.getrandbits(16)
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[query_id] = (future, name, nameserver)
+        try:
+            self.queries += 1
+            self.transport.sendto(build_query(query_id, name, qtype), nameserver)
+            return await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            self._waiters.pop(query_id, None)
+
+    def on_datagram(self, data: bytes, addr: Endpoint):
+        """Réponse reçue: acceptée si l'identifiant, la question et le serveur correspondent"""
+        try:
+            query_id, rcode, question, records = parse_response(data)
+        except ProtocolError:
+            return
+        waiter = self._waiters.get(query_id)
+        if waiter is None:
+            return
+        future, name, nameserver = waiter
+        if question == name and (addr[0], addr[1]) == nameserver and not future.done():
+            future.set_result((rcode, records))
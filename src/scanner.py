@@ -4,63 +4,396 @@ Module principal pour la découverte et l'analyse des serveurs
 """
 
 import socket
+import sys
 import threading
 import time
-import ipaddress
-import json
-import base64
-import struct
-from typing import List, Dict, Optional, Callable, Tuple
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import requests
+from typing import List, Dict, Optional, Callable, Tuple, Iterator, Union
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+try:
+    from .async_engine import AsyncStatusEngine, TwoPhaseEngine
+    from .geoip import GeoLocator, GeoBatcher
+    from .whitelist import WhitelistChecker
+    from .query import QueryEnricher
+    from .resolver import DNSResolver, DEFAULT_PORT, is_ip_address, parse_host_entry
+    from .favicons import favicon_store
+    from .columns import ServerTable, available as table_available
+    from .store import ResultStore
+    from .chat import parse_motd
+    from . import jsoncodec
+    from .targets import TargetGenerator, parse_ranges, ip_to_int, int_to_ip
+    from .sharding import ShardedScan
+    from .checkpoint import ScanCheckpoint
+    from .exclusions import ExclusionList
+    from .rangeset import dedupe_ranges
+    from .bedrock import BedrockEngine, DEFAULT_BEDROCK_PORT, build_ping, parse_pong
+    from .protocol import (PacketReader, HandshakeTemplates, NEXT_STATE_STATUS, NEXT_STATE_LOGIN,
+                           status_payload, pack_varint, pack_varints, frame_packet)
+except ImportError:
+    from async_engine import AsyncStatusEngine, TwoPhaseEngine
+    from geoip import GeoLocator, GeoBatcher
+    from whitelist import WhitelistChecker
+    from query import QueryEnricher
+    from resolver import DNSResolver, DEFAULT_PORT, is_ip_address, parse_host_entry
+    from favicons import favicon_store
+    from columns import ServerTable, available as table_available
+    from store import ResultStore
+    from chat import parse_motd
+    import jsoncodec
+    from targets import TargetGenerator, parse_ranges, ip_to_int, int_to_ip
+    from sharding import ShardedScan
+    from checkpoint import ScanCheckpoint
+    from exclusions import ExclusionList
+    from rangeset import dedupe_ranges
+    from bedrock import BedrockEngine, DEFAULT_BEDROCK_PORT, build_ping, parse_pong
+    from protocol import (PacketReader, HandshakeTemplates, NEXT_STATE_STATUS, NEXT_STATE_LOGIN,
+                          status_payload, pack_varint, pack_varints, frame_packet)
+
+def _intern(value) -> str:
+    """Chaîne partagée par tous les serveurs (pays, ville, version reviennent des milliers de fois)"""
+    return sys.intern(value) if type(value) is str else str(value)
+
 
 class MinecraftServer:
-    """Classe représentant un serveur Minecraft découvert"""
+    """Classe représentant un serveur Minecraft découvert
+    
+    Représentation compacte (__slots__, sans __dict__): une adresse IPv4
+    est gardée sous forme d'entier, pays, ville et version sont des
+    chaînes internées, la localisation est rangée en champs simples et
+    recomposée en dictionnaire par la propriété location. Les listes
+    vides sont partagées (tuple vide) tant qu'elles ne sont pas remplacées.
+    """
+    
+    __slots__ = ('_ip', 'port', 'name', 'description', 'motd', '_version', 'protocol', 'players_online',
+                 'players_max', 'players_list', 'plugins', 'map', 'mods', 'ping', 'favicon_hash', 'whitelist',
+                 '_country', '_city', 'lat', 'lon', 'last_seen', 'online', 'edition', 'hostnames')
     
     def __init__(self, ip: str, port: int = 25565):
         self.ip = ip
         self.port = port
         self.name = ""
         self.description = ""
+        self.motd = ""  # MOTD avec ses codes de formatage §
         self.version = ""
         self.protocol = 0
         self.players_online = 0
         self.players_max = 0
-        self.players_list = []
+        self.players_list = ()
+        self.plugins = ()
+        self.map = ""
+        self.mods = ()
         self.ping = 0
-        self.favicon = None
+        self.favicon_hash = None  # Empreinte dans favicon_store
         self.whitelist = False
-        self.location = {"country": "Unknown", "city": "Unknown", "lat": 0, "lon": 0}
+        self._country = "Unknown"
+        self._city = "Unknown"
+        self.lat = 0
+        self.lon = 0
         self.last_seen = time.time()
         self.online = True
+        self.edition = "java"
+        self.hostnames = ()
+    
+    @property
+    def ip(self) -> str:
+        """Adresse texte (IPv4 recomposée depuis l'entier, nom d'hôte ou IPv6 tel quel)"""
+        value = self._ip
+        return int_to_ip(value) if type(value) is int else value
+    
+    @ip.setter
+    def ip(self, value: str):
+        try:
+            # inet_pton n'accepte que la forme a.b.c.d: "10.1" ou un nom d'hôte restent du texte
+            socket.inet_pton(socket.AF_INET, value)
+            self._ip = ip_to_int(value)
+        except (OSError, TypeError):
+            self._ip = value
+    
+    @property
+    def packed_ip(self) -> Optional[int]:
+        """Adresse IPv4 entière, None pour un nom d'hôte ou une IPv6"""
+        return self._ip if type(self._ip) is int else None
+    
+    @property
+    def version(self) -> str:
+        return self._version
+    
+    @version.setter
+    def version(self, value: str):
+        self._version = _intern(value)
+    
+    @property
+    def location(self) -> Dict:
+        """Localisation au format de GeoLocator ({"country", "city", "lat", "lon"}), construite à la lecture"""
+        return {"country": self._country, "city": self._city, "lat": self.lat, "lon": self.lon}
+    
+    @location.setter
+    def location(self, value: Dict):
+        self._country = _intern(value.get('country', 'Unknown'))
+        self._city = _intern(value.get('city', 'Unknown'))
+        self.lat = value.get('lat', 0)
+        self.lon = value.get('lon', 0)
     
-    def to_dict(self) -> Dict:
-        """Convertit le serveur en dictionnaire"""
-        return {
+    @property
+    def country(self) -> str:
+        return self._country
+    
+    @property
+    def city(self) -> str:
+        return self._city
+    
+    @property
+    def search_text(self) -> str:
+        """Texte parcouru par la recherche (IP, nom, version, description, noms d'hôte), en minuscules"""
+        return f"{self.ip} {self.name} {self.version} {self.description} {' '.join(self.hostnames)}".lower()
+    
+    @property
+    def favicon(self) -> Optional[str]:
+        """Favicon au format du protocole, recomposé depuis le magasin partagé"""
+        return favicon_store.data_uri(self.favicon_hash)
+    
+    @favicon.setter
+    def favicon(self, value: Optional[str]):
+        self.favicon_hash = favicon_store.add(value)
+    
+    def to_dict(self, embed_favicon: bool = False) -> Dict:
+        """Convertit le serveur en dictionnaire
+        
+        Seule l'empreinte du favicon est incluse, sauf avec embed_favicon
+        (échanges entre processus, où le magasin n'est pas partagé).
+        """
+        data = {
             "ip": self.ip,
             "port": self.port,
             "name": self.name,
             "description": self.description,
+            "motd": self.motd,
             "version": self.version,
             "protocol": self.protocol,
             "players_online": self.players_online,
             "players_max": self.players_max,
             "players_list": self.players_list,
+            "plugins": self.plugins,
+            "map": self.map,
+            "mods": self.mods,
             "ping": self.ping,
-            "favicon": self.favicon,
+            "favicon_hash": self.favicon_hash,
             "whitelist": self.whitelist,
             "location": self.location,
             "last_seen": self.last_seen,
-            "online": self.online
+            "online": self.online,
+            "edition": self.edition,
+            "hostnames": self.hostnames
         }
-    
+        if embed_favicon:
+            data["favicon"] = self.favicon
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'MinecraftServer':
+        """Recrée un serveur depuis to_dict()"""
+        server = cls(data['ip'], data['port'])
+        server.name = data.get('name', '')
+        server.description = data.get('description', '')
+        server.motd = data.get('motd', server.description)
+        server.version = data.get('version', '')
+        server.protocol = data.get('protocol', 0)
+        server.players_online = data.get('players_online', 0)
+        server.players_max = data.get('players_max', 0)
+        server.players_list = data.get('players_list') or ()
+        server.plugins = data.get('plugins') or ()
+        server.map = data.get('map', '')
+        server.mods = data.get('mods') or ()
+        server.ping = data.get('ping', 0)
+        server.favicon_hash = data.get('favicon_hash')
+        if data.get('favicon'):
+            server.favicon = data['favicon']  # Favicon intégré (ancien format ou autre processus)
+        server.whitelist = data.get('whitelist', False)
+        server.location = data.get('location', {'country': 'Unknown', 'city': 'Unknown', 'lat': 0, 'lon': 0})
+        server.last_seen = data.get('last_seen', time.time())
+        server.online = data.get('online', True)
+        server.edition = data.get('edition', 'java')
+        server.hostnames = data.get('hostnames') or ()
+        return server
+
     def __str__(self):
         return f"{self.ip}:{self.port} - {self.name} ({self.players_online}/{self.players_max})"
 
+
+def _status_int(value) -> int:
+    """Entier d'une réponse status (0 si le serveur envoie autre chose qu'un nombre)"""
+    if type(value) is int:
+        return value
+    try:
+        return int(value)
+    except (TypeError, ValueError, OverflowError):
+        return 0
+
+
+def apply_status_core(server: MinecraftServer, status_data: Dict):
+    """Champs légers d'une réponse status: version, protocole et nombre de joueurs"""
+    version = status_data.get('version')
+    if isinstance(version, dict):
+        name = version.get('name', '')
+        server.version = name if isinstance(name, str) else str(name)
+        server.protocol = _status_int(version.get('protocol', 0))
+    
+    players = status_data.get('players')
+    if isinstance(players, dict):
+        server.players_online = _status_int(players.get('online', 0))
+        server.players_max = _status_int(players.get('max', 0))
+
+
+def apply_status_details(server: MinecraftServer, status_data: Dict):
+    """Champs lourds d'une réponse status: description, échantillon de joueurs, favicon et mods"""
+    if 'description' in status_data:
+        # Texte brut (recherche, affichage) et texte à codes § calculés une fois pour toutes
+        server.description, server.motd = parse_motd(status_data['description'])
+        server.name = server.description.replace('\n', ' ')
+    
+    players = status_data.get('players')
+    if isinstance(players, dict) and isinstance(players.get('sample'), list):
+        # Entrées qui ne sont pas des objets {"name", "id"} ignorées
+        server.players_list = [str(p.get('name', '')) for p in players['sample'] if isinstance(p, dict)]
+    
+    # Favicon (data URI attendue: toute autre valeur est ignorée)
+    if isinstance(status_data.get('favicon'), str):
+        server.favicon = status_data['favicon']
+    
+    mods = parse_mods(status_data)
+    if mods:
+        server.mods = mods
+
+
+def parse_mods(status_data: Dict) -> List[str]:
+    """Mods annoncés ("id version"): forgeData (Forge 1.13+) ou modinfo (Forge 1.7 à 1.12)"""
+    forge = status_data.get('forgeData')
+    if isinstance(forge, dict) and isinstance(forge.get('mods'), list):
+        return [f"{mod.get('modId', '')} {mod.get('modmarker', '')}".strip()
+                for mod in forge['mods'] if isinstance(mod, dict)]
+    modinfo = status_data.get('modinfo')
+    if isinstance(modinfo, dict) and isinstance(modinfo.get('modList'), list):
+        return [f"{mod.get('modid', '')} {mod.get('version', '')}".strip()
+                for mod in modinfo['modList'] if isinstance(mod, dict)]
+    return []
+
+
+class _LazyField:
+    """Champ d'un LazyMinecraftServer: les champs lourds sont construits à la première lecture ou écriture"""
+    
+    def __set_name__(self, owner, name):
+        self.storage = '_lazy_' + name
+    
+    def __get__(self, server, owner=None):
+        if server is None:
+            return self
+        if server._status is not None:
+            server.materialize()
+        return getattr(server, self.storage)
+    
+    def __set__(self, server, value):
+        if getattr(server, '_status', None) is not None:
+            server.materialize()
+        setattr(server, self.storage, value)
+
+
+class _StatusDetails:
+    """Champs lourds construits par apply_status_details, avant leur copie dans un LazyMinecraftServer"""
+    
+    __slots__ = ('name', 'description', 'motd', 'players_list', 'favicon_hash', 'mods')
+    
+    def __init__(self):
+        self.name = ""
+        self.description = ""
+        self.motd = ""
+        self.players_list = ()
+        self.favicon_hash = None
+        self.mods = ()
+    
+    favicon = MinecraftServer.favicon
+
+
+class LazyMinecraftServer(MinecraftServer):
+    """MinecraftServer qui ne construit les champs lourds d'une réponse status qu'à la demande
+    
+    Le JSON n'est décodé qu'une fois: version, protocole et nombre de
+    joueurs sont appliqués aussitôt, le document décodé est gardé pour le
+    reste. Description et MOTD (aplatissement des composants), nom,
+    échantillon de joueurs, favicon (décodage base64 et empreinte) et mods
+    sont construits ensemble au premier accès à l'un d'eux, puis le
+    document est libéré. Un serveur publié sans être affiché (str() n'en
+    lit aucun) ou écarté (whitelist, filtre) ne coûte que le décodage JSON.
+    """
+    
+    LAZY_FIELDS = ('name', 'description', 'motd', 'players_list', 'favicon_hash', 'mods')
+    
+    __slots__ = ('_status', '_guard') + tuple('_lazy_' + field for field in LAZY_FIELDS)
+    
+    name = _LazyField()
+    description = _LazyField()
+    motd = _LazyField()
+    players_list = _LazyField()
+    favicon_hash = _LazyField()
+    mods = _LazyField()
+    
+    def __init__(self, ip: str, port: int = 25565, status: Optional[Dict] = None):
+        self._status = None
+        super().__init__(ip, port)
+        self._guard = threading.Lock()  # Un seul décodage par serveur, sans bloquer les autres
+        self._status = status
+    
+    @classmethod
+    def from_payload(cls, ip: str, port: int, payload: Union[bytes, memoryview],
+                     ping_time: int = 0) -> Optional['LazyMinecraftServer']:
+        """Serveur construit depuis le JSON brut d'une réponse status, ou None si le JSON est invalide"""
+        try:
+            status_data = jsoncodec.loads(payload)
+        except ValueError:
+            return None
+        if not isinstance(status_data, dict):
+            return None
+        server = cls(ip, port, status_data)
+        server.ping = ping_time
+        apply_status_core(server, status_data)
+        return server
+    
+    @property
+    def materialized(self) -> bool:
+        """Vrai une fois les champs lourds construits"""
+        return self._status is None
+    
+    def materialize(self):
+        """Construit les champs paresseux depuis le document décodé (une seule fois)"""
+        with self._guard:
+            status_data = self._status
+            if status_data is None:
+                return
+            details = _StatusDetails()
+            try:
+                apply_status_details(details, status_data)
+            except Exception:
+                details = _StatusDetails()  # Document inattendu: champs vides plutôt qu'une erreur à chaque lecture
+            for field in self.LAZY_FIELDS:
+                setattr(self, '_lazy_' + field, getattr(details, field))
+            self._status = None  # Après les champs: un lecteur qui voit None les trouve remplis
+    
+    def __str__(self):
+        if self._status is not None:
+            # Sans le nom: afficher le serveur ne doit pas construire les champs lourds
+            return f"{self.ip}:{self.port} - {self.version} ({self.players_online}/{self.players_max})"
+        return super().__str__()
+
 class MinecraftScanner:
     """Scanner principal pour les serveurs Minecraft"""
     
-    def __init__(self):
+    def __init__(self, geolocator: GeoLocator = None):
+        self.geolocator = geolocator or GeoLocator()
+        self._geo_batcher = None
+        self.whitelist_checker: Optional[WhitelistChecker] = None
+        self.query_enricher: Optional[QueryEnricher] = None
+        self.resolver = DNSResolver()
+        self._hostnames: Dict[Tuple[str, int], List[str]] = {}  # Point d'accès -> noms d'hôte qui y mènent
+        self.exclusions: Optional[ExclusionList] = None
         self.servers: List[MinecraftServer] = []
         self.is_scanning = False
         self.scan_progress = 0
@@ -71,9 +404,63 @@ class MinecraftScanner:
             'server_found': [],
             'progress_update': [],
             'scan_complete': [],
-            'scan_started': []
+            'scan_started': [],
+            'server_updated': [],
+            'server_removed': []
         }
         self.stop_flag = threading.Event()
+        self._checkpoint: Optional[ScanCheckpoint] = None
+        self.bedrock_rate = 2000  # Paquets par seconde du moteur Bedrock
+        self.lazy_status = False  # Champs lourds des réponses status décodés à la demande
+        self.table: Optional[ServerTable] = None  # Résultats en colonnes (enable_table)
+        self.store: Optional[ResultStore] = None  # Base SQLite des résultats (enable_store)
+        self.keep_servers = True  # Faux: les résultats ne sont que dans la base, lus par pages
+        self._local = threading.local()
+        self._handshakes = HandshakeTemplates()
+    
+    @classmethod
+    def from_config(cls, config) -> 'MinecraftScanner':
+        """Crée un scanner configuré (géolocalisation, whitelist) depuis un objet Config"""
+        scanner = cls(geolocator=GeoLocator.from_config(config))
+        scanner.resolver = DNSResolver.from_config(config)
+        favicon_store.retain = config.get('display_settings.keep_favicons', True)
+        if config.get('whitelist.enabled', False):
+            scanner.enable_whitelist_check(max_workers=config.get('whitelist.max_workers', 20),
+                                           ttl=config.get('whitelist.ttl', 24 * 3600),
+                                           timeout=config.get('whitelist.timeout', 2),
+                                           cache_path=config.get('whitelist.cache_path'))
+        if config.get('query.enabled', False):
+            scanner.enable_query(timeout=config.get('query.timeout', 2), retries=config.get('query.retries', 1),
+                                 concurrency=config.get('query.concurrency', 1000), port=config.get('query.port'))
+        scanner.load_exclusions(config.get('exclusions.files', []))
+        scanner.bedrock_rate = config.get('scan_settings.bedrock_rate', 2000)
+        scanner.lazy_status = config.get('scan_settings.lazy_status', False)
+        if config.get('display_settings.columnar_table', False) and table_available():
+            scanner.enable_table()
+        if config.get('storage.database'):
+            scanner.enable_store(config.get('storage.database'), batch_size=config.get('storage.batch_size', 500),
+                                 max_delay=config.get('storage.max_delay', 1.0),
+                                 history=config.get('storage.history', True),
+                                 keep_in_memory=config.get('storage.keep_in_memory', True))
+        return scanner
+    
+    def load_exclusions(self, paths: List[str]):
+        """Charge les listes d'exclusion (opt-out); les fichiers absents sont ignorés"""
+        exclusions = self.exclusions or ExclusionList()
+        for path in paths:
+            try:
+                count = exclusions.load_file(path)
+                print(f"🚫 {count} plages exclues chargées depuis {path}")
+            except FileNotFoundError:
+                continue
+            except Exception as e:
+                print(f"⚠️  Liste d'exclusion illisible ({path}): {e}")
+        exclusions.compile()
+        self.exclusions = exclusions if len(exclusions) else None
+    
+    def is_excluded(self, ip: str) -> bool:
+        """Vrai si l'adresse figure dans la liste d'exclusion"""
+        return self.exclusions is not None and ip in self.exclusions
     
     def add_callback(self, event: str, callback: Callable):
         """Ajoute un callback pour un événement"""
@@ -88,217 +475,195 @@ class MinecraftScanner:
             except Exception as e:
                 print(f"Erreur dans le callback {event}: {e}")
     
-    def ping_server(self, ip: str, port: int = 25565, timeout: int = 3) -> Optional[MinecraftServer]:
-        """Ping un serveur Minecraft spécifique"""
+    def ping_server(self, ip: str, port: int = 25565, timeout: int = 3, locate: bool = True,
+                    check_whitelist: bool = True) -> Optional[MinecraftServer]:
+        """Ping un serveur Minecraft spécifique
+        
+        Avec locate=False / check_whitelist=False la géolocalisation et la
+        whitelist sont laissées à l'appelant (les moteurs de scan les font
+        en différé depuis _record_result).
+        """
         try:
+            address = self._endpoint(ip, port)
+            if address is None:
+                return None  # Jamais de connexion vers une adresse exclue (ou nom non résolu)
+            
             start_time = time.time()
             
             # Connexion socket
             sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             sock.settimeout(timeout)
             
-            result = sock.connect_ex((ip, port))
+            result = sock.connect_ex(address)
             if result != 0:
                 sock.close()
                 return None
             
-            # Handshake packet
-            handshake = self._create_handshake_packet(ip, port)
-            sock.send(handshake)
-            
-            # Status request
-            status_request = b'\x01\x00'
-            sock.send(status_request)
+            # Handshake + status request dans le même segment
+            sock.sendall(self._create_status_request(ip, port))
             
-            # Lire la réponse
-            response = self._read_packet(sock)
+            # Lire la réponse (vue sur le tampon du thread, décodée ci-dessous avant toute autre lecture)
+            payload = self._read_payload(sock)
             sock.close()
             
-            if not response:
-                return None
-            
-            # Parser la réponse JSON
-            try:
-                status_data = json.loads(response)
-            except json.JSONDecodeError:
+            if not payload:
                 return None
             
             # Calculer le ping
             ping_time = int((time.time() - start_time) * 1000)
             
-            # Créer l'objet serveur
-            server = MinecraftServer(ip, port)
-            server.ping = ping_time
-            
-            # Parser les données du serveur
-            if 'description' in status_data:
-                desc = status_data['description']
-                if isinstance(desc, dict):
-                    server.description = desc.get('text', '')
-                    server.name = desc.get('text', '')
-                else:
-                    server.description = str(desc)
-                    server.name = str(desc)
-            
-            if 'version' in status_data:
-                server.version = status_data['version'].get('name', '')
-                server.protocol = status_data['version'].get('protocol', 0)
-            
-            if 'players' in status_data:
-                players = status_data['players']
-                server.players_online = players.get('online', 0)
-                server.players_max = players.get('max', 0)
-                
-                if 'sample' in players:
-                    server.players_list = [p.get('name', '') for p in players['sample']]
-            
-            # Favicon
-            if 'favicon' in status_data:
-                server.favicon = status_data['favicon']
+            # Créer l'objet serveur depuis la réponse JSON
+            server = self._server_from_payload(ip, port, payload, ping_time)
+            if server is None:
+                return None
             
             # Vérifier la whitelist (approximation basée sur le message d'erreur)
-            server.whitelist = self._check_whitelist(ip, port)
+            if check_whitelist:
+                cached = self.whitelist_checker.cached(server) if self.whitelist_checker else None
+                server.whitelist = cached if cached is not None else self._check_whitelist(ip, port)
             
             # Géolocalisation
-            server.location = self._get_location(ip)
+            if locate:
+                server.location = self._get_location(ip)
             
             return server
             
         except Exception as e:
             return None
     
-    def _create_handshake_packet(self, ip: str, port: int) -> bytes:
-        """Crée un packet de handshake Minecraft"""
-        # Protocol version (nous utilisons 759 pour 1.19)
-        protocol_version = 759
+    def _endpoint(self, ip: str, port: int) -> Optional[Tuple[str, int]]:
+        """Adresse de connexion: un nom d'hôte passe par le cache DNS; None si non résolu ou exclu
         
-        # Construire le packet
-        packet_data = b''
-        
-        # Packet ID (0x00 pour handshake)
-        packet_data += b'\x00'
-        
-        # Protocol version
-        packet_data += self._pack_varint(protocol_version)
-        
-        # Server address
-        server_address = ip.encode('utf-8')
-        packet_data += self._pack_varint(len(server_address))
-        packet_data += server_address
-        
-        # Server port
-        packet_data += struct.pack('>H', port)
+        Comme le client Minecraft, l'enregistrement SRV n'est consulté que
+        pour le port par défaut.
+        """
+        if not is_ip_address(ip):
+            address = self.resolver.resolve(ip, None if port == DEFAULT_PORT else port)
+            if address is None:
+                return None
+            ip, port = address
+        return None if self.is_excluded(ip) else (ip, port)
+    
+    def ping_bedrock(self, ip: str, port: int = DEFAULT_BEDROCK_PORT, timeout: float = 2) -> Optional[MinecraftServer]:
+        """Ping un serveur Bedrock (RakNet Unconnected Ping en UDP)"""
+        if self.is_excluded(ip):
+            return None
+        try:
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+                sock.settimeout(timeout)
+                start_time = time.time()
+                sock.sendto(build_ping(0, 0), (ip, port))
+                deadline = start_time + timeout
+                while True:
+                    sock.settimeout(max(deadline - time.time(), 0.001))
+                    data, addr = sock.recvfrom(2048)
+                    if addr[1] == port:
+                        break
+                _, fields = parse_pong(data)
+            ping_time = int((time.time() - start_time) * 1000)
+            return BedrockEngine(self).build_server(ip, port, fields, ping_time)
+        except Exception:
+            return None
+    
+    def _build_server(self, ip: str, port: int, status_data: Dict, ping_time: int) -> MinecraftServer:
+        """Construit un MinecraftServer à partir d'une réponse status décodée"""
+        server = MinecraftServer(ip, port)
+        server.ping = ping_time
+        server.hostnames = self._hostnames.get((ip, port), ())
+        apply_status_core(server, status_data)
+        apply_status_details(server, status_data)
+        return server
+    
+    def _server_from_payload(self, ip: str, port: int, payload: Union[bytes, memoryview],
+                             ping_time: int) -> Optional[MinecraftServer]:
+        """Serveur construit depuis le JSON brut d'une réponse status (None si invalide)
         
-        # Next state (1 pour status)
-        packet_data += self._pack_varint(1)
+        Avec lazy_status, les champs lourds ne sont décodés qu'au premier
+        accès (LazyMinecraftServer).
+        """
+        if self.lazy_status:
+            server = LazyMinecraftServer.from_payload(ip, port, payload, ping_time)
+            if server is not None:
+                server.hostnames = self._hostnames.get((ip, port), ())
+            return server
+        try:
+            status_data = jsoncodec.loads(payload)
+        except ValueError:
+            return None
+        if not isinstance(status_data, dict):
+            return None
+        return self._build_server(ip, port, status_data, ping_time)
+    
+    def _create_handshake_packet(self, ip: str, port: int) -> bytes:
+        """Crée un packet de handshake Minecraft"""
+        return self._handshakes.build(self._handshake_address(ip, port), port, NEXT_STATE_STATUS)
+    
+    def _create_status_request(self, ip: str, port: int) -> bytes:
+        """Crée le handshake suivi du status request, envoyés en une seule écriture"""
+        return self._handshakes.status_request(self._handshake_address(ip, port), port)
+    
+    def _handshake_address(self, ip: str, port: int) -> bytes:
+        """Adresse annoncée dans le handshake: le nom d'hôte si la cible vient d'une liste de noms
         
-        # Length + data
-        length = self._pack_varint(len(packet_data))
-        return length + packet_data
+        Les proxys (BungeeCord, Velocity...) aiguillent sur ce nom.
+        """
+        hostnames = self._hostnames.get((ip, port))
+        return (hostnames[0] if hostnames else ip).encode('utf-8')
     
     def _pack_varint(self, value: int) -> bytes:
         """Encode un entier en VarInt"""
-        result = b''
-        while value >= 0x80:
-            result += bytes([value & 0x7F | 0x80])
-            value >>= 7
-        result += bytes([value & 0x7F])
-        return result
-    
-    def _read_varint(self, sock: socket.socket) -> int:
-        """Lit un VarInt depuis un socket"""
-        result = 0
-        shift = 0
-        while True:
-            byte_data = sock.recv(1)
-            if not byte_data:
-                raise Exception("Connexion fermée")
-            
-            byte = byte_data[0]
-            result |= (byte & 0x7F) << shift
-            
-            if not (byte & 0x80):
-                break
-            
-            shift += 7
-            if shift >= 32:
-                raise Exception("VarInt trop long")
-        
-        return result
+        return pack_varint(value)
+    
+    def _pack_varints(self, *values: int) -> bytes:
+        """Encode plusieurs entiers en VarInt dans un seul buffer"""
+        return pack_varints(values)
+    
+    def _packet_reader(self) -> PacketReader:
+        """Retourne le PacketReader du thread courant (tampon réutilisé d'une connexion à l'autre)"""
+        reader = getattr(self._local, 'packet_reader', None)
+        if reader is None:
+            reader = self._local.packet_reader = PacketReader()
+        reader.reset()
+        return reader
     
     def _read_packet(self, sock: socket.socket) -> Optional[str]:
         """Lit un packet Minecraft depuis un socket"""
+        payload = self._read_payload(sock)
         try:
-            # Lire la longueur du packet
-            length = self._read_varint(sock)
-            
-            if length <= 0 or length > 1024 * 1024:  # Limite de sécurité
-                return None
-            
-            # Lire le packet complet
-            data = b''
-            while len(data) < length:
-                chunk = sock.recv(length - len(data))
-                if not chunk:
-                    return None
-                data += chunk
-            
-            # Le premier byte est l'ID du packet (doit être 0x00 pour status response)
-            packet_id = data[0]
-            if packet_id != 0:
-                return None
-            
-            # Le reste est la longueur du JSON + le JSON
-            json_length = self._read_varint_from_bytes(data[1:])
-            json_start = 1 + self._varint_size(json_length)
-            
-            if json_start >= len(data):
-                return None
+            return str(payload, 'utf-8') if payload is not None else None
+        except UnicodeDecodeError:
+            return None
+    
+    def _read_payload(self, sock: socket.socket) -> Optional[memoryview]:
+        """Lit un packet Minecraft et retourne sa chaîne JSON, sans copie
+        
+        La vue porte sur le tampon du thread: elle doit être décodée avant
+        la prochaine lecture.
+        """
+        try:
+            frame = self._packet_reader().read_frame(sock)
             
-            json_data = data[json_start:json_start + json_length]
-            return json_data.decode('utf-8')
+            # Le premier byte est l'ID du packet (doit être 0x00), suivi de la chaîne JSON
+            return status_payload(frame)
             
         except Exception:
             return None
     
-    def _read_varint_from_bytes(self, data: bytes) -> int:
-        """Lit un VarInt depuis des bytes"""
-        result = 0
-        shift = 0
-        for i, byte in enumerate(data):
-            result |= (byte & 0x7F) << shift
-            if not (byte & 0x80):
-                break
-            shift += 7
-            if shift >= 32:
-                raise Exception("VarInt trop long")
-        return result
-    
-    def _varint_size(self, value: int) -> int:
-        """Calcule la taille d'un VarInt"""
-        size = 0
-        while value >= 0x80:
-            size += 1
-            value >>= 7
-        return size + 1
-    
-    def _check_whitelist(self, ip: str, port: int) -> bool:
+    def _check_whitelist(self, ip: str, port: int, timeout: float = 2) -> bool:
         """Vérifie approximativement si un serveur a une whitelist"""
         # Cette méthode est approximative car il n'y a pas de moyen direct
         # de vérifier la whitelist via le protocol status
         # On peut essayer de se connecter pour voir le message d'erreur
         try:
             sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(2)
-            sock.connect((ip, port))
-            
-            # Handshake pour login
-            handshake = self._create_login_handshake(ip, port)
-            sock.send(handshake)
+            sock.settimeout(timeout)
+            address = self._endpoint(ip, port)
+            if address is None:
+                return False
+            sock.connect(address)
             
-            # Login start avec un nom bidon
-            login_start = self._create_login_start("TestUser")
-            sock.send(login_start)
+            # Handshake pour login + login start avec un nom bidon
+            sock.sendall(self._create_login_handshake(ip, port) + self._create_login_start("TestUser"))
             
             # Lire la réponse
             try:
@@ -317,53 +682,52 @@ class MinecraftScanner:
     
     def _create_login_handshake(self, ip: str, port: int) -> bytes:
         """Crée un handshake pour login"""
-        protocol_version = 759
-        packet_data = b'\x00'  # Packet ID
-        packet_data += self._pack_varint(protocol_version)
-        
-        server_address = ip.encode('utf-8')
-        packet_data += self._pack_varint(len(server_address))
-        packet_data += server_address
-        
-        packet_data += struct.pack('>H', port)
-        packet_data += self._pack_varint(2)  # Next state (2 pour login)
-        
-        length = self._pack_varint(len(packet_data))
-        return length + packet_data
+        return self._handshakes.build(self._handshake_address(ip, port), port, NEXT_STATE_LOGIN)
     
     def _create_login_start(self, username: str) -> bytes:
         """Crée un packet login start"""
-        packet_data = b'\x00'  # Packet ID pour login start
         username_bytes = username.encode('utf-8')
-        packet_data += self._pack_varint(len(username_bytes))
-        packet_data += username_bytes
-        
-        length = self._pack_varint(len(packet_data))
-        return length + packet_data
+        # Packet ID 0x00 + longueur du nom
+        return frame_packet(self._pack_varints(0x00, len(username_bytes)) + username_bytes)
     
     def _get_location(self, ip: str) -> Dict[str, any]:
-        """Obtient la géolocalisation d'une IP"""
-        try:
-            # Utiliser un service de géolocalisation gratuit
-            response = requests.get(f"http://ip-api.com/json/{ip}", timeout=2)
-            if response.status_code == 200:
-                data = response.json()
-                if data.get('status') == 'success':
-                    return {
-                        'country': data.get('country', 'Unknown'),
-                        'city': data.get('city', 'Unknown'),
-                        'lat': data.get('lat', 0),
-                        'lon': data.get('lon', 0)
-                    }
-        except:
-            pass
-        
-        return {'country': 'Unknown', 'city': 'Unknown', 'lat': 0, 'lon': 0}
+        """Obtient la géolocalisation d'une IP (base locale, HTTP seulement en secours configuré)"""
+        return self.geolocator.locate(ip)
     
-    def scan_ip_range(self, ip_range: str, ports: List[int] = None, max_threads: int = 100, timeout: int = 3):
-        """Scanne une plage d'IP pour des serveurs Minecraft"""
-        if ports is None:
-            ports = [25565]
+    def scan_ip_range(self, ip_range: str, ports: List[int] = None, max_threads: int = 100, timeout: int = 3,
+                      engine: str = "threads", concurrency: int = 5000, max_pending: int = None,
+                      sweep_timeout: float = 1, randomize: bool = True, seed: Optional[int] = None,
+                      workers: int = 1, checkpoint_path: Optional[str] = None, checkpoint_interval: float = 30):
+        """Scanne une plage d'IP pour des serveurs Minecraft (voir scan_targets pour les moteurs)"""
+        self.scan_multiple_ranges([ip_range], ports, max_threads, timeout, engine, concurrency, max_pending,
+                                  sweep_timeout, randomize, seed, workers, checkpoint_path, checkpoint_interval)
+    
+    def scan_targets(self, targets: TargetGenerator, max_threads: int = 100, timeout: int = 3,
+                     engine: str = "threads", concurrency: int = 5000, max_pending: int = None,
+                     sweep_timeout: float = 1, workers: int = 1, checkpoint: Optional[ScanCheckpoint] = None):
+        """Scanne les cibles d'un TargetGenerator (ou une liste de points d'accès (ip, port), voir scan_hosts)
+        
+        engine="threads" utilise un ThreadPoolExecutor de max_threads workers
+        (au plus max_pending tâches soumises, 2 x max_threads par défaut),
+        engine="asyncio" utilise AsyncStatusEngine avec concurrency connexions
+        simultanées sur un seul thread, engine="pipeline" balaye d'abord les
+        ports (concurrency connexions, timeout sweep_timeout) puis ne fait
+        l'échange status que sur les ports ouverts avec max_threads workers,
+        engine="bedrock" envoie des pings RakNet (UDP) depuis un seul socket,
+        au plus bedrock_rate paquets par seconde et concurrency en attente.
+        
+        Avec workers > 1, les cibles sont découpées en workers fragments
+        scannés chacun par un processus avec son propre moteur; les
+        serveurs trouvés sont géolocalisés et publiés ici, dans un seul flux.
+        
+        Avec checkpoint, l'avancement est sauvegardé périodiquement et les
+        cibles déjà traitées d'un scan repris sont sautées (un seul
+        processus: les scans multi-machines se reprennent via distributed).
+        """
+        if not isinstance(targets, TargetGenerator) and (workers > 1 or checkpoint is not None):
+            raise ValueError("Une liste de points d'accès se scanne avec workers=1 et sans point de reprise")
+        if checkpoint is not None and workers > 1:
+            raise ValueError("Les points de reprise nécessitent workers=1 (utilisez un job distribué)")
         
         self.is_scanning = True
         self.stop_flag.clear()
@@ -374,60 +738,340 @@ class MinecraftScanner:
         self._call_callbacks('scan_started')
         
         try:
-            # Générer toutes les IPs à scanner
-            network = ipaddress.ip_network(ip_range, strict=False)
-            all_ips = []
+            # Les cibles sont générées paresseusement: la mémoire reste constante
+            self.total_ips = len(targets)
+            target_iter = targets.iter_targets() if isinstance(targets, TargetGenerator) else iter(targets)
             
-            for ip in network.hosts():
-                if self.stop_flag.is_set():
-                    break
-                for port in ports:
-                    all_ips.append((str(ip), port))
+            if checkpoint is not None:
+                # Reprise: compter le travail déjà fait et republier les serveurs déjà trouvés
+                self._checkpoint = checkpoint
+                target_iter = checkpoint.iter_targets()
+                self.scanned_ips = checkpoint.progress
+                for data in list(checkpoint.servers):
+                    self._record_result(MinecraftServer.from_dict(data), count=0)
             
-            self.total_ips = len(all_ips)
+            if workers > 1:
+                ShardedScan(self, targets, workers, {
+                    'max_threads': max_threads, 'timeout': timeout, 'engine': engine,
+                    'concurrency': concurrency, 'max_pending': max_pending, 'sweep_timeout': sweep_timeout
+                }).run()
+                return
             
-            # Scanner avec des threads
-            with ThreadPoolExecutor(max_workers=max_threads) as executor:
-                # Soumettre toutes les tâches
-                future_to_ip = {
-                    executor.submit(self.ping_server, ip, port, timeout): (ip, port)
-                    for ip, port in all_ips
-                }
-                
-                # Traiter les résultats au fur et à mesure
-                for future in as_completed(future_to_ip):
-                    if self.stop_flag.is_set():
-                        break
-                    
-                    ip, port = future_to_ip[future]
-                    self.scanned_ips += 1
-                    
-                    try:
-                        server = future.result()
-                        if server and not server.whitelist:  # Seulement les serveurs sans whitelist
-                            self.servers.append(server)
-                            self.found_servers += 1
-                            self._call_callbacks('server_found', server)
-                            print(f"✅ Serveur trouvé: {server}")
-                    
-                    except Exception as e:
-                        pass  # Ignore les erreurs de scan individual
-                    
-                    # Mettre à jour le progrès
-                    self.scan_progress = (self.scanned_ips / self.total_ips) * 100
-                    self._call_callbacks('progress_update', self.scan_progress, self.scanned_ips, self.total_ips, self.found_servers)
+            if engine == "asyncio":
+                AsyncStatusEngine(self, concurrency=concurrency, timeout=timeout).run(target_iter)
+                return
+            
+            if engine == "bedrock":
+                BedrockEngine(self, concurrency=concurrency, timeout=timeout, rate=self.bedrock_rate).run(target_iter)
+                return
+            
+            if engine == "pipeline":
+                TwoPhaseEngine(self, concurrency=concurrency, timeout=timeout,
+                               sweep_timeout=sweep_timeout, probe_workers=max_threads).run(target_iter)
+                return
+            
+            # Scanner avec des threads, au plus max_pending tâches en vol
+            if max_pending is None:
+                max_pending = max_threads * 2
+            self._run_bounded(target_iter, max_threads, max_pending, timeout)
         
         finally:
+            # Publier les serveurs encore en attente de géolocalisation
+            if self._geo_batcher is not None:
+                self._geo_batcher.flush()
+                self.geolocator.save()
+            # Attendre les vérifications de whitelist lancées pendant ce scan
+            if self.whitelist_checker is not None:
+                self.whitelist_checker.flush()
+            if self.query_enricher is not None:
+                self.query_enricher.flush()
+            if self.store is not None:
+                self.store.flush()
+            if self._checkpoint is not None:
+                self._checkpoint.save()
+                self._checkpoint = None
             self.is_scanning = False
-            self._call_callbacks('scan_complete', len(self.servers))
+            self._call_callbacks('scan_complete', self.count_servers())
+    
+    def _run_bounded(self, targets: Iterator[Tuple[str, int]], max_threads: int, max_pending: int, timeout: int):
+        """Soumet les cibles au pool au fil de l'eau en gardant au plus max_pending futures"""
+        executor = ThreadPoolExecutor(max_workers=max_threads)
+        pending = set()
+        try:
+            for ip, port in targets:
+                if self.stop_flag.is_set():
+                    break
+                
+                # Contre-pression: attendre qu'une tâche se termine avant d'en soumettre une autre
+                while len(pending) >= max_pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    self._collect(done)
+                
+                future = executor.submit(self.ping_server, ip, port, timeout, False, False)
+                future.target = (ip, port)
+                pending.add(future)
+            
+            # Traiter les derniers résultats
+            while pending and not self.stop_flag.is_set():
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                self._collect(done)
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
     
-    def scan_multiple_ranges(self, ip_ranges: List[str], ports: List[int] = None, max_threads: int = 100, timeout: int = 3):
-        """Scanne plusieurs plages d'IP"""
-        for ip_range in ip_ranges:
+    def _collect(self, done):
+        """Publie les résultats d'un lot de futures terminées"""
+        for future in done:
             if self.stop_flag.is_set():
-                break
-            print(f"🔍 Scanner la plage: {ip_range}")
-            self.scan_ip_range(ip_range, ports, max_threads, timeout)
+                return
+            try:
+                server = future.result()
+            except Exception:
+                server = None  # Ignore les erreurs de scan individuel
+            self._record_result(server, target=future.target)
+    
+    def _record_result(self, server: Optional[MinecraftServer], count: int = 1,
+                       target: Optional[Tuple[str, int]] = None):
+        """Comptabilise count cibles scannées et publie le serveur éventuel (commun à tous les moteurs)"""
+        self.scanned_ips += count
+        
+        if target is not None and self._checkpoint is not None:
+            self._checkpoint.target_done(target, server)
+        
+        if server and self.whitelist_checker is not None:
+            # Statut déjà connu et frais: pas de nouvelle connexion login
+            cached = self.whitelist_checker.cached(server)
+            if cached is not None:
+                server.whitelist = cached
+        
+        if server and not server.whitelist:  # Seulement les serveurs sans whitelist
+            if self.geolocator.batched:
+                # Service HTTP: localisation groupée hors du chemin de scan
+                if self._geo_batcher is None:
+                    self._geo_batcher = GeoBatcher(self.geolocator, self._publish_server)
+                self._geo_batcher.submit(server)
+            else:
+                server.location = self._get_location(server.ip)
+                self._publish_server(server)
+        
+        # Mettre à jour le progrès
+        self.scan_progress = (self.scanned_ips / self.total_ips) * 100 if self.total_ips else 100
+        self._call_callbacks('progress_update', self.scan_progress, self.scanned_ips, self.total_ips, self.found_servers)
+    
+    def _publish_server(self, server: MinecraftServer):
+        """Ajoute un serveur localisé aux résultats et prévient les abonnés"""
+        if self.keep_servers:
+            if self.table is not None:
+                # Avant toute autre mise à jour: une ligne refusée ne laisse pas le scanner à moitié modifié
+                try:
+                    self.table.append(server)
+                except Exception as e:
+                    print(f"⚠️  Serveur absent de la table en colonnes ({server.ip}:{server.port}): {e}")
+            self.servers.append(server)
+        if self.store is not None:
+            self.store.add(server)
+        self.found_servers += 1
+        self._call_callbacks('server_found', server)
+        print(f"✅ Serveur trouvé: {server}")
+        
+        # Whitelist vérifiée après coup si le statut n'est pas déjà en cache (connexion login Java)
+        if (self.whitelist_checker is not None and server.edition == "java"
+                and self.whitelist_checker.cached(server) is None):
+            self.whitelist_checker.submit(server, self._on_whitelist_checked)
+        
+        # Liste complète des joueurs, plugins et carte via Query (UDP), si le serveur l'active
+        if self.query_enricher is not None and server.edition == "java":
+            self.query_enricher.submit(server, self._on_queried)
+    
+    def _on_whitelist_checked(self, server: MinecraftServer):
+        """Retire des résultats un serveur dont la whitelist vient d'être détectée"""
+        if not server.whitelist:
+            self._notify_updated(server)
+            return
+        if self.store is not None:
+            self.store.remove(server)
+        if self.keep_servers:
+            try:
+                self.servers.remove(server)
+            except ValueError:
+                return  # Déjà effacé (clear_servers)
+            if self.table is not None:
+                self.table.remove(server)
+        self.found_servers -= 1
+        self._call_callbacks('server_removed', server)
+        print(f"🔒 Whitelist détectée, serveur retiré: {server}")
+    
+    def _on_queried(self, server: MinecraftServer):
+        """Prévient les abonnés qu'un serveur a été complété par Query"""
+        self._notify_updated(server)
+    
+    def _notify_updated(self, server: MinecraftServer):
+        """Un serveur des résultats a changé (surveillance, whitelist, Query): table et abonnés"""
+        if self.table is not None:
+            self.table.update(server)
+        if self.store is not None and not server.whitelist:  # Un serveur retiré n'est pas réécrit (Query tardif)
+            self.store.add(server)
+        self._call_callbacks('server_updated', server)
+    
+    def enable_table(self):
+        """Tient à jour une table en colonnes des résultats (statistiques et filtres vectorisés, NumPy requis)"""
+        if self.table is None:
+            self.table = ServerTable.from_servers(self.servers)
+    
+    def disable_table(self):
+        self.table = None
+    
+    def enable_store(self, path: str, batch_size: int = 500, max_delay: float = 1.0, history: bool = True,
+                     keep_in_memory: bool = True):
+        """Enregistre les résultats au fil de l'eau dans une base SQLite
+        
+        Sans keep_in_memory, les serveurs trouvés ne sont plus gardés dans
+        servers: ils ne sont que dans la base, et page_servers,
+        iter_servers et count_servers la lisent par pages.
+        """
+        self.disable_store()
+        self.store = ResultStore(path, batch_size=batch_size, max_delay=max_delay, history=history)
+        self.keep_servers = keep_in_memory
+    
+    def disable_store(self):
+        """Écrit les résultats en attente et ferme la base"""
+        if self.store is not None:
+            self.store.close()
+            self.store = None
+        self.keep_servers = True
+    
+    def count_servers(self, **filters) -> int:
+        """Nombre de résultats (filtres de ResultStore.count si les résultats ne sont que dans la base)"""
+        if self.keep_servers:
+            if not any(value is not None for value in filters.values()):
+                return len(self.servers)
+            return len(self._filtered_servers(**filters))
+        return self.store.count(**filters)
+    
+    def page_servers(self, offset: int = 0, limit: int = 100, **filters) -> List[MinecraftServer]:
+        """Une page des résultats: depuis la base, ou depuis la mémoire dans l'ordre de découverte"""
+        if self.keep_servers:
+            return self._filtered_servers(**filters)[max(0, offset):max(0, offset) + limit]
+        return self.store.page(offset, limit, **filters)
+    
+    def iter_servers(self, page_size: int = 1000, **filters) -> Iterator[MinecraftServer]:
+        """Tous les résultats, lus page par page quand ils ne sont que dans la base"""
+        if self.keep_servers:
+            return iter(self._filtered_servers(**filters))
+        return self.store.iter_servers(page_size, **filters)
+    
+    def _filtered_servers(self, country: Optional[str] = None, version: Optional[str] = None,
+                          search: Optional[str] = None, online: Optional[bool] = None,
+                          min_players: Optional[int] = None, **order) -> List[MinecraftServer]:
+        """Résultats en mémoire avec les mêmes filtres que ResultStore (le tri de la base est ignoré)
+
+        Avec la table en colonnes, les filtres passent par ServerTable.where.
+        """
+        search = search.lower() if search else None
+        if self.table is not None:
+            conditions = {}
+            if country:
+                conditions['country'] = country
+            if version:
+                conditions['version'] = version
+            if online is not None:
+                conditions['online'] = online
+            if min_players is not None:
+                conditions['players_online'] = (min_players, None)
+            return self.table.where(search=search, **conditions)
+        return [server for server in list(self.servers)
+                if (not country or server.country == country)
+                and (not version or server.version == version)
+                and (online is None or server.online == online)
+                and (min_players is None or server.players_online >= min_players)
+                and (not search or search in server.search_text)]
+    
+    def enable_whitelist_check(self, max_workers: int = 20, ttl: float = 24 * 3600, timeout: float = 2,
+                               cache_path: Optional[str] = None):
+        """Active la vérification de whitelist différée (désactivée par défaut)"""
+        self.whitelist_checker = WhitelistChecker(self._check_whitelist, max_workers=max_workers, ttl=ttl,
+                                                  timeout=timeout, cache_path=cache_path)
+    
+    def disable_whitelist_check(self):
+        """Désactive la vérification de whitelist"""
+        if self.whitelist_checker is not None:
+            self.whitelist_checker.close()
+            self.whitelist_checker = None
+    
+    def enable_query(self, timeout: float = 2, retries: int = 1, concurrency: int = 1000, port: Optional[int] = None):
+        """Active l'interrogation Query (UDP) des serveurs trouvés (désactivée par défaut)"""
+        self.query_enricher = QueryEnricher(timeout=timeout, retries=retries, concurrency=concurrency, port=port)
+    
+    def disable_query(self):
+        """Désactive l'interrogation Query"""
+        if self.query_enricher is not None:
+            self.query_enricher.close()
+            self.query_enricher = None
+    
+    def scan_multiple_ranges(self, ip_ranges: List[str], ports: List[int] = None, max_threads: int = 100, timeout: int = 3,
+                             engine: str = "threads", concurrency: int = 5000, max_pending: int = None,
+                             sweep_timeout: float = 1, randomize: bool = True, seed: Optional[int] = None,
+                             workers: int = 1, checkpoint_path: Optional[str] = None,
+                             checkpoint_interval: float = 30):
+        """Scanne plusieurs plages d'IP en un seul parcours
+        
+        Une adresse commune à plusieurs plages n'est sondée qu'une fois et,
+        avec randomize, les plages sont parcourues dans un ordre
+        pseudo-aléatoire qui répartit la charge entre les sous-réseaux.
+        Avec checkpoint_path, un point de reprise est écrit toutes les
+        checkpoint_interval secondes et à l'arrêt (voir resume).
+        """
+        if ports is None:
+            ports = [DEFAULT_BEDROCK_PORT] if engine == "bedrock" else [25565]
+        
+        print(f"🔍 Scanner les plages: {', '.join(ip_ranges)}")
+        ip_ranges, duplicates = dedupe_ranges(ip_ranges)
+        if duplicates:
+            print(f"♻️  Plages qui se chevauchent: {duplicates * len(ports)} sondes en double évitées")
+        exclude = self.exclusions.intervals if self.exclusions is not None else None
+        targets = TargetGenerator(ip_ranges, ports, seed=seed, shuffle=randomize, exclude=exclude)
+        if exclude:
+            excluded = sum(end - start + 1 for start, end in parse_ranges(ip_ranges)) - targets.host_count
+            if excluded:
+                print(f"🚫 {excluded} adresses exclues (opt-out) ne seront pas sondées")
+        checkpoint = None
+        if checkpoint_path:
+            options = {'max_threads': max_threads, 'timeout': timeout, 'engine': engine,
+                       'concurrency': concurrency, 'max_pending': max_pending, 'sweep_timeout': sweep_timeout}
+            checkpoint = ScanCheckpoint(checkpoint_path, targets, options, interval=checkpoint_interval)
+        self.scan_targets(targets, max_threads, timeout, engine, concurrency, max_pending, sweep_timeout, workers,
+                          checkpoint)
+    
+    def scan_hosts(self, hosts: List[str], max_threads: int = 100, timeout: int = 3, engine: str = "threads",
+                   concurrency: int = 5000, max_pending: int = None, sweep_timeout: float = 1):
+        """Scanne une liste de noms d'hôte (entrées "hôte" ou "hôte:port", adresses IP acceptées)
+        
+        Les noms sont résolus en parallèle par self.resolver (SRV
+        _minecraft._tcp puis A, avec cache) et regroupés par point
+        d'accès: plusieurs noms menant au même ip:port ne donnent qu'une
+        sonde, dont le handshake annonce le premier nom.
+        """
+        print(f"🔎 Résolution de {len(hosts)} noms d'hôte...")
+        endpoints, unresolved = self.resolver.resolve_many(hosts)
+        for endpoint, entries in endpoints.items():
+            names = [name for name in dict.fromkeys(parse_host_entry(entry)[0] for entry in entries)
+                     if not is_ip_address(name)]
+            if names:
+                self._hostnames[endpoint] = names
+        grouped = sum(len(entries) - 1 for entries in endpoints.values())
+        print(f"📍 {len(endpoints)} points d'accès ({grouped} noms regroupés, {len(unresolved)} non résolus)")
+        self.scan_targets(list(endpoints), max_threads, timeout, engine, concurrency, max_pending, sweep_timeout)
+    
+    def resume(self, checkpoint_path: str, checkpoint_interval: float = 30):
+        """Reprend un scan là où son point de reprise l'a laissé (mêmes plages, ports et options)"""
+        checkpoint = ScanCheckpoint.load(checkpoint_path, checkpoint_interval)
+        if checkpoint.finished:
+            print(f"✅ Scan déjà terminé d'après {checkpoint_path}")
+        else:
+            print(f"⏯️  Reprise du scan: {', '.join(checkpoint.targets.ip_ranges)} "
+                  f"({checkpoint.progress}/{len(checkpoint.targets)} cibles déjà traitées)")
+        self.scan_targets(checkpoint.targets, checkpoint=checkpoint, **checkpoint.options)
     
     def stop_scan(self):
         """Arrête le scan en cours"""
@@ -441,45 +1085,52 @@ class MinecraftScanner:
     def clear_servers(self):
         """Efface la liste des serveurs"""
         self.servers.clear()
+        if self.table is not None:
+            self.table.clear()
         self.found_servers = 0
     
     def save_servers(self, filename: str):
-        """Sauvegarde les serveurs dans un fichier JSON"""
+        """Sauvegarde les serveurs dans un fichier JSON (chaque favicon une seule fois, à part)"""
         try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                servers_data = [server.to_dict() for server in self.servers]
-                json.dump(servers_data, f, indent=2, ensure_ascii=False)
+            if not self.keep_servers:
+                self.store.flush()
+            servers = list(self.iter_servers())
+            with open(filename, 'wb') as f:
+                data = {
+                    "servers": [server.to_dict() for server in servers],
+                    "favicons": favicon_store.export(server.favicon_hash for server in servers)
+                }
+                jsoncodec.dump(data, f, indent=True)
             print(f"💾 Serveurs sauvegardés dans {filename}")
         except Exception as e:
             print(f"❌ Erreur lors de la sauvegarde: {e}")
     
     def load_servers(self, filename: str):
-        """Charge les serveurs depuis un fichier JSON"""
+        """Charge les serveurs depuis un fichier JSON (format de save_servers ou ancienne liste)"""
         try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                servers_data = json.load(f)
+            with open(filename, 'rb') as f:
+                servers_data = jsoncodec.load(f)
+            
+            if isinstance(servers_data, dict):
+                favicon_store.load(servers_data.get('favicons', {}))
+                servers_data = servers_data.get('servers', [])
             
             self.servers.clear()
             for data in servers_data:
-                server = MinecraftServer(data['ip'], data['port'])
-                server.name = data.get('name', '')
-                server.description = data.get('description', '')
-                server.version = data.get('version', '')
-                server.protocol = data.get('protocol', 0)
-                server.players_online = data.get('players_online', 0)
-                server.players_max = data.get('players_max', 0)
-                server.players_list = data.get('players_list', [])
-                server.ping = data.get('ping', 0)
-                server.favicon = data.get('favicon')
-                server.whitelist = data.get('whitelist', False)
-                server.location = data.get('location', {'country': 'Unknown', 'city': 'Unknown', 'lat': 0, 'lon': 0})
-                server.last_seen = data.get('last_seen', time.time())
-                server.online = data.get('online', True)
-                
-                self.servers.append(server)
+                server = MinecraftServer.from_dict(data)
+                if server.hostnames:
+                    self._hostnames[(server.ip, server.port)] = server.hostnames
+                if self.keep_servers:
+                    self.servers.append(server)
+                else:
+                    self.store.add(server)  # Résultats dans la base seulement: import
             
-            self.found_servers = len(self.servers)
-            print(f"📂 {len(self.servers)} serveurs chargés depuis {filename}")
+            if not self.keep_servers:
+                self.store.flush()
+            self.found_servers = len(servers_data)
+            if self.table is not None:
+                self.table.rebuild(self.servers)
+            print(f"📂 {len(servers_data)} serveurs chargés depuis {filename}")
             
         except Exception as e:
             print(f"❌ Erreur lors du chargement: {e}")
@@ -0,0 +1,133 @@
+"""
+Scan multi-processus
+Découpe déterministe des cibles entre N processus, chacun avec son propre moteur de ping
+"""
+
+import time
+import queue
+import threading
+import multiprocessing
+from typing import Dict
+
+# Intervalle minimal entre deux remontées de progrès d'un processus
+PROGRESS_INTERVAL = 0.2
+
+
+def _shard_main(state: Dict, options: Dict, channel, stop_event):
+    """Point d'entrée d'un processus: scanne un fragment et remonte les résultats au parent"""
+    try:
+        from .scanner import MinecraftScanner
+        from .geoip import GeoLocator
+        from .targets import TargetGenerator
+    except ImportError:
+        from scanner import MinecraftScanner
+        from geoip import GeoLocator
+        from targets import TargetGenerator
+
+    class ShardScanner(MinecraftScanner):
+        """Scanner de fragment: ne fait que la découverte, l'enrichissement est fait par le parent"""
+
+        def __init__(self):
+            super().__init__(geolocator=GeoLocator(providers=[]))
+            self._unsent = 0
+            self._last_sent = time.time()
+
+        def _record_result(self, server=None, count: int = 1, target=None):
+            self.scanned_ips += count
+            self._unsent += count
+            now = time.time()
+            if server is not None:
+                channel.put(('found', self._unsent, server.to_dict(embed_favicon=True)))
+            elif now - self._last_sent >= PROGRESS_INTERVAL:
+                channel.put(('progress', self._unsent))
+            else:
+                return
+            self._unsent = 0
+            self._last_sent = now
+
+        def _call_callbacks(self, event: str, *args, **kwargs):
+            pass  # Les événements sont émis par le parent
+
+    scanner = ShardScanner()
+
+    def watch_stop():
+        # Scrutation plutôt que stop_event.wait(): un processus qui se termine
+        # pendant wait() bloquerait ensuite stop_event.set() dans le parent
+        while not stop_event.is_set():
+            time.sleep(PROGRESS_INTERVAL)
+        scanner.stop_scan()
+
+    threading.Thread(target=watch_stop, daemon=True).start()
+
+    try:
+        scanner.scan_targets(TargetGenerator.from_state(state), **options)
+        if scanner._unsent:
+            channel.put(('progress', scanner._unsent))
+    except Exception as e:
+        channel.put(('error', f"{type(e).__name__}: {e}"))
+    finally:
+        channel.put(('done',))
+
+
+class ShardedScan:
+    """Répartit un TargetGenerator sur plusieurs processus et fusionne leurs résultats
+
+    Les processus remontent des tuples compacts par une multiprocessing.Queue:
+    ('progress', n) tous les PROGRESS_INTERVAL, ('found', n, serveur) pour
+    chaque découverte. Le parent rejoue ces messages dans son propre scanner,
+    qui émet un seul flux server_found / progress_update.
+    """
+
+    def __init__(self, scanner, targets, workers: int, options: Dict):
+        self.scanner = scanner
+        self.targets = targets
+        self.workers = workers
+        self.options = options
+
+    def run(self):
+        """Lance les processus et traite leurs messages jusqu'à la fin (bloquant)"""
+        try:
+            from .scanner import MinecraftServer
+        except ImportError:
+            from scanner import MinecraftServer
+
+        # spawn et non fork: le parent a déjà des threads (Tk, résolveur, Query, géolocalisation,
+        # whitelist) et un processus copié pendant qu'ils tiennent un verrou pourrait s'y bloquer
+        context = multiprocessing.get_context('spawn')
+        channel = context.Queue()
+        stop_event = context.Event()
+        processes = []
+        for index in range(self.workers):
+            shard = self.targets.shard(index, self.workers)
+            process = context.Process(target=_shard_main, args=(shard.state(), self.options, channel, stop_event),
+                                      daemon=True)
+            process.start()
+            processes.append(process)
+
+        running = len(processes)
+        try:
+            while running:
+                if self.scanner.stop_flag.is_set():
+                    stop_event.set()
+                try:
+                    message = channel.get(timeout=0.5)
+                except queue.Empty:
+                    if not any(process.is_alive() for process in processes):
+                        break  # Processus tués sans message de fin
+                    continue
+
+                kind = message[0]
+                if kind == 'done':
+                    running -= 1
+                elif kind == 'progress':
+                    self.scanner._record_result(None, message[1])
+                elif kind == 'found':
+                    self.scanner._record_result(MinecraftServer.from_dict(message[2]), message[1])
+                elif kind == 'error':
+                    print(f"❌ Erreur dans un processus de scan: {message[1]}")
+        finally:
+            stop_event.set()
+            for process in processes:
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.terminate()
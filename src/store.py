@@ -0,0 +1,320 @@
+"""
+Stockage des résultats dans SQLite
+Base en mode WAL, écritures groupées en transactions par un thread dédié, lecture par pages
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    from .favicons import favicon_store
+    from . import jsoncodec
+except ImportError:
+    from favicons import favicon_store
+    import jsoncodec
+
+# Les index pays et version portent aussi last_seen: une page filtrée est lue dans l'ordre du tri par défaut
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS servers (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ip TEXT NOT NULL,
+    port INTEGER NOT NULL,
+    edition TEXT NOT NULL,
+    name TEXT NOT NULL,
+    version TEXT NOT NULL,
+    players_online INTEGER NOT NULL,
+    players_max INTEGER NOT NULL,
+    ping INTEGER NOT NULL,
+    country TEXT NOT NULL,
+    city TEXT NOT NULL,
+    online INTEGER NOT NULL,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    search_text TEXT NOT NULL DEFAULT '',
+    data TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS servers_endpoint ON servers (ip, port);
+CREATE INDEX IF NOT EXISTS servers_country ON servers (country, last_seen);
+CREATE INDEX IF NOT EXISTS servers_version ON servers (version, last_seen);
+CREATE INDEX IF NOT EXISTS servers_last_seen ON servers (last_seen);
+CREATE TABLE IF NOT EXISTS history (
+    ip TEXT NOT NULL,
+    port INTEGER NOT NULL,
+    seen REAL NOT NULL,
+    online INTEGER NOT NULL,
+    players_online INTEGER NOT NULL,
+    ping INTEGER NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS history_endpoint ON history (ip, port, seen);
+CREATE TABLE IF NOT EXISTS favicons (
+    hash TEXT PRIMARY KEY,
+    image BLOB NOT NULL
+);
+"""
+
+_UPSERT = """
+INSERT INTO servers (ip, port, edition, name, version, players_online, players_max, ping, country, city,
+                     online, first_seen, last_seen, search_text, data)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (ip, port) DO UPDATE SET
+    edition = excluded.edition, name = excluded.name, version = excluded.version,
+    players_online = excluded.players_online, players_max = excluded.players_max, ping = excluded.ping,
+    country = excluded.country, city = excluded.city, online = excluded.online,
+    last_seen = excluded.last_seen, search_text = excluded.search_text, data = excluded.data
+"""
+
+# Colonnes acceptées pour le tri des pages
+ORDER_COLUMNS = ('last_seen', 'first_seen', 'players_online', 'ping', 'ip', 'country', 'version', 'name')
+
+
+def _where(country: Optional[str] = None, version: Optional[str] = None, search: Optional[str] = None,
+           online: Optional[bool] = None, min_players: Optional[int] = None) -> Tuple[str, List]:
+    """Clause WHERE et paramètres des filtres communs à count(), page() et iter_servers()"""
+    clauses, params = [], []
+    if country:
+        clauses.append("country = ?")
+        params.append(country)
+    if version:
+        clauses.append("version = ?")
+        params.append(version)
+    if search:
+        # Même texte que MinecraftServer.search_text (déjà en minuscules), jamais le JSON de data
+        clauses.append("search_text LIKE ? ESCAPE '\\'")
+        pattern = search.lower().replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        params.append(f"%{pattern}%")
+    if online is not None:
+        clauses.append("online = ?")
+        params.append(int(online))
+    if min_players is not None:
+        clauses.append("players_online >= ?")
+        params.append(min_players)
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+class ResultStore:
+    """Résultats de scan persistés dans une base SQLite
+
+    Chaque serveur occupe une ligne unique par (ip, port), mise à jour à
+    chaque nouvelle observation (first_seen est conservé); avec history,
+    chaque observation est aussi ajoutée à la table history. Les écritures
+    passent par une file: un thread les regroupe par batch_size ou
+    max_delay secondes et les applique en une transaction, sans bloquer
+    le scan. Le mode WAL laisse l'interface lire pendant les écritures.
+    Les lectures rendent des pages de MinecraftServer, jamais toute la base.
+    """
+
+    def __init__(self, path: str, batch_size: int = 500, max_delay: float = 1.0, history: bool = True):
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self.max_delay = max_delay
+        self.history = history
+        self.written = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._writer = self._connect()
+        self._writer.execute("PRAGMA journal_mode=WAL")
+        self._writer.executescript(_SCHEMA)
+        self._migrate()
+        self._reader = self._connect()
+        self._read_lock = threading.Lock()
+        self._known_favicons = set()
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _migrate(self):
+        """Ajoute la colonne search_text aux bases créées avant elle (remplie depuis data) et son index"""
+        db = self._writer
+        columns = {row[1] for row in db.execute("PRAGMA table_info(servers)")}
+        if 'search_text' not in columns:
+            try:
+                from .scanner import MinecraftServer
+            except ImportError:
+                from scanner import MinecraftServer
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                db.execute("ALTER TABLE servers ADD COLUMN search_text TEXT NOT NULL DEFAULT ''")
+                rows = db.execute("SELECT id, data FROM servers").fetchall()
+                db.executemany("UPDATE servers SET search_text = ? WHERE id = ?",
+                               ((MinecraftServer.from_dict(jsoncodec.loads(data)).search_text, row_id)
+                                for row_id, data in rows))
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+        db.execute("CREATE INDEX IF NOT EXISTS servers_search ON servers (search_text)")
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, timeout=60, isolation_level=None, check_same_thread=False)
+        db.execute("PRAGMA synchronous=NORMAL")  # Suffisant en WAL: une coupure ne perd que la dernière transaction
+        return db
+
+    # Écriture
+
+    def add(self, server):
+        """Planifie l'enregistrement (ou la mise à jour) d'un serveur"""
+        self._queue.put(('upsert', server))
+
+    def remove(self, server):
+        """Planifie la suppression d'un serveur (whitelist détectée)"""
+        self._queue.put(('remove', (server.ip, server.port)))
+
+    def flush(self):
+        """Attend que toutes les écritures planifiées soient en base"""
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            if batch[0] is None:
+                self._queue.task_done()
+                return
+            deadline = time.time() + self.max_delay
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)  # Arrêt après ce lot
+                    self._queue.task_done()
+                    break
+                batch.append(item)
+
+            try:
+                self._write(batch)
+            except Exception as e:
+                print(f"Erreur d'écriture des résultats: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, batch: List):
+        """Applique un lot en une transaction"""
+        servers, history, favicons, removed = [], [], [], []
+        for action, item in batch:
+            if action == 'remove':
+                removed.append(item)
+                continue
+            data = item.to_dict()
+            servers.append((data['ip'], data['port'], data['edition'], data['name'], data['version'],
+                            data['players_online'], data['players_max'], data['ping'],
+                            data['location']['country'], data['location']['city'], int(data['online']),
+                            data['last_seen'], data['last_seen'], item.search_text, jsoncodec.dumps(data)))
+            if self.history:
+                history.append((data['ip'], data['port'], data['last_seen'], int(data['online']),
+                                data['players_online'], data['ping']))
+            key = data['favicon_hash']
+            if key and key not in self._known_favicons:
+                image = favicon_store.get(key)
+                if image is not None:
+                    favicons.append((key, image))
+                    self._known_favicons.add(key)
+
+        db = self._writer
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.executemany(_UPSERT, servers)
+            # Une mise à jour sans nouveau ping (whitelist, Query) garde le même last_seen: ignorée
+            db.executemany("INSERT OR IGNORE INTO history (ip, port, seen, online, players_online, ping) "
+                           "VALUES (?, ?, ?, ?, ?, ?)", history)
+            db.executemany("INSERT OR IGNORE INTO favicons (hash, image) VALUES (?, ?)", favicons)
+            db.executemany("DELETE FROM servers WHERE ip = ? AND port = ?", removed)
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+        self.written += len(servers)
+
+    # Lecture
+
+    def _query(self, sql: str, params=()) -> List[Tuple]:
+        with self._read_lock:
+            return self._reader.execute(sql, params).fetchall()
+
+    def count(self, **filters) -> int:
+        """Nombre de serveurs enregistrés (filtres: country, version, search, online, min_players)"""
+        where, params = _where(**filters)
+        return self._query(f"SELECT COUNT(*) FROM servers{where}", params)[0][0]
+
+    def page(self, offset: int = 0, limit: int = 100, order_by: str = 'last_seen', descending: bool = True,
+             **filters) -> List:
+        """Une page de serveurs, triée par order_by (voir ORDER_COLUMNS)"""
+        if order_by not in ORDER_COLUMNS:
+            raise ValueError(f"Tri inconnu: {order_by}")
+        where, params = _where(**filters)
+        direction = "DESC" if descending else "ASC"
+        rows = self._query(f"SELECT data FROM servers{where} ORDER BY {order_by} {direction}, id {direction} "
+                           f"LIMIT ? OFFSET ?", params + [limit, max(0, offset)])
+        return self._servers(rows)
+
+    def iter_servers(self, page_size: int = 1000, **filters) -> Iterator:
+        """Tous les serveurs, lus par pages de page_size (pagination par id, sans OFFSET)"""
+        where, params = _where(**filters)
+        where = f"{where} AND id > ?" if where else " WHERE id > ?"
+        last_id = 0
+        while True:
+            rows = self._query(f"SELECT data, id FROM servers{where} ORDER BY id LIMIT ?",
+                               params + [last_id, page_size])
+            if not rows:
+                return
+            last_id = rows[-1][1]
+            yield from self._servers(rows)
+
+    def _servers(self, rows: List[Tuple]) -> List:
+        """MinecraftServer des lignes lues, favicons rechargés dans le magasin partagé"""
+        try:
+            from .scanner import MinecraftServer
+        except ImportError:
+            from scanner import MinecraftServer
+
+        servers = [MinecraftServer.from_dict(jsoncodec.loads(row[0])) for row in rows]
+        missing = {server.favicon_hash for server in servers
+                   if server.favicon_hash and favicon_store.get(server.favicon_hash) is None}
+        if missing and favicon_store.retain:
+            placeholders = ", ".join("?" * len(missing))
+            for key, image in self._query(f"SELECT hash, image FROM favicons WHERE hash IN ({placeholders})",
+                                          list(missing)):
+                favicon_store.add_bytes(image)
+        return servers
+
+    def countries(self) -> List[str]:
+        """Pays présents (parcours de l'index country)"""
+        return [country for country, in self._query("SELECT DISTINCT country FROM servers ORDER BY country")]
+
+    def stats(self, top: int = 5, **filters) -> Dict:
+        """Totaux et répartitions calculés par SQLite (principaux pays et versions)"""
+        where, params = _where(**filters)
+        total, players = self._query(f"SELECT COUNT(*), COALESCE(SUM(players_online), 0) FROM servers{where}",
+                                     params)[0]
+        return {
+            'servers': total,
+            'players_online': players,
+            'countries': self._query(f"SELECT country, COUNT(*) AS n FROM servers{where} GROUP BY country "
+                                     f"ORDER BY n DESC LIMIT ?", params + [top]),
+            'versions': self._query(f"SELECT version, COUNT(*) AS n FROM servers{where} GROUP BY version "
+                                    f"ORDER BY n DESC LIMIT ?", params + [top]),
+        }
+
+    def get_history(self, ip: str, port: int, limit: int = 100) -> List[Dict]:
+        """Dernières observations d'un serveur, de la plus récente à la plus ancienne"""
+        rows = self._query("SELECT seen, online, players_online, ping FROM history WHERE ip = ? AND port = ? "
+                           "ORDER BY seen DESC LIMIT ?", (ip, port, limit))
+        return [{'seen': seen, 'online': bool(online), 'players_online': players, 'ping': ping}
+                for seen, online, players, ping in rows]
+
+    def close(self):
+        """Écrit les lots en attente puis ferme la base"""
+        self._queue.put(None)
+        self._thread.join()
+        self._writer.close()
+        with self._read_lock:
+            self._reader.close()
@@ -0,0 +1,360 @@
+"""
+Génération des cibles de scan (ip, port)
+Entiers 32 bits, permutation cyclique pseudo-aléatoire (à la zmap), mémoire O(1) et reprise par curseur
+"""
+
+import bisect
+import random
+import socket
+import struct
+import ipaddress
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_PACK_IPV4 = struct.Struct('!I')
+
+# Bases suffisantes pour un test de Miller-Rabin déterministe jusqu'à 3.3e24
+_MR_BASES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37)
+
+
+def ip_to_int(ip: str) -> int:
+    """Convertit une adresse IPv4 texte en entier"""
+    return _PACK_IPV4.unpack(socket.inet_aton(ip))[0]
+
+
+def int_to_ip(value: int) -> str:
+    """Convertit un entier en adresse IPv4 texte"""
+    return socket.inet_ntoa(_PACK_IPV4.pack(value))
+
+
+def host_interval(network: ipaddress.IPv4Network) -> Tuple[int, int]:
+    """Bornes incluses des adresses de network.hosts() (réseau et broadcast exclus sauf /31 et /32)"""
+    first = int(network.network_address)
+    last = int(network.broadcast_address)
+    if network.prefixlen < 31:
+        return first + 1, last - 1
+    return first, last
+
+
+def parse_ranges(ip_ranges: List[str]) -> List[Tuple[int, int]]:
+    """Convertit des plages CIDR en intervalles d'hôtes triés et fusionnés"""
+    intervals = []
+    for ip_range in ip_ranges:
+        network = ipaddress.ip_network(ip_range, strict=False)
+        if network.version != 4:
+            raise ValueError(f"Seules les plages IPv4 sont supportées: {ip_range}")
+        intervals.append(host_interval(network))
+    return merge_intervals(intervals)
+
+
+def merge_intervals(intervals: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Trie et fusionne des intervalles [début, fin] qui se chevauchent ou se touchent"""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1] + 1:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def subtract_intervals(intervals: List[Tuple[int, int]], removed: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Retire de intervals (triés, fusionnés) les adresses de removed (triés, fusionnés), en un seul passage"""
+    result = []
+    j = 0
+    for start, end in intervals:
+        # Sauter les intervalles retirés entièrement avant start
+        while j < len(removed) and removed[j][1] < start:
+            j += 1
+        k = j
+        while k < len(removed) and removed[k][0] <= end:
+            if removed[k][0] > start:
+                result.append((start, removed[k][0] - 1))
+            start = max(start, removed[k][1] + 1)
+            k += 1
+        if start <= end:
+            result.append((start, end))
+    return result
+
+
+def _is_prime(n: int) -> bool:
+    """Test de primalité de Miller-Rabin (déterministe dans notre domaine)"""
+    if n < 2:
+        return False
+    for p in _MR_BASES:
+        if n % p == 0:
+            return n == p
+    d, r = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        r += 1
+    for a in _MR_BASES:
+        x = pow(a, d, n)
+        if x in (1, n - 1):
+            continue
+        for _ in range(r - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def _next_prime(n: int) -> int:
+    """Plus petit nombre premier strictement supérieur à n"""
+    candidate = n + 1
+    while not _is_prime(candidate):
+        candidate += 1
+    return candidate
+
+
+def _pollard_rho(n: int, rng: random.Random) -> int:
+    """Trouve un facteur non trivial de n (composé)"""
+    if n % 2 == 0:
+        return 2
+    while True:
+        x = y = rng.randrange(2, n)
+        c = rng.randrange(1, n)
+        d = 1
+        while d == 1:
+            x = (x * x + c) % n
+            y = (y * y + c) % n
+            y = (y * y + c) % n
+            d = _gcd(abs(x - y), n)
+        if d != n:
+            return d
+
+
+def _gcd(a: int, b: int) -> int:
+    while b:
+        a, b = b, a % b
+    return a
+
+
+def _prime_factors(n: int, rng: random.Random) -> List[int]:
+    """Facteurs premiers distincts de n"""
+    factors = set()
+    for p in (2, 3, 5, 7, 11, 13):
+        while n % p == 0:
+            factors.add(p)
+            n //= p
+    stack = [n] if n > 1 else []
+    while stack:
+        m = stack.pop()
+        if _is_prime(m):
+            factors.add(m)
+        else:
+            d = _pollard_rho(m, rng)
+            stack.extend((d, m // d))
+    return sorted(factors)
+
+
+def _primitive_root(p: int, rng: random.Random) -> int:
+    """Générateur aléatoire du groupe multiplicatif modulo p"""
+    factors = _prime_factors(p - 1, rng)
+    while True:
+        g = rng.randrange(2, p)
+        if all(pow(g, (p - 1) // q, p) != 1 for q in factors):
+            return g
+
+
+class TargetGenerator:
+    """Parcourt l'union de plages CIDR × ports dans un ordre pseudo-aléatoire
+
+    Chaque cible a un indice i dans [0, total): hôte i // len(ports), port
+    i % len(ports). Avec shuffle=True, les indices sont visités via le groupe
+    multiplicatif modulo un premier p > total (x -> x * g mod p, comme zmap):
+    les cibles successives tombent dans des sous-réseaux différents, sans
+    rien stocker d'autre que l'élément courant. Le curseur (nombre de pas
+    effectués) suffit pour reprendre un parcours interrompu.
+
+    shard(i, n) découpe le cycle de façon déterministe: le fragment i visite
+    les pas i, i + n, i + 2n... (cursor compte alors les pas du fragment).
+    chunk(start, stop) restreint le parcours aux pas [start, stop).
+
+    Les intervalles exclude (liste d'exclusion compilée) sont retirés des
+    plages avant numérotation: une adresse exclue n'a pas d'indice et ne
+    peut donc jamais être générée.
+    """
+
+    def __init__(self, ip_ranges: List[str], ports: List[int], seed: Optional[int] = None, shuffle: bool = True,
+                 cursor: int = 0, shard_index: int = 0, shard_count: int = 1, start: int = 0,
+                 stop: Optional[int] = None, exclude: Optional[List[Tuple[int, int]]] = None):
+        self.ip_ranges = list(ip_ranges)
+        self.ports = list(ports)
+        self.shuffle = shuffle
+        self.seed = seed if seed is not None else random.randrange(1 << 32)
+        self.exclude = [tuple(interval) for interval in exclude] if exclude else []
+
+        self.intervals = parse_ranges(self.ip_ranges)
+        if self.exclude:
+            self.intervals = subtract_intervals(self.intervals, self.exclude)
+        self._starts = [start for start, _ in self.intervals]
+        self._offsets = []  # Indice du premier hôte de chaque intervalle
+        host_count = 0
+        for low, high in self.intervals:
+            self._offsets.append(host_count)
+            host_count += high - low + 1
+        self.host_count = host_count
+        self.total = host_count * len(self.ports)
+
+        if shuffle and self.total:
+            rng = random.Random(self.seed)
+            self.prime = _next_prime(max(self.total, 2))
+            self.generator = _primitive_root(self.prime, rng)
+            self.first = rng.randrange(1, self.prime)
+            self.cycle_length = self.prime - 1
+        else:
+            self.prime = self.generator = self.first = None
+            self.cycle_length = self.total
+
+        self.shard_index = shard_index
+        self.shard_count = shard_count
+        # Nombre de pas du cycle qui reviennent à ce fragment
+        self.shard_length = len(range(shard_index, self.cycle_length, shard_count))
+        # Fenêtre de pas [start, stop) parcourue par ce générateur
+        self.start = start
+        self.stop = self.shard_length if stop is None else min(stop, self.shard_length)
+        self.cursor = max(cursor, start)
+
+    def __len__(self) -> int:
+        """Nombre de cibles de la fenêtre (exact pour le parcours complet, majorant sinon)"""
+        if self.shard_count == 1 and self.start == 0 and self.stop == self.shard_length:
+            return self.total
+        return self.stop - self.start
+
+    def __iter__(self) -> Iterator[Tuple[str, int]]:
+        return self.iter_targets()
+
+    def state(self) -> Dict:
+        """État sérialisable permettant de recréer le générateur au même point"""
+        return {'ip_ranges': self.ip_ranges, 'ports': self.ports, 'seed': self.seed,
+                'shuffle': self.shuffle, 'cursor': self.cursor,
+                'shard_index': self.shard_index, 'shard_count': self.shard_count,
+                'start': self.start, 'stop': self.stop, 'exclude': self.exclude}
+
+    @classmethod
+    def from_state(cls, state: Dict) -> 'TargetGenerator':
+        """Recrée un générateur depuis state()"""
+        return cls(state['ip_ranges'], state['ports'], seed=state['seed'], shuffle=state['shuffle'],
+                   cursor=state.get('cursor', 0), shard_index=state.get('shard_index', 0),
+                   shard_count=state.get('shard_count', 1), start=state.get('start', 0),
+                   stop=state.get('stop'), exclude=state.get('exclude'))
+
+    def shard(self, index: int, count: int) -> 'TargetGenerator':
+        """Fragment index sur count du parcours (mêmes plages, même graine)"""
+        if self.shard_count != 1 or self.start != 0 or self.stop != self.shard_length:
+            raise ValueError("Ce générateur est déjà un fragment")
+        if not 0 <= index < count:
+            raise ValueError(f"Fragment invalide: {index}/{count}")
+        return TargetGenerator(self.ip_ranges, self.ports, seed=self.seed, shuffle=self.shuffle,
+                               shard_index=index, shard_count=count, exclude=self.exclude)
+
+    def chunk(self, start: int, stop: int) -> 'TargetGenerator':
+        """Générateur limité aux pas [start, stop) du parcours (mêmes plages, même graine)"""
+        return TargetGenerator(self.ip_ranges, self.ports, seed=self.seed, shuffle=self.shuffle,
+                               shard_index=self.shard_index, shard_count=self.shard_count,
+                               start=start, stop=stop, exclude=self.exclude)
+
+    def chunks(self, size: int) -> Iterator[Tuple[int, int]]:
+        """Découpe la fenêtre en intervalles de pas [début, fin) de size pas au plus"""
+        for start in range(self.start, self.stop, size):
+            yield start, min(start + size, self.stop)
+
+    def host_at(self, host_index: int) -> int:
+        """Adresse (entier) du host_index-ième hôte de l'union des plages"""
+        position = bisect.bisect_right(self._offsets, host_index) - 1
+        return self._starts[position] + host_index - self._offsets[position]
+
+    def target_at(self, index: int) -> Tuple[int, int]:
+        """Cible (ip entière, port) d'indice index"""
+        host_index, port_index = divmod(index, len(self.ports))
+        return self.host_at(host_index), self.ports[port_index]
+
+    def iter_indices(self, start: Optional[int] = None, stop: Optional[int] = None) -> Iterator[int]:
+        """Indices de cibles visités entre les pas start et stop du fragment (curseur mis à jour)"""
+        if start is None:
+            start = self.cursor
+        if stop is None or stop > self.stop:
+            stop = self.stop
+        offset, stride = self.shard_index, self.shard_count
+
+        if not self.shuffle:
+            for step in range(start, stop):
+                self.cursor = step + 1
+                yield offset + step * stride
+            return
+
+        prime, total = self.prime, self.total
+        multiplier = pow(self.generator, stride, prime)
+        element = self.first * pow(self.generator, offset + start * stride, prime) % prime
+        for step in range(start, stop):
+            index = element - 1
+            element = element * multiplier % prime
+            self.cursor = step + 1
+            if index < total:
+                yield index
+
+    def iter_int_targets(self, start: Optional[int] = None, stop: Optional[int] = None) -> Iterator[Tuple[int, int]]:
+        """Cibles (ip entière, port) dans l'ordre du parcours"""
+        target_at = self.target_at
+        for index in self.iter_indices(start, stop):
+            yield target_at(index)
+
+    def iter_targets(self, start: Optional[int] = None, stop: Optional[int] = None) -> Iterator[Tuple[str, int]]:
+        """Cibles (ip texte, port) dans l'ordre du parcours"""
+        pack, ntoa = _PACK_IPV4.pack, socket.inet_ntoa
+        for ip, port in self.iter_int_targets(start, stop):
+            yield ntoa(pack(ip)), port
+
+    def iter_blocks(self, block_size: int = 65536, start: Optional[int] = None,
+                    stop: Optional[int] = None) -> Iterator[Tuple['np.ndarray', 'np.ndarray']]:
+        """Cibles par blocs NumPy (ips uint32, ports uint16), calculés de façon vectorisée"""
+        if np is None:
+            raise ImportError("NumPy n'est pas installé (pip install numpy)")
+        if start is None:
+            start = self.cursor
+        if stop is None or stop > self.stop:
+            stop = self.stop
+        offset, stride = self.shard_index, self.shard_count
+
+        starts = np.array(self._starts, dtype=np.int64)
+        offsets = np.array(self._offsets, dtype=np.int64)
+        ports = np.array(self.ports, dtype=np.uint16)
+        nports = len(self.ports)
+
+        # Les produits element * g^j tiennent dans un uint64 tant que p < 2^32
+        vectorized = self.shuffle and self.prime < (1 << 32)
+        if vectorized:
+            multiplier = pow(self.generator, stride, self.prime)
+            powers = np.empty(block_size, dtype=np.uint64)
+            value = 1
+            for j in range(block_size):
+                powers[j] = value
+                value = value * multiplier % self.prime
+            block_multiplier = value  # (g^stride)^block_size mod p
+            element = self.first * pow(self.generator, offset + start * stride, self.prime) % self.prime
+
+        for block_start in range(start, stop, block_size):
+            count = min(block_size, stop - block_start)
+            if not self.shuffle:
+                indices = offset + np.arange(block_start, block_start + count, dtype=np.int64) * stride
+            elif vectorized:
+                elements = (powers[:count] * np.uint64(element)) % np.uint64(self.prime)
+                element = element * block_multiplier % self.prime
+                indices = elements.astype(np.int64) - 1
+                indices = indices[indices < self.total]
+            else:
+                indices = np.fromiter(self.iter_indices(block_start, block_start + count), dtype=np.int64)
+            self.cursor = block_start + count
+
+            host_indices, port_indices = np.divmod(indices, nports)
+            positions = np.searchsorted(offsets, host_indices, side='right') - 1
+            ips = (starts[positions] + host_indices - offsets[positions]).astype(np.uint32)
+            yield ips, ports[port_indices]
@@ -3,9 +3,22 @@ Fonctions utilitaires pour MineSpyder
 """
 
 import ipaddress
+import os
 import socket
-import re
-from typing import List, Tuple, Optional
+from typing import Any, List, Tuple, Optional
+
+try:
+    from .targets import host_interval, int_to_ip
+    from .exclusions import ExclusionList
+    from .rangeset import dedupe_ranges
+    from .chat import parse_motd
+    from . import jsoncodec
+except ImportError:
+    from targets import host_interval, int_to_ip
+    from exclusions import ExclusionList
+    from rangeset import dedupe_ranges
+    from chat import parse_motd
+    import jsoncodec
 
 def validate_ip_address(ip: str) -> bool:
     """Valide si une chaîne est une adresse IP valide"""
@@ -27,16 +40,13 @@ def expand_ip_range(ip_range: str, max_ips: int = 1000) -> List[str]:
     """Expand une plage IP en liste d'adresses individuelles"""
     try:
         network = ipaddress.ip_network(ip_range, strict=False)
-        ips = []
-        count = 0
         
-        for ip in network.hosts():
-            if count >= max_ips:
-                break
-            ips.append(str(ip))
-            count += 1
+        if network.version != 4:
+            return [str(ip) for ip, _ in zip(network.hosts(), range(max_ips))]
         
-        return ips
+        # IPv4: calcul sur des entiers, sans objet ipaddress par adresse
+        first, last = host_interval(network)
+        return [int_to_ip(value) for value in range(first, min(last + 1, first + max_ips))]
     except ValueError:
         return []
 
@@ -52,25 +62,22 @@ def is_port_open(ip: str, port: int, timeout: float = 3.0) -> bool:
         return False
 
 def parse_minecraft_motd(motd_text: str) -> str:
-    """Parse et nettoie un MOTD Minecraft (supprime les codes de couleur)"""
+    """Parse et nettoie un MOTD Minecraft (supprime les codes de couleur)
+    
+    Accepte un texte à codes § ou un composant de chat JSON (texte,
+    extra, translate), aplati en un seul parcours par chat.parse_motd.
+    """
     if not motd_text:
         return ""
     
-    # Supprimer les codes de couleur Minecraft (§ suivi d'un caractère)
-    clean_text = re.sub(r'§.', '', motd_text)
-    
-    # Supprimer les codes de couleur JSON
-    clean_text = re.sub(r'"color":\s*"[^"]*"', '', clean_text)
-    clean_text = re.sub(r'"bold":\s*(?:true|false)', '', clean_text)
-    clean_text = re.sub(r'"italic":\s*(?:true|false)', '', clean_text)
-    clean_text = re.sub(r'"underlined":\s*(?:true|false)', '', clean_text)
-    clean_text = re.sub(r'"strikethrough":\s*(?:true|false)', '', clean_text)
-    clean_text = re.sub(r'"obfuscated":\s*(?:true|false)', '', clean_text)
-    
-    # Nettoyer les espaces multiples
-    clean_text = re.sub(r'\s+', ' ', clean_text)
+    component = motd_text
+    if motd_text.lstrip()[:1] in ('{', '[', '"'):
+        try:
+            component = jsoncodec.loads(motd_text)
+        except ValueError:
+            pass
     
-    return clean_text.strip()
+    return parse_motd(component)[0].replace('\n', ' ')
 
 def format_player_count(online: int, max_players: int) -> str:
     """Formate le nombre de joueurs de manière lisible"""
@@ -170,6 +177,20 @@ def sanitize_filename(filename: str) -> str:
     
     return filename or "unnamed"
 
+def write_json_atomic(path: str, data: Any):
+    """Écrit data en JSON dans path (fichier temporaire puis remplacement atomique, dossier créé au besoin)
+
+    Un arrêt pendant l'écriture laisse l'ancien fichier intact. Les
+    erreurs sont propagées: l'appelant choisit son message.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = path + ".tmp"
+    with open(temp_path, 'wb') as f:
+        jsoncodec.dump(data, f)
+    os.replace(temp_path, path)
+
 def format_bytes(bytes_count: int) -> str:
     """Formate un nombre d'octets de manière lisible"""
     for unit in ['B', 'KB', 'MB', 'GB']:
@@ -233,12 +254,20 @@ def get_public_ip_ranges() -> List[str]:
         "52.96.0.0/12",     # Microsoft Azure
     ]
 
+# Plages sensibles, jamais scannées
+SENSITIVE_RANGES = [
+    ipaddress.ip_network("127.0.0.0/8"),      # Loopback
+    ipaddress.ip_network("169.254.0.0/16"),   # Link-local
+    ipaddress.ip_network("224.0.0.0/4"),      # Multicast
+    ipaddress.ip_network("240.0.0.0/4"),      # Reserved
+]
+
 class IPRangeValidator:
     """Validateur de plages IP avec vérifications de sécurité"""
     
     @staticmethod
-    def is_safe_to_scan(ip_range: str) -> Tuple[bool, str]:
-        """Vérifie si une plage IP est sûre à scanner"""
+    def is_safe_to_scan(ip_range: str, exclusions: Optional[ExclusionList] = None) -> Tuple[bool, str]:
+        """Vérifie si une plage IP est sûre à scanner (et non couverte par la liste d'exclusion)"""
         try:
             network = ipaddress.ip_network(ip_range, strict=False)
             
@@ -251,17 +280,18 @@ class IPRangeValidator:
                 return False, "Plage IP trop large (max 65536 adresses)"
             
             # Vérifier les plages sensibles
-            sensitive_ranges = [
-                "127.0.0.0/8",      # Loopback
-                "169.254.0.0/16",   # Link-local
-                "224.0.0.0/4",      # Multicast
-                "240.0.0.0/4",      # Reserved
-            ]
-            
-            for sensitive in sensitive_ranges:
-                sensitive_net = ipaddress.ip_network(sensitive)
+            for sensitive_net in SENSITIVE_RANGES:
                 if network.overlaps(sensitive_net):
-                    return False, f"Plage sensible détectée: {sensitive}"
+                    return False, f"Plage sensible détectée: {sensitive_net}"
+            
+            # Vérifier la liste d'exclusion (les adresses exclues sont sautées pendant le scan)
+            if exclusions is not None and network.version == 4:
+                first, last = int(network.network_address), int(network.broadcast_address)
+                excluded = exclusions.overlap(first, last)
+                if excluded == last - first + 1:
+                    return False, "Plage entièrement exclue (opt-out)"
+                if excluded:
+                    return True, f"Plage IP valide ({excluded} adresses exclues seront ignorées)"
             
             return True, "Plage IP valide"
             
@@ -304,3 +334,9 @@ def get_country_ip_ranges() -> dict:
             "101.160.0.0/11"
         ]
     }
+
+def get_countries_ip_ranges(countries: List[str]) -> Tuple[List[str], int]:
+    """Plages de plusieurs pays sans doublons, avec le nombre d'adresses communes à plusieurs plages"""
+    country_ranges = get_country_ip_ranges()
+    ip_ranges = [ip_range for country in countries for ip_range in country_ranges.get(country, [])]
+    return dedupe_ranges(ip_ranges)
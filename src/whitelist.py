@@ -0,0 +1,109 @@
+"""
+Vérification différée des whitelists
+Étape d'enrichissement optionnelle, découplée de la découverte, avec cache par (ip, port, protocole)
+"""
+
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Optional
+
+try:
+    from . import jsoncodec
+    from .utils import write_json_atomic
+except ImportError:
+    import jsoncodec
+    from utils import write_json_atomic
+
+
+class WhitelistChecker:
+    """Vérifie les whitelists dans son propre pool, sans bloquer le scan
+
+    Les résultats sont gardés ttl secondes par (ip, port, protocole): un
+    re-scan ne refait pas la connexion login pour un serveur déjà connu.
+    """
+
+    def __init__(self, check: Callable[[str, int, float], bool], max_workers: int = 20, ttl: float = 24 * 3600,
+                 timeout: float = 2, cache_path: Optional[str] = None):
+        self.check = check
+        self.ttl = ttl
+        self.timeout = timeout
+        self.cache_path = cache_path
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._cache = {}  # (ip, port, protocole) -> (horodatage, whitelist)
+        self._pending = set()
+        self._lock = threading.Lock()
+        self.load()
+
+    @staticmethod
+    def _key(server):
+        return (server.ip, server.port, server.protocol)
+
+    def cached(self, server) -> Optional[bool]:
+        """Statut de whitelist connu et encore valide, ou None"""
+        with self._lock:
+            entry = self._cache.get(self._key(server))
+        if entry is None or time.time() - entry[0] > self.ttl:
+            return None
+        return entry[1]
+
+    def submit(self, server, on_checked: Callable):
+        """Planifie la vérification; on_checked(server) est appelé avec server.whitelist à jour"""
+        future = self._executor.submit(self._run, server, on_checked)
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(self._discard)
+
+    def _discard(self, future):
+        with self._lock:
+            self._pending.discard(future)
+
+    def _run(self, server, on_checked: Callable):
+        whitelist = self.check(server.ip, server.port, self.timeout)
+        with self._lock:
+            self._cache[self._key(server)] = (time.time(), whitelist)
+        server.whitelist = whitelist
+        try:
+            on_checked(server)
+        except Exception as e:
+            print(f"Erreur après vérification de whitelist: {e}")
+
+    def flush(self):
+        """Attend la fin des vérifications en cours"""
+        with self._lock:
+            pending = list(self._pending)
+        wait(pending)
+        self.save()
+
+    def load(self):
+        """Recharge les statuts encore valides depuis cache_path"""
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, 'rb') as f:
+                entries = jsoncodec.load(f)
+            now = time.time()
+            with self._lock:
+                for ip, port, protocol, checked_at, whitelist in entries:
+                    if now - checked_at <= self.ttl:
+                        self._cache[(ip, port, protocol)] = (checked_at, whitelist)
+        except Exception as e:
+            print(f"⚠️  Cache de whitelist illisible ({self.cache_path}): {e}")
+
+    def save(self):
+        """Écrit le cache dans cache_path (si configuré)"""
+        if not self.cache_path:
+            return
+        with self._lock:
+            entries = [[ip, port, protocol, checked_at, whitelist]
+                       for (ip, port, protocol), (checked_at, whitelist) in self._cache.items()]
+        try:
+            write_json_atomic(self.cache_path, entries)
+        except Exception as e:
+            print(f"⚠️  Erreur lors de la sauvegarde du cache de whitelist: {e}")
+
+    def close(self):
+        """Arrête le pool après les vérifications en cours"""
+        self.flush()
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Tests du scan distribué: baux, battements de cœur et workers locaux
+"""
+
+import json
+import os
+import socketserver
+import tempfile
+import threading
+import time
+
+from src.distributed import ScanCoordinator, ScanWorker, run_local_workers
+from src.geoip import GeoLocator
+from src.scanner import MinecraftScanner
+from src.protocol import pack_varint
+
+STATUS = {"version": {"name": "1.20.4", "protocol": 765}, "players": {"max": 20, "online": 1},
+          "description": {"text": "Serveur de test"}}
+
+
+def read_varint(stream):
+    value = shift = 0
+    while True:
+        byte = stream.read(1)
+        if not byte:
+            raise EOFError
+        value |= (byte[0] & 0x7F) << shift
+        if not byte[0] & 0x80:
+            return value
+        shift += 7
+
+
+class StatusHandler(socketserver.StreamRequestHandler):
+    """Répond au status d'un faux serveur Minecraft et refuse les connexions (login)"""
+
+    def handle(self):
+        try:
+            handshake = self.rfile.read(read_varint(self.rfile))
+            self.rfile.read(read_varint(self.rfile))
+            text = json.dumps(STATUS if handshake[-1] == 1 else {"text": "bye"}).encode()
+            body = b'\x00' + pack_varint(len(text)) + text
+            self.wfile.write(pack_varint(len(body)) + body)
+        except (EOFError, OSError):
+            pass
+
+
+class StatusServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+
+
+def start_status_server():
+    server = StatusServer(('127.0.0.1', 0), StatusHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def chunk_row(coordinator, chunk_id):
+    return coordinator._db.execute("SELECT status, worker, attempts FROM chunks WHERE id = ?", (chunk_id,)).fetchone()
+
+
+def test_lease_and_heartbeat():
+    """Un bail entretenu reste au worker; expiré, il est repris et l'ancien worker ne peut plus le terminer"""
+    with tempfile.TemporaryDirectory() as directory:
+        coordinator = ScanCoordinator(os.path.join(directory, 'job.db'), lease_timeout=0.5)
+        try:
+            coordinator.create_job(['192.0.2.0/29'], [25565], chunk_size=3, randomize=False)
+            first, _, _ = coordinator.lease('w1')
+            second, _, _ = coordinator.lease('w2')
+            assert first != second
+            assert coordinator.lease('w3') is None
+
+            time.sleep(0.3)
+            assert coordinator.heartbeat('w1', first, 1)
+            assert not coordinator.heartbeat('w2', first)  # Pas son bail
+            time.sleep(0.3)
+
+            # Le bail de w2 a expiré, celui de w1 a été prolongé
+            chunk_id, targets, _ = coordinator.lease('w3')
+            assert chunk_id == second and len(list(targets)) == 3
+            assert chunk_row(coordinator, second) == ('leased', 'w3', 2)
+            assert not coordinator.heartbeat('w2', second)
+
+            server = {'ip': '192.0.2.1', 'port': 25565}
+            assert not coordinator.complete('w2', second, [server])
+            assert coordinator.status()['found'] == 0
+            assert coordinator.complete('w3', second, [server], 3)
+            assert coordinator.complete('w1', first, [], 3)
+            assert not coordinator.complete('w1', first, [])  # Déjà terminé
+            assert coordinator.is_finished()
+            assert coordinator.status() == {'pending': 0, 'leased': 0, 'done': 2, 'scanned': 6, 'found': 1}
+        finally:
+            coordinator.close()
+
+
+def test_release():
+    """Un morceau rendu est repris tout de suite"""
+    with tempfile.TemporaryDirectory() as directory:
+        coordinator = ScanCoordinator(os.path.join(directory, 'job.db'), lease_timeout=60)
+        try:
+            coordinator.create_job(['192.0.2.0/31'], [25565], chunk_size=2)
+            chunk_id, _, _ = coordinator.lease('w1')
+            coordinator.release('w2', chunk_id)  # Sans effet: pas son bail
+            assert coordinator.lease('w2') is None
+            coordinator.release('w1', chunk_id)
+            assert coordinator.lease('w2')[0] == chunk_id
+        finally:
+            coordinator.close()
+
+
+def test_result_dedup():
+    """Un serveur trouvé par deux morceaux n'est enregistré qu'une fois par (ip, port)"""
+    with tempfile.TemporaryDirectory() as directory:
+        coordinator = ScanCoordinator(os.path.join(directory, 'job.db'))
+        try:
+            coordinator.create_job(['192.0.2.0/30'], [25565, 25566], chunk_size=2)
+            servers = [{'ip': '192.0.2.1', 'port': 25565, 'name': 'a'}, {'ip': '192.0.2.1', 'port': 25566}]
+            first, _, _ = coordinator.lease('w1')
+            second, _, _ = coordinator.lease('w1')
+            assert coordinator.complete('w1', first, servers)
+            assert coordinator.complete('w1', second, [{'ip': '192.0.2.1', 'port': 25565, 'name': 'b'}])
+            results = coordinator.results()
+            assert [(server['ip'], server['port']) for server in results] == [('192.0.2.1', 25565),
+                                                                              ('192.0.2.1', 25566)]
+            assert results[0]['name'] == 'b'
+        finally:
+            coordinator.close()
+
+
+def test_worker_discards_chunk_results():
+    """Le scanner d'un worker ne garde pas les serveurs des morceaux déjà remis au coordinateur"""
+    server = start_status_server()
+    port = server.server_address[1]
+    with tempfile.TemporaryDirectory() as directory:
+        coordinator = ScanCoordinator(os.path.join(directory, 'job.db'))
+        try:
+            coordinator.create_job(['127.0.0.0/29'], [port], chunk_size=2, randomize=False,
+                                   options={'max_threads': 4, 'timeout': 1, 'engine': 'threads'})
+            scanner = MinecraftScanner(geolocator=GeoLocator(providers=[]))
+            assert ScanWorker(coordinator, scanner).run() == 3
+            assert scanner.servers == [] and scanner.found_servers == 0
+            assert [(found['ip'], found['port']) for found in coordinator.results()] == [('127.0.0.1', port)]
+        finally:
+            coordinator.close()
+            server.shutdown()
+            server.server_close()
+
+
+def test_local_workers():
+    """Plusieurs processus workers se partagent le job et reprennent un bail abandonné"""
+    servers = [start_status_server() for _ in range(2)]
+    ports = [server.server_address[1] for server in servers]
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, 'job.db')
+        coordinator = ScanCoordinator(db_path, lease_timeout=1)
+        try:
+            coordinator.create_job(['127.0.0.0/29'], ports, chunk_size=4, seed=7,
+                                   options={'max_threads': 8, 'timeout': 1, 'engine': 'threads'})
+            # Worker disparu sans rendre son morceau: repris après l'expiration du bail
+            abandoned, _, _ = coordinator.lease('ghost')
+
+            processes = run_local_workers(db_path, 3, lease_timeout=1, use_config=False)
+            for process in processes:
+                process.join(60)
+                assert process.exitcode == 0
+
+            assert coordinator.is_finished()
+            status, worker, attempts = chunk_row(coordinator, abandoned)
+            assert status == 'done' and worker != 'ghost' and attempts == 2
+            assert not coordinator.complete('ghost', abandoned, [])
+            found = sorted((server['ip'], server['port']) for server in coordinator.results())
+            assert found == sorted(('127.0.0.1', port) for port in ports)
+            assert coordinator.status()['done'] == 3
+        finally:
+            coordinator.close()
+            for server in servers:
+                server.shutdown()
+                server.server_close()
+
+
+if __name__ == "__main__":
+    for test in (test_lease_and_heartbeat, test_release, test_result_dedup, test_worker_discards_chunk_results,
+                 test_local_workers):
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Tests de la géolocalisation (base MaxMind, service HTTP local de substitution)
+"""
+
+import ipaddress
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.geoip import GeoBatcher, GeoCache, GeoLocator, IpApiGeoIPProvider, MaxMindGeoIPProvider, unknown_location
+from src.scanner import MinecraftServer
+
+
+def city_record(country, city, lat, lon):
+    return {'country': {'names': {'en': country}}, 'city': {'names': {'en': city}},
+            'location': {'latitude': lat, 'longitude': lon}}
+
+
+class FakeReader:
+    """Remplace maxminddb.Reader: réseaux connus et préfixe renvoyé pour chaque recherche
+
+    Comme la vraie base, une IP inconnue renvoie None avec la longueur du
+    préfixe vide qui la contient (ici /16).
+    """
+
+    def __init__(self, networks):
+        self.networks = [(ipaddress.ip_network(network), record) for network, record in networks.items()]
+        self.calls = []
+        self.closed = False
+
+    def get_with_prefix_len(self, ip):
+        self.calls.append(ip)
+        address = ipaddress.ip_address(ip)
+        for network, record in self.networks:
+            if address in network:
+                return record, network.prefixlen
+        return None, 16
+
+    def close(self):
+        self.closed = True
+
+
+NETWORKS = {
+    '198.51.100.0/24': city_record('France', 'Paris', 48.86, 2.35),
+    '203.0.113.0/25': city_record('Germany', 'Berlin', 52.52, 13.4),
+    '203.0.113.128/25': {'registered_country': {'names': {'en': 'Austria'}}},
+}
+
+
+def test_lookup():
+    """Les enregistrements GeoLite2 sont convertis au format de MinecraftServer.location"""
+    provider = MaxMindGeoIPProvider(reader=FakeReader(NETWORKS))
+    assert provider.lookup('198.51.100.7') == {'country': 'France', 'city': 'Paris', 'lat': 48.86, 'lon': 2.35}
+    # Sans pays ni ville: pays d'enregistrement, ville inconnue
+    assert provider.lookup('203.0.113.200') == {'country': 'Austria', 'city': 'Unknown', 'lat': 0, 'lon': 0}
+    provider.close()
+    assert provider.reader.closed
+
+
+def test_prefix_cache():
+    """Toutes les IP d'un préfixe partagent une entrée; le cache est un LRU borné"""
+    reader = FakeReader(NETWORKS)
+    provider = MaxMindGeoIPProvider(reader=reader, cache_size=2)
+    for host in range(1, 50):
+        assert provider.lookup(f'198.51.100.{host}')['city'] == 'Paris'
+    assert reader.calls == ['198.51.100.1']
+
+    # Deux préfixes distincts dans le même /24 (longueurs /24 et /25 mélangées)
+    assert provider.lookup('203.0.113.1')['city'] == 'Berlin'
+    assert provider.lookup('203.0.113.2')['city'] == 'Berlin'
+    assert len(reader.calls) == 2
+
+    # Une copie est retournée: la modifier ne touche pas le cache
+    provider.lookup('198.51.100.9')['city'] = 'Lyon'
+    assert provider.lookup('198.51.100.9')['city'] == 'Paris'
+    assert len(reader.calls) == 2
+
+    # Troisième préfixe: le moins récemment utilisé (Berlin) est évincé
+    provider.lookup('203.0.113.130')
+    assert provider.lookup('198.51.100.10')['city'] == 'Paris'
+    assert len(reader.calls) == 3
+    provider.lookup('203.0.113.3')
+    assert reader.calls[-1] == '203.0.113.3'
+
+
+def test_unknown_ip():
+    """Une IP absente de la base donne None (mis en cache) et GeoLocator se rabat sur Unknown"""
+    reader = FakeReader(NETWORKS)
+    provider = MaxMindGeoIPProvider(reader=reader)
+    assert provider.lookup('192.0.2.1') is None
+    assert provider.lookup('192.0.200.1') is None  # Même /16 vide
+    assert reader.calls == ['192.0.2.1']
+
+    locator = GeoLocator(providers=[provider])
+    assert locator.locate('192.0.2.5') == unknown_location()
+    assert locator.locate('serveur.example.test') == unknown_location()
+    assert locator.locate('198.51.100.1')['country'] == 'France'
+    assert locator.locate_many(['192.0.2.5', '198.51.100.2']) == {
+        '192.0.2.5': unknown_location(),
+        '198.51.100.2': {'country': 'France', 'city': 'Paris', 'lat': 48.86, 'lon': 2.35},
+    }
+
+
+class FakeIpApi:
+    """Service /batch local au format d'ip-api.com (HTTP/1.1, connexions persistantes)
+
+    Les IP en 10.x sont inconnues du service (status fail). Chaque requête
+    est notée dans batches et le port client de sa connexion dans clients.
+    """
+
+    def __init__(self):
+        self.batches = []
+        self.clients = []
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                ips = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                api.batches.append(ips)
+                api.clients.append(self.client_address[1])
+                body = json.dumps([api.answer(ip) for ip in ips]).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = 'http://127.0.0.1:%d' % self.httpd.server_address[1]
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    @staticmethod
+    def answer(ip):
+        if ip.startswith('10.'):
+            return {'status': 'fail', 'query': ip}
+        return {'status': 'success', 'country': 'Canada', 'city': 'Montreal', 'lat': 45.5, 'lon': -73.6,
+                'query': ip}
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def test_http_batches():
+    """Les IP manquantes partent par lots de 100 sur une seule connexion; le cache évite les redemandes"""
+    api = FakeIpApi()
+    provider = IpApiGeoIPProvider(api.url, cache=GeoCache())
+    try:
+        ips = [f'198.51.{i // 256}.{i % 256}' for i in range(250)] + ['10.0.0.1']
+        results = provider.lookup_many(ips + ips[:10])
+        assert [len(batch) for batch in api.batches] == [100, 100, 51]
+        assert len(set(api.clients)) == 1  # Session réutilisée
+        assert results['198.51.0.7'] == {'country': 'Canada', 'city': 'Montreal', 'lat': 45.5, 'lon': -73.6}
+        assert results['10.0.0.1'] is None and len(results) == 251
+
+        assert provider.lookup('198.51.0.7')['city'] == 'Montreal'
+        assert provider.lookup('10.0.0.1') is None  # Réponse négative en cache
+        assert len(api.batches) == 3
+    finally:
+        provider.close()
+        api.close()
+
+
+def test_http_cache_ttl():
+    """Une entrée expirée est redemandée au service"""
+    api = FakeIpApi()
+    provider = IpApiGeoIPProvider(api.url, cache=GeoCache(ttl=0.2))
+    try:
+        provider.lookup('198.51.100.1')
+        provider.lookup('198.51.100.1')
+        assert len(api.batches) == 1
+        time.sleep(0.3)
+        provider.lookup('198.51.100.1')
+        assert api.batches == [['198.51.100.1'], ['198.51.100.1']]
+    finally:
+        provider.close()
+        api.close()
+
+
+def test_http_cache_persistence():
+    """Le cache écrit à la fermeture est rechargé par une nouvelle instance (entrées expirées exclues)"""
+    api = FakeIpApi()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'cache', 'geoip_cache.json')
+        provider = IpApiGeoIPProvider(api.url, cache=GeoCache(path))
+        try:
+            provider.lookup_many(['198.51.100.1', '10.0.0.1'])
+        finally:
+            provider.close()
+        assert os.path.exists(path) and len(api.batches) == 1
+
+        provider = IpApiGeoIPProvider(api.url, cache=GeoCache(path))
+        try:
+            assert provider.lookup('198.51.100.1')['country'] == 'Canada'
+            assert provider.lookup('10.0.0.1') is None
+            assert len(api.batches) == 1
+        finally:
+            provider.close()
+
+        cache = GeoCache(path, ttl=0)
+        time.sleep(0.01)
+        cache.load()
+        assert cache.get('198.51.100.1') == (False, None)
+    api.close()
+
+
+def test_geo_batcher():
+    """GeoBatcher groupe les serveurs soumis et se rabat sur Unknown pour les IP inconnues"""
+    api = FakeIpApi()
+    locator = GeoLocator(providers=[IpApiGeoIPProvider(api.url, cache=GeoCache())])
+    located = []
+    batcher = GeoBatcher(locator, located.append, batch_size=100, max_delay=0.2)
+    try:
+        servers = [MinecraftServer(f'198.51.100.{i}', 25565 + port) for i in range(60) for port in range(2)]
+        servers.append(MinecraftServer('10.0.0.1'))
+        for server in servers:
+            batcher.submit(server)
+        batcher.flush()
+        assert len(located) == len(servers)
+        assert all(len(batch) <= 100 for batch in api.batches)
+        assert sum(len(batch) for batch in api.batches) == 61  # Une seule fois par IP
+        assert servers[0].location['city'] == 'Montreal'
+        assert servers[-1].location == unknown_location()
+    finally:
+        locator.close()
+        api.close()
+
+
+if __name__ == "__main__":
+    for test in (test_lookup, test_prefix_cache, test_unknown_ip, test_http_batches, test_http_cache_ttl,
+                 test_http_cache_persistence, test_geo_batcher):
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Tests du client Query contre un répondeur Query local de substitution
+"""
+
+import asyncio
+import socket
+import struct
+import threading
+from collections import Counter
+
+from src.query import QueryClient, QueryEnricher, KV_PADDING, PLAYERS_MARKER, apply_query
+from src.scanner import MinecraftServer
+
+INFO = {
+    'hostname': 'Serveur de test', 'gametype': 'SMP', 'game_id': 'MINECRAFT', 'version': '1.20.4',
+    'plugins': 'Paper on 1.20.4: WorldEdit 7.2; Essentials 2.20', 'map': 'world',
+    'numplayers': '2', 'maxplayers': '20', 'hostport': '25565', 'hostip': '127.0.0.1',
+}
+PLAYERS = ['Alice', 'Bob']
+
+
+class FakeQueryServer:
+    """Répondeur Query UDP minimal (handshake et full stat)
+
+    Comme un vrai serveur, il ignore les full stats dont le challenge token
+    n'est pas le sien; rotate_token() simule un redémarrage. Avec silent,
+    il ne répond à rien.
+    """
+
+    def __init__(self, silent=False):
+        self.silent = silent
+        self.token = 9513307
+        self.requests = Counter()
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(('127.0.0.1', 0))
+        self.sock.settimeout(0.1)
+        self.port = self.sock.getsockname()[1]
+        self.running = True
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+        self.thread.start()
+
+    def rotate_token(self):
+        self.token += 1
+
+    def close(self):
+        self.running = False
+        self.thread.join()
+        self.sock.close()
+
+    def _serve(self):
+        while self.running:
+            try:
+                data, addr = self.sock.recvfrom(1500)
+            except socket.timeout:
+                continue
+            response = self._answer(data)
+            if response is not None and not self.silent:
+                self.sock.sendto(response, addr)
+
+    def _answer(self, data):
+        if data[:2] != b'\xfe\xfd' or len(data) < 7:
+            return None
+        packet_type, session = data[2], data[3:7]
+        if packet_type == 0x09:
+            self.requests['handshake'] += 1
+            return b'\x09' + session + str(self.token).encode() + b'\x00'
+        self.requests['stat'] += 1
+        if len(data) != 15 or struct.unpack_from('>I', data, 7)[0] != self.token:
+            return None
+        body = b''.join(key.encode() + b'\x00' + value.encode() + b'\x00' for key, value in INFO.items())
+        players = b''.join(name.encode() + b'\x00' for name in PLAYERS)
+        return b'\x00' + session + KV_PADDING + body + b'\x00' + PLAYERS_MARKER + players + b'\x00'
+
+
+def run_queries(client, targets):
+    """Ouvre le client et interroge les cibles dans l'ordre"""
+    async def run():
+        await client.open()
+        try:
+            return [await client.query(ip, port) for ip, port in targets]
+        finally:
+            client.close()
+    return asyncio.run(run())
+
+
+def test_full_stat_and_token_reuse():
+    """Handshake une seule fois, puis full stat décodé à chaque interrogation"""
+    server = FakeQueryServer()
+    try:
+        results = run_queries(QueryClient(timeout=0.5), [('127.0.0.1', server.port)] * 3)
+        for result in results:
+            assert result == {'info': INFO, 'players': PLAYERS}
+        assert server.requests == {'handshake': 1, 'stat': 3}
+    finally:
+        server.close()
+
+
+def test_expired_token():
+    """Un token refusé (serveur redémarré) entraîne un nouveau handshake"""
+    server = FakeQueryServer()
+    client = QueryClient(timeout=0.3, retries=1)
+
+    async def run():
+        await client.open()
+        try:
+            first = await client.query('127.0.0.1', server.port)
+            server.rotate_token()
+            return first, await client.query('127.0.0.1', server.port)
+        finally:
+            client.close()
+
+    try:
+        first, second = asyncio.run(run())
+        assert first['players'] == PLAYERS and second['players'] == PLAYERS
+        assert server.requests == {'handshake': 2, 'stat': 3}
+    finally:
+        server.close()
+
+
+def test_timeout():
+    """Sans réponse, l'interrogation retourne None après (retries + 1) essais"""
+    server = FakeQueryServer(silent=True)
+    try:
+        assert run_queries(QueryClient(timeout=0.2, retries=1), [('127.0.0.1', server.port)]) == [None]
+        assert server.requests == {'handshake': 2}
+    finally:
+        server.close()
+
+
+def test_apply_query():
+    """Joueurs, plugins et carte sont recopiés dans le serveur"""
+    server = MinecraftServer('127.0.0.1', 25565)
+    apply_query(server, {'info': INFO, 'players': PLAYERS})
+    assert server.players_list == PLAYERS
+    assert server.plugins == ['WorldEdit 7.2', 'Essentials 2.20']
+    assert server.map == 'world'
+
+
+def test_enricher():
+    """QueryEnricher interroge le port Query et ne rappelle que les serveurs qui répondent"""
+    responder = FakeQueryServer()
+    silent = FakeQueryServer(silent=True)
+    enricher = QueryEnricher(timeout=0.3, retries=0)
+    queried = []
+    try:
+        found = MinecraftServer('127.0.0.1', responder.port)
+        mute = MinecraftServer('127.0.0.1', silent.port)
+        enricher.submit(found, queried.append)
+        enricher.submit(mute, queried.append)
+        enricher.flush()
+        assert queried == [found]
+        assert found.players_list == PLAYERS and found.map == 'world'
+        assert mute.players_list == () and enricher.answered == 1
+    finally:
+        enricher.close()
+        responder.close()
+        silent.close()
+
+
+if __name__ == "__main__":
+    for test in (test_full_stat_and_token_reuse, test_expired_token, test_timeout, test_apply_query,
+                 test_enricher):
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Tests du résolveur DNS contre un serveur DNS local de substitution
+"""
+
+import socket
+import struct
+import threading
+import time
+from collections import Counter
+
+from src.resolver import (DNSResolver, TYPE_A, TYPE_CNAME, TYPE_SRV, RCODE_NXDOMAIN, encode_name,
+                          read_name)
+
+
+class FakeDNSServer:
+    """Serveur DNS UDP minimal: répond depuis zone {(nom, type): (rcode, [(nom, type, ttl, valeur)])}
+
+    Les noms absents de la zone reçoivent NXDOMAIN, ceux de silent ne reçoivent
+    rien. Chaque question reçue est comptée dans queries.
+    """
+
+    def __init__(self, zone, silent=()):
+        self.zone = zone
+        self.silent = set(silent)
+        self.queries = Counter()
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(('127.0.0.1', 0))
+        self.sock.settimeout(0.1)
+        self.address = '127.0.0.1:%d' % self.sock.getsockname()[1]
+        self.running = True
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.running = False
+        self.thread.join()
+        self.sock.close()
+
+    def _serve(self):
+        while self.running:
+            try:
+                data, addr = self.sock.recvfrom(512)
+            except socket.timeout:
+                continue
+            response = self._answer(data)
+            if response is not None:
+                self.sock.sendto(response, addr)
+
+    def _answer(self, data):
+        query_id = struct.unpack_from('>H', data)[0]
+        name, pos = read_name(data, 12)
+        qtype = struct.unpack_from('>H', data, pos)[0]
+        self.queries[(name, qtype)] += 1
+        if name in self.silent:
+            return None
+        rcode, records = self.zone.get((name, qtype), (RCODE_NXDOMAIN, []))
+        answers = b''.join(self._record(*record) for record in records)
+        header = struct.pack('>HHHHHH', query_id, 0x8180 | rcode, 1, len(records), 0, 0)
+        return header + data[12:pos + 4] + answers
+
+    @staticmethod
+    def _record(name, rtype, ttl, value):
+        if rtype == TYPE_A:
+            rdata = socket.inet_aton(value)
+        elif rtype == TYPE_CNAME:
+            rdata = encode_name(value)
+        else:
+            priority, weight, port, target = value
+            rdata = struct.pack('>HHH', priority, weight, port) + encode_name(target)
+        return encode_name(name) + struct.pack('>HHIH', rtype, 1, ttl, len(rdata)) + rdata
+
+
+ZONE = {
+    ('_minecraft._tcp.play.example.test', TYPE_SRV): (0, [
+        ('_minecraft._tcp.play.example.test', TYPE_SRV, 300, (20, 0, 25571, 'backup.example.test')),
+        ('_minecraft._tcp.play.example.test', TYPE_SRV, 300, (10, 5, 25570, 'mc.example.test')),
+    ]),
+    ('mc.example.test', TYPE_A): (0, [('mc.example.test', TYPE_A, 300, '10.0.0.5')]),
+    ('backup.example.test', TYPE_A): (0, [('backup.example.test', TYPE_A, 300, '10.0.0.6')]),
+    # Chaîne de CNAME que le serveur ne suit pas lui-même
+    ('www.example.test', TYPE_A): (0, [('www.example.test', TYPE_CNAME, 300, 'edge.example.test')]),
+    ('edge.example.test', TYPE_A): (0, [('edge.example.test', TYPE_CNAME, 300, 'host.example.test')]),
+    ('host.example.test', TYPE_A): (0, [('host.example.test', TYPE_A, 300, '10.0.0.7')]),
+    ('alias.example.test', TYPE_A): (0, [('alias.example.test', TYPE_A, 300, '10.0.0.7')]),
+    ('short.example.test', TYPE_A): (0, [('short.example.test', TYPE_A, 0, '10.0.0.8')]),
+}
+
+
+def make_resolver(server, **options):
+    options.setdefault('timeout', 0.5)
+    options.setdefault('retries', 0)
+    return DNSResolver(nameservers=[server.address], **options)
+
+
+def test_srv_lookup():
+    """SRV _minecraft._tcp: cible de plus haute priorité et son port"""
+    server = FakeDNSServer(ZONE)
+    resolver = make_resolver(server)
+    try:
+        assert resolver.resolve('play.example.test') == ('10.0.0.5', 25570)
+        # Port explicite: pas de SRV
+        assert resolver.resolve('mc.example.test', 25565) == ('10.0.0.5', 25565)
+        assert server.queries[('_minecraft._tcp.mc.example.test', TYPE_SRV)] == 0
+    finally:
+        resolver.close()
+        server.close()
+
+
+def test_cname_chain():
+    """Les CNAME non suivis par le serveur sont suivis par le résolveur"""
+    server = FakeDNSServer(ZONE)
+    resolver = make_resolver(server)
+    try:
+        assert resolver.resolve('www.example.test', 25565) == ('10.0.0.7', 25565)
+        assert server.queries[('host.example.test', TYPE_A)] == 1
+    finally:
+        resolver.close()
+        server.close()
+
+
+def test_nxdomain_negative_cache():
+    """NXDOMAIN est gardé negative_ttl secondes"""
+    server = FakeDNSServer(ZONE)
+    resolver = make_resolver(server, negative_ttl=0.3)
+    try:
+        assert resolver.resolve('missing.example.test') is None
+        assert resolver.resolve('missing.example.test') is None
+        assert server.queries[('missing.example.test', TYPE_A)] == 1
+        assert server.queries[('_minecraft._tcp.missing.example.test', TYPE_SRV)] == 1
+        time.sleep(0.4)
+        assert resolver.resolve('missing.example.test') is None
+        assert server.queries[('missing.example.test', TYPE_A)] == 2
+    finally:
+        resolver.close()
+        server.close()
+
+
+def test_ttl_cache():
+    """Les réponses sont gardées le temps de leur TTL, borné par min_ttl"""
+    server = FakeDNSServer(ZONE)
+    resolver = make_resolver(server, min_ttl=0.3)
+    try:
+        for _ in range(3):
+            assert resolver.resolve('mc.example.test', 25565) == ('10.0.0.5', 25565)
+            assert resolver.resolve('short.example.test', 25565) == ('10.0.0.8', 25565)
+        assert server.queries[('mc.example.test', TYPE_A)] == 1
+        assert server.queries[('short.example.test', TYPE_A)] == 1
+        time.sleep(0.4)
+        resolver.resolve('mc.example.test', 25565)
+        resolver.resolve('short.example.test', 25565)
+        assert server.queries[('mc.example.test', TYPE_A)] == 1  # TTL de 300 s
+        assert server.queries[('short.example.test', TYPE_A)] == 2  # TTL de 0 s relevé à min_ttl
+    finally:
+        resolver.close()
+        server.close()
+
+
+def test_timeout():
+    """Un serveur muet donne un échec qui n'est pas mis en cache"""
+    server = FakeDNSServer(ZONE, silent={'slow.example.test'})
+    resolver = make_resolver(server, timeout=0.2, retries=1)
+    try:
+        assert resolver.resolve('slow.example.test', 25565) is None
+        assert server.queries[('slow.example.test', TYPE_A)] == 2
+        assert resolver.resolve('slow.example.test', 25565) is None
+        assert server.queries[('slow.example.test', TYPE_A)] == 4
+    finally:
+        resolver.close()
+        server.close()
+
+
+def test_resolve_many_dedup():
+    """Plusieurs entrées menant au même point d'accès n'y figurent qu'une fois"""
+    server = FakeDNSServer(ZONE)
+    resolver = make_resolver(server)
+    try:
+        endpoints, unresolved = resolver.resolve_many([
+            'www.example.test:25565', 'alias.example.test:25565', '10.0.0.7:25565',
+            'play.example.test', 'missing.example.test', 'www.example.test:25565'])
+        assert endpoints == {
+            ('10.0.0.7', 25565): ['www.example.test:25565', 'alias.example.test:25565', '10.0.0.7:25565'],
+            ('10.0.0.5', 25570): ['play.example.test'],
+        }
+        assert unresolved == ['missing.example.test']
+        assert server.queries[('www.example.test', TYPE_A)] == 1
+    finally:
+        resolver.close()
+        server.close()
+
+
+def test_malformed_names():
+    """Un nom mal formé est non résolu (et mis en cache) sans interrompre les autres entrées"""
+    server = FakeDNSServer(ZONE)
+    resolver = make_resolver(server)
+    long_label = 'a' * 64 + '.example.test'
+    try:
+        assert resolver.resolve('bad..example.test') is None
+        assert resolver.resolve(long_label, 25565) is None
+        endpoints, unresolved = resolver.resolve_many(['bad..example.test', 'mc.example.test:25565', long_label])
+        assert endpoints == {('10.0.0.5', 25565): ['mc.example.test:25565']}
+        assert unresolved == ['bad..example.test', long_label]
+        assert sum(server.queries.values()) == 1
+        assert resolver.cache.get('bad..example.test', TYPE_A) == []
+    finally:
+        resolver.close()
+        server.close()
+
+
+if __name__ == "__main__":
+    for test in (test_srv_lookup, test_cname_chain, test_nxdomain_negative_cache, test_ttl_cache,
+                 test_timeout, test_resolve_many_dedup, test_malformed_names):
+        test()
+        print(f"✅ {test.__name__}")
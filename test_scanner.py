@@ -13,8 +13,8 @@ def test_scanner():
     print("🕷️  Test de MineSpyder Scanner...")
     
     # Créer le scanner
-    scanner = MinecraftScanner()
     config = Config()
+    scanner = MinecraftScanner.from_config(config)
     
     # Callback pour afficher les serveurs trouvés
     def on_server_found(server):